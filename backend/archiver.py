@@ -0,0 +1,97 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from database import PrimarySessionLocal
+from services import archive_service
+
+# Configuration section
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv('ARCHIVE_INTERVAL_SECONDS', '3600'))  # 0 disables the job in this process
+# Pause between batches, so a large backlog never holds the writer for long.
+ARCHIVE_PAUSE_SECONDS = float(os.getenv('ARCHIVE_PAUSE_SECONDS', '0.1'))
+
+logger = logging.getLogger(__name__)
+
+
+class Archiver:
+    """Moves old closed incidents and communications to the archive tables.
+
+    Every ``interval`` seconds a background thread archives batch after
+    batch, each in its own short transaction, until a batch comes back
+    short, so the hot tables only ever hold recent and active records.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = PrimarySessionLocal,
+        interval: float = ARCHIVE_INTERVAL_SECONDS,
+        pause: float = ARCHIVE_PAUSE_SECONDS,
+        batch_size: int = archive_service.ARCHIVE_BATCH_SIZE,
+    ) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self.pause = pause
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counts = {"runs": 0, "batches": 0, "incidents": 0, "communications": 0, "assignments": 0, "errors": 0}
+
+    def run(self) -> dict[str, int]:
+        """Archives everything currently due. Returns the records moved per table."""
+        moved = {"incidents": 0, "communications": 0, "assignments": 0}
+        with self._run_lock:
+            while not self._stopping.is_set():
+                try:
+                    with self.session_factory() as db:
+                        batch = archive_service.archive_batch(db, batch_size=self.batch_size)
+                except Exception:
+                    logger.exception("Archive batch failed")
+                    with self._lock:
+                        self.counts["errors"] += 1
+                    break
+                with self._lock:
+                    self.counts["batches"] += 1
+                    for table, count in batch.items():
+                        moved[table] += count
+                        self.counts[table] += count
+                if batch["incidents"] < self.batch_size and batch["communications"] < self.batch_size:
+                    break
+                time.sleep(self.pause)
+            with self._lock:
+                self.counts["runs"] += 1
+        return moved
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._work, name="archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the job after the batch in progress."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self.run()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+archiver = Archiver()
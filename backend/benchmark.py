@@ -0,0 +1,613 @@
+"""Reproducible benchmarks for the service layer and the HTTP API.
+
+Seeds a database with realistic volumes, times each service function
+directly (micro) and drives every router endpoint through an in-process
+ASGI client with concurrent workers (load). Reports p50/p95/p99 latency,
+throughput and peak RSS, plus bytes on the wire and throughput per
+CPU-second for the load suite, and compares them with a stored baseline.
+Run it from the backend directory:
+
+    python benchmark.py                       # seed if needed, run, compare
+    python benchmark.py --save-baseline       # record the current numbers
+    python benchmark.py --database-url postgresql://...  --only load
+    python benchmark.py --only load --accept-encoding identity   # uncompressed
+
+The database named by ``--database-url`` is created and filled on first
+use and kept as the seed. Every run then works on a fresh copy of it
+(``<name>.run.db`` next to a SQLite file, ``<name>_run`` on PostgreSQL),
+so the records the load suite creates and updates never reach the next
+run. Other databases are used in place and drift from run to run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+INCIDENT_TITLES = ("Structure fire", "Gas leak", "Traffic collision", "Flooded underpass", "Medical emergency",
+                   "Downed power line", "Chemical spill", "Missing person", "Building collapse", "Wildfire")
+STREETS = ("Main Street", "Elm Street", "Oak Avenue", "5th Avenue", "Harbor Road", "Mill Lane", "Park Drive")
+# Requests the mixed read/write case draws from, and its share of writes.
+MIXED_READS = ('GET /api/incidents', 'GET /api/incidents/{id}', 'GET /api/incidents/{id}/timeline',
+               'GET /api/resources/{id}', 'GET /api/communications')
+MIXED_WRITES = ('POST /api/incidents', 'PUT /api/incidents/{id}', 'PUT /api/resources/{id}', 'POST /api/communications')
+MIXED_WRITE_SHARE = 0.2
+RESOURCE_TYPES = ("ambulance", "engine", "ladder", "police", "rescue", "hazmat")
+CHANNELS = ("email", "sms", "phone")
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default='sqlite:///./benchmark.db')
+    parser.add_argument('--incidents', type=int, default=20000)
+    parser.add_argument('--resources', type=int, default=5000)
+    parser.add_argument('--communications', type=int, default=100000)
+    parser.add_argument('--only', choices=('micro', 'load'), help='Run one suite only')
+    parser.add_argument('--match', help='Only run cases whose name contains this text')
+    parser.add_argument('--iterations', type=int, default=200, help='Calls per micro-benchmark')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per endpoint in the load suite')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent load workers per endpoint')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the read-through cache')
+    parser.add_argument('--accept-encoding', default='gzip',
+                        help="Accept-Encoding sent by the load suite ('identity' for uncompressed responses)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown before a result counts as a regression (0.25 = 25%%)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--seed', type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def _working_url(url: Any) -> Any:
+    """Where a run against the seed database ``url`` does its work, or None to work in place."""
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        root, ext = os.path.splitext(url.database)
+        return url.set(database=f"{root}.run{ext or '.db'}")
+    if url.get_backend_name() == 'postgresql':
+        return url.set(database=f"{url.database}_run")
+    return None
+
+
+def _seeded(url: Any, incidents: int) -> bool:
+    from sqlalchemy import create_engine, inspect, text
+
+    if url.get_backend_name() == 'sqlite' and not os.path.exists(url.database):
+        return False
+    engine = create_engine(url)
+    try:
+        with engine.connect() as conn:
+            if not inspect(conn).has_table('incidents'):
+                return False
+            return conn.execute(text('SELECT count(*) FROM incidents')).scalar() >= incidents
+    finally:
+        engine.dispose()
+
+
+def _copy_database(source: Any, target: Any) -> None:
+    """Replaces ``target`` with a copy of ``source``, or with an empty database if ``source`` is None."""
+    from sqlalchemy import create_engine
+
+    if target.get_backend_name() == 'sqlite':
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(target.database + suffix):
+                os.remove(target.database + suffix)
+        if source is not None:
+            with closing(sqlite3.connect(source.database)) as src, closing(sqlite3.connect(target.database)) as dst:
+                src.backup(dst)
+        return
+    admin = create_engine(target.set(database='postgres'), isolation_level='AUTOCOMMIT')
+    try:
+        with admin.connect() as conn:
+            conn.exec_driver_sql(f'DROP DATABASE IF EXISTS "{target.database}"')
+            template = f' TEMPLATE "{source.database}"' if source is not None else ''
+            conn.exec_driver_sql(f'CREATE DATABASE "{target.database}"{template}')
+    finally:
+        admin.dispose()
+
+
+def prepare_database(args: argparse.Namespace) -> bool:
+    """Points ``args.run_url`` at a fresh copy of the seed database.
+
+    Returns whether the seed already holds the requested volumes; if not,
+    the run starts from an empty database, which ``seed`` fills and
+    ``save_seed`` keeps as the new seed. Databases that cannot be copied
+    are used in place and count as seeded.
+    """
+    from sqlalchemy.engine import make_url
+
+    url = make_url(args.database_url)
+    working = _working_url(url)
+    if working is None:
+        if url.get_backend_name() != 'sqlite':
+            print(f"Benchmarking {url.get_backend_name()} in place: runs change the data later runs see.",
+                  flush=True)
+        args.run_url = args.database_url
+        return True
+    seeded = _seeded(url, args.incidents)
+    _copy_database(url if seeded else None, working)
+    args.run_url = working.render_as_string(hide_password=False)
+    return seeded
+
+
+def save_seed(args: argparse.Namespace) -> None:
+    """Keeps the freshly seeded working database as the seed for later runs."""
+    from sqlalchemy.engine import make_url
+
+    import database
+
+    database.engine.dispose()
+    _copy_database(make_url(args.run_url), make_url(args.database_url))
+
+
+def configure(args: argparse.Namespace) -> None:
+    # The application modules read their settings at import time.
+    os.environ['DATABASE_URL'] = args.run_url
+    os.environ.setdefault('NOTIFY_WORKERS', '0')
+    # The seeded records are dated 2024; archiving them would change the dataset.
+    os.environ.setdefault('ARCHIVE_INTERVAL_SECONDS', '0')
+    if args.no_cache:
+        os.environ['CACHE_BACKEND'] = 'none'
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def summarize(
+    samples: list[float], elapsed: float, errors: int = 0, cpu_seconds: float = 0.0, wire_bytes: int = 0
+) -> dict[str, float]:
+    """Latency percentiles in milliseconds and throughput in operations/second.
+
+    With ``cpu_seconds`` and ``wire_bytes`` it also reports operations per
+    CPU-second, which is what bounds throughput once every core is busy,
+    and the mean response size as sent.
+    """
+    ordered = sorted(samples)
+    extra = {}
+    if cpu_seconds:
+        extra = {'ops_per_cpu_s': round(len(ordered) / cpu_seconds, 1), 'wire_bytes': round(wire_bytes / len(ordered))}
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'n': len(ordered),
+        'p50_ms': round(percentile(0.50), 3),
+        'p95_ms': round(percentile(0.95), 3),
+        'p99_ms': round(percentile(0.99), 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'ops_per_s': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'errors': errors,
+        **extra,
+    }
+
+
+def seed(args: argparse.Namespace) -> bool:
+    """Fills the database to the requested volumes unless it already holds them.
+
+    Returns whether it added any rows.
+    """
+    from sqlalchemy import func, insert, select
+
+    import database
+    from models import Communication, Incident, Resource
+
+    database.init_db()
+    from services.search_service import create_search_index
+    from services.summary_service import create_summary_counters
+    from services.change_log import create_change_log
+    create_search_index(database.engine)
+    create_summary_counters(database.engine)
+    create_change_log(database.engine)
+
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1)
+    with database.SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(Incident)) >= args.incidents:
+            return False
+        print(f"Seeding {args.incidents} incidents, {args.resources} resources, "
+              f"{args.communications} communications...", flush=True)
+        started = time.perf_counter()
+        incidents = [
+            {
+                'title': f"{rng.choice(INCIDENT_TITLES)} on {rng.choice(STREETS)}",
+                'description': f"Caller reports {rng.choice(INCIDENT_TITLES).lower()} near {rng.choice(STREETS)}; "
+                               f"units requested ({rng.randint(1, 5)}).",
+                'location': rng.choice(STREETS),
+                'latitude': 40.5 + rng.random(),
+                'longitude': -74.5 + rng.random(),
+                'status': rng.choices(('open', 'closed', 'resolved'), (3, 5, 2))[0],
+                'created_at': start + timedelta(minutes=i),
+            }
+            for i in range(args.incidents)
+        ]
+        resources = [
+            {
+                'type': rng.choice(RESOURCE_TYPES),
+                'name': f"Unit {i}",
+                'status': rng.choices(('available', 'deployed', 'unavailable'), (6, 3, 1))[0],
+                'location': rng.choice(STREETS),
+                'latitude': 40.5 + rng.random(),
+                'longitude': -74.5 + rng.random(),
+                'created_at': start + timedelta(minutes=i),
+            }
+            for i in range(args.resources)
+        ]
+        for model, rows in ((Incident, incidents), (Resource, resources)):
+            for offset in range(0, len(rows), 5000):
+                db.execute(insert(model), rows[offset:offset + 5000])
+        db.commit()
+        for offset in range(0, args.communications, 5000):
+            db.execute(insert(Communication), [
+                {
+                    'incident_id': rng.randint(1, args.incidents),
+                    'communication_text': f"{rng.choice(('Crew', 'Dispatch', 'Caller'))} update: "
+                                          f"{rng.choice(INCIDENT_TITLES).lower()} on {rng.choice(STREETS)}",
+                    'channel': rng.choice(CHANNELS),
+                    'created_at': start + timedelta(seconds=30 * (offset + i)),
+                }
+                for i in range(min(5000, args.communications - offset))
+            ])
+            db.commit()
+        print(f"Seeded in {time.perf_counter() - started:.1f} s", flush=True)
+    return True
+
+
+def micro_cases(args: argparse.Namespace) -> list[tuple[str, Callable[[Any], Any]]]:
+    """(name, call) pairs, one per service function worth tracking."""
+    import schemas
+    import serialization
+    from fastapi.encoders import jsonable_encoder
+    from models import Incident
+    from services import (allocation_service, communication_service, incident_service, resource_service,
+                          search_service, summary_service, sync_service)
+    from services.spatial_index import resource_index
+
+    rng = random.Random(args.seed)
+    incident_id = lambda: rng.randint(1, args.incidents)  # noqa: E731
+    resource_id = lambda: rng.randint(1, args.resources)  # noqa: E731
+    since = datetime(2024, 1, 5)
+    page: list[Any] = []
+
+    def rows(db) -> list[Any]:
+        # One 10k-row page, loaded once, to time response encoding on its own.
+        if not page:
+            page.extend(db.query(Incident).order_by(Incident.id).limit(10_000).all())
+        return page
+
+    return [
+        ('incident_service.get_incident', lambda db: incident_service.get_incident(incident_id(), db)),
+        ('incident_service.get_incidents', lambda db: incident_service.get_incidents(db, limit=100)),
+        ('incident_service.get_incidents[status,created_at]', lambda db: incident_service.get_incidents(
+            db, status='open', created_after=since, order_by='created_at', limit=100)),
+        ('incident_service.get_incidents[include_archived]', lambda db: incident_service.get_incidents(
+            db, status='closed', order_by='created_at', limit=100, include_archived=True)),
+        ('incident_service.get_incidents[fields]', lambda db: incident_service.get_incidents(
+            db, fields=['id', 'title', 'status'], limit=100)),
+        ('incident_service.get_incident_timeline', lambda db: incident_service.get_incident_timeline(
+            incident_id(), db, limit=50)),
+        ('incident_service.get_incident_timelines', lambda db: incident_service.get_incident_timelines(
+            db, status='open', limit=100, messages=5)),
+        ('incident_service.create_incident', lambda db: incident_service.create_incident(
+            schemas.IncidentCreate(title='Benchmark incident', description='Created by the benchmark'), db)),
+        ('resource_service.get_resource_by_id', lambda db: resource_service.get_resource_by_id(resource_id(), db)),
+        ('resource_service.get_resources[type,status]', lambda db: resource_service.get_resources(
+            db, type=rng.choice(RESOURCE_TYPES), status='available', limit=100)),
+        ('resource_service.get_nearest_resources', lambda db: resource_service.get_nearest_resources(
+            db, latitude=40.5 + rng.random(), longitude=-74.5 + rng.random(), k=5)),
+        ('resource_service.update_resource', lambda db: resource_service.update_resource(
+            resource_id(), schemas.ResourceUpdate(type=rng.choice(RESOURCE_TYPES), name='Unit'), db)),
+        ('communication_service.get_communications[incident]', lambda db: communication_service.get_communications(
+            db, incident_id=incident_id(), limit=100)),
+        ('communication_service.create_communication', lambda db: communication_service.create_communication(
+            schemas.CommunicationCreate(incident_id=incident_id(), message='Benchmark update', channel='sms'), db)),
+        ('search_service.search[incident]', lambda db: search_service.search(
+            'incident', rng.choice(('gas leak', 'fire', 'collision elm', 'flooded')), db, limit=20)),
+        ('search_service.search[communication]', lambda db: search_service.search(
+            'communication', rng.choice(('crew fire', 'dispatch', 'harbor spill')), db, limit=20)),
+        ('allocation_service.allocate[greedy,dry_run]', lambda db: allocation_service.allocate(
+            schemas.AllocationRequest(mode='greedy', dry_run=True), db)),
+        ('summary_service.get_summary', lambda db: summary_service.get_summary(db)),
+        ('sync_service.get_changes', lambda db: sync_service.get_changes(0, db, limit=500)),
+        ('spatial_index.nearest', lambda db: resource_index.nearest(40.5 + rng.random(), -74.5 + rng.random(), 5)),
+        ('serialize[pydantic,10k]', lambda db: json.dumps(
+            jsonable_encoder([schemas.Incident.from_orm(row).dict() for row in rows(db)]),
+            ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()),
+        ('serialize[fast,10k]', lambda db: serialization.dumps(
+            [serialization.encoder(schemas.Incident).to_dict(row) for row in rows(db)], schemas.Incident)),
+    ]
+
+
+def run_micro(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    import database
+    from services.spatial_index import rebuild_resource_index
+
+    with database.SessionLocal() as db:
+        rebuild_resource_index(db)
+    results = {}
+    for name, call in micro_cases(args):
+        if args.match and args.match not in name:
+            continue
+        # The heavy batch allocation and 10k-row encodes get fewer rounds than point lookups.
+        iterations = max(5, args.iterations // 20) if 'allocate' in name or '10k' in name else args.iterations
+        samples = []
+        errors = 0
+        with database.SessionLocal() as db:
+            for _ in range(min(10, iterations)):
+                call(db)
+            started = time.perf_counter()
+            for _ in range(iterations):
+                before = time.perf_counter()
+                try:
+                    call(db)
+                except Exception:
+                    errors += 1
+                    db.rollback()
+                samples.append(time.perf_counter() - before)
+                db.expunge_all()
+            elapsed = time.perf_counter() - started
+        results[name] = summarize(samples, elapsed, errors)
+        print(_row(name, results[name]), flush=True)
+    return results
+
+
+def load_fixtures(args: argparse.Namespace) -> dict[str, list[Any]]:
+    """Creates the rows the destructive load cases use up, one per request.
+
+    Deleting, assigning and releasing only succeed once per row, so those
+    cases get rows of their own instead of random seeded ids, and the
+    tables the other cases read stay as seeded.
+
+    Returns:
+        Incident and resource ids to delete, (incident, resource) pairs to
+        assign and active assignment ids to release.
+    """
+    from sqlalchemy import insert
+
+    import database
+    from models import Assignment, Incident, Resource
+
+    count = args.requests + 20  # the case's requests plus its warm-up
+    rng = random.Random(args.seed)
+
+    def incidents() -> list[dict[str, Any]]:
+        return [{'title': 'Load fixture', 'description': 'Created for the load benchmark', 'status': 'open',
+                 'latitude': 40.5 + rng.random(), 'longitude': -74.5 + rng.random()} for _ in range(count)]
+
+    def resources(status: str) -> list[dict[str, Any]]:
+        return [{'type': rng.choice(RESOURCE_TYPES), 'name': 'Load fixture', 'status': status,
+                 'latitude': 40.5 + rng.random(), 'longitude': -74.5 + rng.random()} for _ in range(count)]
+
+    with database.PrimarySessionLocal() as db:
+        fixtures: dict[str, list[Any]] = {
+            'delete_incidents': list(db.scalars(insert(Incident).returning(Incident.id), incidents())),
+            'delete_resources': list(db.scalars(insert(Resource).returning(Resource.id), resources('available'))),
+            'assign': list(zip(db.scalars(insert(Incident).returning(Incident.id), incidents()),
+                               db.scalars(insert(Resource).returning(Resource.id), resources('available')))),
+        }
+        held = zip(db.scalars(insert(Incident).returning(Incident.id), incidents()),
+                   db.scalars(insert(Resource).returning(Resource.id), resources('deployed')))
+        fixtures['release'] = list(db.scalars(insert(Assignment).returning(Assignment.id), [
+            {'incident_id': incident_id, 'resource_id': resource_id, 'status': 'active'}
+            for incident_id, resource_id in held
+        ]))
+        db.commit()
+    return fixtures
+
+
+def load_cases(
+    args: argparse.Namespace, fixtures: dict[str, list[Any]]
+) -> list[tuple[str, Callable[[random.Random], tuple[str, str, Any]]]]:
+    """(label, request factory) pairs covering every router endpoint.
+
+    The event feed (``GET /api/events`` and its WebSocket) is left out: it
+    streams until the client disconnects, so it has no response time to
+    measure. Publishing to it is part of every write case.
+    """
+    n_inc, n_res = args.incidents, args.resources
+    # Shared by all workers, so each request takes a row no other one does.
+    delete_incidents = iter(fixtures['delete_incidents'])
+    delete_resources = iter(fixtures['delete_resources'])
+    assign = iter(fixtures['assign'])
+    release = iter(fixtures['release'])
+
+    def body_incident(rng: random.Random) -> dict[str, Any]:
+        return {'title': 'Load test incident', 'description': 'Created by the load benchmark',
+                'latitude': 40.5 + rng.random(), 'longitude': -74.5 + rng.random()}
+
+    def body_resource(rng: random.Random) -> dict[str, Any]:
+        return {'type': rng.choice(RESOURCE_TYPES), 'name': 'Load test unit',
+                'latitude': 40.5 + rng.random(), 'longitude': -74.5 + rng.random()}
+
+    def body_assignment(rng: random.Random) -> dict[str, Any]:
+        incident_id, resource_id = next(assign)
+        return {'incident_id': incident_id, 'resource_id': resource_id}
+
+    cases = [
+        ('GET /api/incidents', lambda rng: ('GET', '/api/incidents?limit=100', None)),
+        ('GET /api/incidents?status', lambda rng: ('GET', '/api/incidents?status=open&order_by=created_at&limit=100', None)),
+        ('GET /api/incidents/{id}', lambda rng: ('GET', f'/api/incidents/{rng.randint(1, n_inc)}', None)),
+        ('GET /api/incidents/{id}/timeline', lambda rng: ('GET', f'/api/incidents/{rng.randint(1, n_inc)}/timeline', None)),
+        ('GET /api/incidents/timeline', lambda rng: ('GET', '/api/incidents/timeline?status=open&limit=50', None)),
+        ('GET /api/incidents/search', lambda rng: ('GET', f"/api/incidents/search?q={rng.choice(('gas', 'fire elm', 'spill'))}&limit=20", None)),
+        ('GET /api/incidents/export', lambda rng: ('GET', '/api/incidents/export?status=resolved&created_before=2024-01-02T00:00:00', None)),
+        ('POST /api/incidents', lambda rng: ('POST', '/api/incidents', body_incident(rng))),
+        ('PUT /api/incidents/{id}', lambda rng: ('PUT', f'/api/incidents/{rng.randint(1, n_inc)}',
+                                                 {**body_incident(rng), 'status': 'open'})),
+        ('POST /api/incidents/bulk', lambda rng: ('POST', '/api/incidents/bulk', [body_incident(rng) for _ in range(50)])),
+        ('PUT /api/incidents/bulk', lambda rng: ('PUT', '/api/incidents/bulk', [
+            {**body_incident(rng), 'id': rng.randint(1, n_inc), 'status': 'open'} for _ in range(50)])),
+        ('DELETE /api/incidents/{id}', lambda rng: ('DELETE', f'/api/incidents/{next(delete_incidents)}', None)),
+        ('GET /api/resources', lambda rng: ('GET', f'/api/resources?type={rng.choice(RESOURCE_TYPES)}&status=available', None)),
+        ('GET /api/resources/{id}', lambda rng: ('GET', f'/api/resources/{rng.randint(1, n_res)}', None)),
+        ('GET /api/resources/export', lambda rng: ('GET', f'/api/resources/export?type={rng.choice(RESOURCE_TYPES)}', None)),
+        ('GET /api/resources/nearest', lambda rng: ('GET', f'/api/resources/nearest?latitude={40.5 + rng.random():.4f}'
+                                                           f'&longitude={-74.5 + rng.random():.4f}&k=5', None)),
+        ('PUT /api/resources/{id}', lambda rng: ('PUT', f'/api/resources/{rng.randint(1, n_res)}',
+                                                 {'type': rng.choice(RESOURCE_TYPES), 'name': 'Unit'})),
+        ('POST /api/resources', lambda rng: ('POST', '/api/resources', body_resource(rng))),
+        ('POST /api/resources/bulk', lambda rng: ('POST', '/api/resources/bulk', [body_resource(rng) for _ in range(50)])),
+        ('PUT /api/resources/bulk', lambda rng: ('PUT', '/api/resources/bulk', [
+            {**body_resource(rng), 'id': rng.randint(1, n_res), 'name': 'Unit'} for _ in range(50)])),
+        ('DELETE /api/resources/{id}', lambda rng: ('DELETE', f'/api/resources/{next(delete_resources)}', None)),
+        ('POST /api/resources/telemetry', lambda rng: ('POST', '/api/resources/telemetry', [
+            {'id': rng.randint(1, n_res), 'latitude': 40.5 + rng.random(), 'longitude': -74.5 + rng.random()}])),
+        ('GET /api/communications', lambda rng: ('GET', f'/api/communications?incident_id={rng.randint(1, n_inc)}', None)),
+        ('GET /api/communications/{id}', lambda rng: ('GET', f'/api/communications/{rng.randint(1, args.communications)}', None)),
+        ('GET /api/communications/export', lambda rng: ('GET', f'/api/communications/export?incident_id={rng.randint(1, n_inc)}', None)),
+        ('GET /api/communications/search', lambda rng: ('GET', '/api/communications/search?q=crew&limit=20', None)),
+        ('POST /api/communications', lambda rng: ('POST', '/api/communications',
+                                                  {'incident_id': rng.randint(1, n_inc), 'message': 'Load test', 'channel': 'sms'})),
+        ('GET /api/allocations', lambda rng: ('GET', '/api/allocations?status=all&limit=100', None)),
+        ('POST /api/allocations', lambda rng: ('POST', '/api/allocations', body_assignment(rng))),
+        ('DELETE /api/allocations/{id}', lambda rng: ('DELETE', f'/api/allocations/{next(release)}', None)),
+        ('POST /api/allocations/solve', lambda rng: ('POST', '/api/allocations/solve', {'dry_run': True})),
+        ('GET /api/summary', lambda rng: ('GET', '/api/summary', None)),
+        ('GET /api/sync', lambda rng: ('GET', '/api/sync?limit=500', None)),
+        ('POST /api/sync', lambda rng: ('POST', '/api/sync', [
+            {'entity': 'incident', 'data': body_incident(rng)} for _ in range(10)])),
+        ('GET /health', lambda rng: ('GET', '/health', None)),
+    ]
+    by_label = dict(cases)
+    reads = [by_label[label] for label in MIXED_READS]
+    writes = [by_label[label] for label in MIXED_WRITES]
+
+    def mixed(rng: random.Random) -> tuple[str, str, Any]:
+        return rng.choice(writes if rng.random() < MIXED_WRITE_SHARE else reads)(rng)
+
+    return [*cases, ('MIXED read/write', mixed)]
+
+
+async def _drive(client: Any, factory: Callable, total: int, concurrency: int, seed: int) -> tuple[list[float], int, float, float, int]:
+    samples: list[float] = []
+    errors = 0
+    wire_bytes = 0
+    remaining = total
+
+    async def worker(number: int) -> None:
+        nonlocal remaining, errors, wire_bytes
+        rng = random.Random(seed * 1000 + number)
+        while remaining > 0:
+            remaining -= 1
+            method, url, body = factory(rng)
+            before = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            await response.aread()
+            samples.append(time.perf_counter() - before)
+            wire_bytes += response.num_bytes_downloaded
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    return samples, errors, time.perf_counter() - started, time.process_time() - cpu_started, wire_bytes
+
+
+async def _run_load(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    import httpx
+
+    import main
+
+    fixtures = load_fixtures(args)
+    main.on_startup()
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {'Accept-Encoding': args.accept_encoding}
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', headers=headers) as client:
+        for label, factory in load_cases(args, fixtures):
+            if args.match and args.match not in label:
+                continue
+            # Batch allocation and bulk writes are heavy; keep their share small.
+            total = max(10, args.requests // 20) if ('solve' in label or 'bulk' in label or 'export' in label) \
+                else args.requests
+            await _drive(client, factory, min(20, total), min(4, args.concurrency), args.seed)  # warm-up
+            samples, errors, elapsed, cpu_seconds, wire_bytes = await _drive(
+                client, factory, total, args.concurrency, args.seed)
+            results[label] = summarize(samples, elapsed, errors, cpu_seconds, wire_bytes)
+            print(_row(label, results[label]), flush=True)
+    main.on_shutdown()
+    return results
+
+
+def _row(name: str, result: dict[str, float]) -> str:
+    errors = f"  errors={result['errors']}" if result['errors'] else ''
+    load = (f"  {result['ops_per_cpu_s']:>9.1f}/cpu-s  {result['wire_bytes']:>9} B"
+            if 'ops_per_cpu_s' in result else '')
+    return (f"{name:<52} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+            f"p99 {result['p99_ms']:>9.2f} ms  {result['ops_per_s']:>9.1f}/s{load}{errors}")
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Lists the benchmarks whose p95 or throughput regressed beyond ``tolerance``."""
+    regressions = []
+    print(f"\nComparison with baseline (tolerance {tolerance:.0%}):")
+    for suite in ('micro', 'load'):
+        for name, now in current.get(suite, {}).items():
+            before = baseline.get(suite, {}).get(name)
+            if not before:
+                continue
+            p95_change = now['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+            ops_change = now['ops_per_s'] / before['ops_per_s'] - 1 if before['ops_per_s'] else 0.0
+            regressed = p95_change > tolerance or ops_change < -tolerance
+            marker = 'REGRESSED' if regressed else ('improved' if p95_change < -tolerance else '')
+            print(f"  {suite:<5} {name:<52} p95 {p95_change:+7.1%}  throughput {ops_change:+7.1%}  {marker}")
+            if regressed:
+                regressions.append(f"{suite}:{name}")
+    if baseline.get('peak_rss_mb'):
+        change = current['peak_rss_mb'] / baseline['peak_rss_mb'] - 1
+        print(f"  peak RSS {current['peak_rss_mb']:.0f} MB ({change:+.1%})")
+        if change > tolerance:
+            regressions.append('peak_rss_mb')
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv)
+    seeded = prepare_database(args)
+    configure(args)
+    if seed(args) and not seeded:
+        save_seed(args)
+    report: dict[str, Any] = {
+        'database': args.database_url.split('://')[0],
+        'volumes': {'incidents': args.incidents, 'resources': args.resources, 'communications': args.communications},
+    }
+    if args.only in (None, 'micro'):
+        print('\nService micro-benchmarks')
+        report['micro'] = run_micro(args)
+    if args.only in (None, 'load'):
+        print(f'\nAPI load ({args.concurrency} concurrent workers per endpoint)')
+        report['load'] = asyncio.run(_run_load(args))
+    report['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    print(f"\nPeak RSS: {report['peak_rss_mb']} MB")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
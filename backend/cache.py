@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Optional
+
+# Configuration section
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')  # memory | redis | none
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_TTL = float(os.getenv('CACHE_TTL', '10'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+CACHE_PREFIX = os.getenv('CACHE_PREFIX', 'ems:')
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters shared by every backend."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'sets': self.sets,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+class MemoryCache:
+    """In-process LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, stats: CacheStats, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL) -> None:
+        self.stats = stats
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats.increment('expirations')
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.increment('evictions')
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class RedisCache:
+    """Cache backed by any client exposing the redis-py get/set/delete/incr API.
+
+    Values are stored as JSON with a TTL; eviction is left to the server's
+    maxmemory policy. A fake client (e.g. fakeredis) can stand in locally.
+    """
+
+    def __init__(self, client: Any, stats: CacheStats, ttl: float = CACHE_TTL, prefix: str = CACHE_PREFIX) -> None:
+        self.client = client
+        self.stats = stats
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value, default=_json_default), px=int(self.ttl * 1000))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def counter(self, key: str) -> int:
+        raw = self.client.get(self.prefix + key)
+        return int(raw) if raw is not None else 0
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class NullCache:
+    """Backend used when caching is disabled; every read misses."""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def incr(self, key: str) -> int:
+        return 0
+
+    def counter(self, key: str) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return 0
+
+
+cache_stats = CacheStats()
+
+
+def build_backend(name: str = CACHE_BACKEND):
+    """Creates the configured cache backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+        ImportError: If the redis backend is selected but redis-py is missing.
+    """
+    if name == 'memory':
+        return MemoryCache(cache_stats)
+    if name == 'redis':
+        import redis  # Optional dependency, only needed for the shared backend.
+
+        return RedisCache(redis.Redis.from_url(CACHE_URL), cache_stats)
+    if name == 'none':
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+backend = build_backend()
+
+
+def set_backend(new_backend) -> None:
+    """Swaps the process-wide backend, e.g. for a RedisCache over a fake client."""
+    global backend
+    backend = new_backend
+
+
+def entity_key(entity: str, entity_id: int) -> str:
+    return f"{entity}:{entity_id}"
+
+
+def list_key(entity: str, params: dict[str, Any]) -> str:
+    """Builds a list-query key scoped to the entity's current list generation.
+
+    Any write to the entity bumps the generation, so every cached page for it
+    becomes unreachable at once without having to enumerate the pages.
+    """
+    generation = backend.counter(f"{entity}:generation")
+    encoded = json.dumps(params, sort_keys=True, default=_json_default, separators=(',', ':'))
+    return f"{entity}:list:{generation}:{encoded}"
+
+
+def get_or_load(key: str, loader: Callable[[], Optional[Any]], refresh: bool = False) -> Optional[Any]:
+    """Returns the cached value for ``key``, loading and storing it on a miss.
+
+    ``None`` results are not cached, so a missing entity is looked up again.
+    With ``refresh`` the cached value is ignored and replaced by a fresh load.
+    """
+    value = None if refresh else backend.get(key)
+    if value is not None:
+        cache_stats.increment('hits')
+        return value
+    cache_stats.increment('misses')
+    value = loader()
+    if value is not None:
+        backend.set(key, value)
+        cache_stats.increment('sets')
+    return value
+
+
+def invalidate(entity: str, *entity_ids: int) -> None:
+    """Drops the cached entities and every cached list page for ``entity``."""
+    backend.delete(*(entity_key(entity, entity_id) for entity_id in entity_ids))
+    backend.incr(f"{entity}:generation")
+    cache_stats.increment('invalidations', len(entity_ids) + 1)
+
+
+def get_cache_status() -> dict[str, Any]:
+    """Returns the backend in use, its size where known, and the counters."""
+    return {'backend': type(backend).__name__, 'entries': backend.size(), **cache_stats.snapshot()}
@@ -0,0 +1,223 @@
+import os
+import threading
+import zlib
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip is offered.
+    brotli = None
+
+# Configuration section
+# Encodings offered, in the server's order of preference; empty disables compression.
+COMPRESSION_ENCODINGS = [
+    name.strip() for name in os.getenv('COMPRESSION_ENCODINGS', 'br,gzip').split(',') if name.strip()
+]
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes; smaller bodies are sent as is
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+# Server-sent events must reach the client as soon as they are written.
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+class CompressionStats:
+    """Thread-safe counters of compressed responses and the bytes they saved."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts = {'compressed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def add(self, bytes_in: int, bytes_out: int, responses: int = 0) -> None:
+        with self._lock:
+            self.counts['compressed'] += responses
+            self.counts['bytes_in'] += bytes_in
+            self.counts['bytes_out'] += bytes_out
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+compression_stats = CompressionStats()
+
+
+class _Gzip:
+    def __init__(self, level: int = COMPRESSION_GZIP_LEVEL) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int = COMPRESSION_BROTLI_QUALITY) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+COMPRESSORS = {'gzip': _Gzip, **({'br': _Brotli} if brotli is not None else {})}
+
+
+def available_encodings(names: list[str] = COMPRESSION_ENCODINGS) -> list[str]:
+    """The configured encodings this process can produce, in order of preference.
+
+    Raises:
+        ValueError: If an encoding name is unknown.
+    """
+    for name in names:
+        if name not in ('gzip', 'br'):
+            raise ValueError(f"Unknown compression encoding: {name}")
+    return [name for name in names if name in COMPRESSORS]
+
+
+def choose_encoding(accept_encoding: str, offered: list[str]) -> Optional[str]:
+    """Picks the first offered encoding the client accepts with a non-zero q-value."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    for name in offered:
+        if accepted.get(name, accepted.get('*', 0.0)) > 0:
+            return name
+    return None
+
+
+def get_compression_status() -> dict[str, Any]:
+    """Returns the encodings offered and the counters."""
+    return {'encodings': ','.join(available_encodings()), **compression_stats.snapshot()}
+
+
+class CompressionMiddleware:
+    """Compresses JSON, NDJSON and text responses for clients that accept it.
+
+    Brotli is preferred when the ``brotli`` package is installed and the
+    client sends ``br``, gzip otherwise. Bodies under ``min_size`` are sent
+    as is. Streamed responses such as exports are compressed chunk by chunk
+    and each chunk is flushed, so a client receives it as soon as it is
+    written. Server-sent events and responses that already carry a
+    ``Content-Encoding`` are passed through. A strong ETag on a compressed
+    body gets an encoding suffix (``"abc-gzip"``); ``parse_etags`` removes
+    it again, so ``If-Match`` and ``If-None-Match`` keep working with it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Optional[list[str]] = None,
+        min_size: int = COMPRESSION_MIN_SIZE,
+    ) -> None:
+        self.app = app
+        self.encodings = available_encodings() if encodings is None else encodings
+        self.min_size = min_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get('accept-encoding', ''), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, encoding, self.min_size, Headers(scope=scope).get('if-none-match', ''))
+        await self.app(scope, receive, responder.send_compressed)
+
+
+class _Responder:
+    def __init__(self, send: Send, encoding: str, min_size: int, if_none_match: str = '') -> None:
+        self.send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Any] = None
+        self.passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = headers.get('content-type', '')
+        return (
+            self.start['status'] not in (204, 304)
+            and 'content-encoding' not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(UNCOMPRESSED_TYPES)
+        )
+
+    def _not_modified_start(self) -> Message:
+        # A 304 must repeat the ETag the client holds; that is the encoded
+        # tag if its cached copy came from a compressed response.
+        headers = MutableHeaders(raw=list(self.start.get('headers', [])))
+        etag = headers.get('etag')
+        if etag is not None and encoded_etag(etag, self.encoding) in self.if_none_match:
+            headers['ETag'] = encoded_etag(etag, self.encoding)
+        return {**self.start, 'headers': headers.raw}
+
+    async def send_compressed(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start = message
+            if message['status'] == 304:
+                self.start = self._not_modified_start()
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.compressor is None:
+            headers = Headers(raw=self.start.get('headers', []))
+            if not self._compressible(headers) or (not more_body and len(body) < self.min_size):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = COMPRESSORS[self.encoding]()
+            response_headers = MutableHeaders(raw=list(self.start.get('headers', [])))
+            response_headers['Content-Encoding'] = self.encoding
+            response_headers.add_vary_header('Accept-Encoding')
+            if 'etag' in response_headers:
+                response_headers['ETag'] = encoded_etag(response_headers['etag'], self.encoding)
+            if more_body:
+                del response_headers['Content-Length']
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                response_headers['Content-Length'] = str(len(body))
+                compression_stats.add(len(message.get('body', b'')), len(body), responses=1)
+                await self.send({**self.start, 'headers': response_headers.raw})
+                await self.send({'type': 'http.response.body', 'body': body})
+                return
+            await self.send({**self.start, 'headers': response_headers.raw})
+
+        compressed = self.compressor.compress(body)
+        compressed += self.compressor.flush() if more_body else self.compressor.finish()
+        compression_stats.add(len(body), len(compressed), responses=0 if more_body else 1)
+        await self.send({'type': 'http.response.body', 'body': compressed, 'more_body': more_body})
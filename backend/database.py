@@ -1,44 +1,546 @@
-```python
+import asyncio
+import logging
 import os
-from sqlalchemy import create_engine, exc
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, Generator, Optional, TypeVar, Union
+
+from sqlalchemy import MetaData, create_engine, event, exc, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from starlette.concurrency import run_in_threadpool
 
 from models import Base
+from replicas import DATABASE_REPLICA_URLS, Replica, ReplicaSet, note_write, primary_pinned, replica_name
+
+logger = logging.getLogger(__name__)
 
 # Configuration section
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./emergency_management.db')
+DB_ECHO = os.getenv('DB_ECHO', 'false').lower() in ('1', 'true', 'yes')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Serve requests through SQLAlchemy's asyncio extension instead of the threadpool.
+DB_ASYNC = os.getenv('DB_ASYNC', 'false').lower() in ('1', 'true', 'yes')
+# File-based SQLite only: WAL journaling, the pragmas below, one serialized
+# writer connection and a pool of read-only connections for reads.
+SQLITE_TUNED = os.getenv('SQLITE_TUNED', 'false').lower() in ('1', 'true', 'yes')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative values are KiB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+
+T = TypeVar('T')
+
+
+class PoolStats:
+    """Thread-safe counters describing how the connection pool is being used."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidations': self.invalidations,
+                'wait_count': self.wait_count,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class _TimedPoolMixin:
+    """Records how long callers wait to obtain a connection from the pool."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith('sqlite')
+
+
+def _async_url(url: str) -> str:
+    """Maps a sync database URL onto the matching asyncio driver."""
+    if url.startswith('sqlite://'):
+        return url.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+    for prefix in ('postgresql://', 'postgres://', 'postgresql+psycopg2://'):
+        if url.startswith(prefix):
+            return url.replace(prefix, 'postgresql+asyncpg://', 1)
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL', _async_url(DATABASE_URL))
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    return _is_sqlite(url) and (url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url)
+
+
+def _sqlite_single_writer(url: str) -> bool:
+    return SQLITE_TUNED and _is_sqlite(url) and not _is_sqlite_memory(url)
 
 
-def get_db() -> Generator[sessionmaker, None, None]:
-    """Provides a database session using a context manager.
+def _read_only_url(url: str) -> str:
+    """The URL of a read-only connection to the same SQLite file."""
+    parsed = make_url(url)
+    path = os.path.abspath(parsed.database)
+    return str(parsed.set(database=f'file:{path}', query={**parsed.query, 'mode': 'ro', 'uri': 'true'}))
 
-    This function creates a database engine, a sessionmaker, and yields a database session.
-    The session is automatically closed when exiting the `with` block.
+
+def _engine_kwargs(url: str, queue_pool: type, single_writer: bool = False) -> dict[str, Any]:
+    kwargs: dict[str, Any] = {'echo': DB_ECHO, 'pool_pre_ping': DB_POOL_PRE_PING}
+    if _is_sqlite(url):
+        kwargs['connect_args'] = {'check_same_thread': False}
+    if _is_sqlite_memory(url):
+        kwargs['poolclass'] = StaticPool
+    else:
+        kwargs.update(
+            poolclass=queue_pool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    if single_writer:
+        # Writers queue for the one connection here instead of retrying on
+        # "database is locked" inside SQLite.
+        kwargs.update(pool_size=1, max_overflow=0)
+    return kwargs
+
+
+def _tune_sqlite(new_engine: Engine, writer: bool) -> None:
+    def on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        if writer:
+            # WAL is a property of the file: readers never block the writer or each other.
+            cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        cursor.execute(f'PRAGMA cache_size={SQLITE_CACHE_SIZE}')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+    event.listen(new_engine, 'connect', on_connect)
+
+
+def _track_pool(new_engine: Engine) -> None:
+    event.listen(new_engine, 'connect', lambda *_: pool_stats.increment('connects'))
+    event.listen(new_engine, 'checkout', lambda *_: pool_stats.increment('checkouts'))
+    event.listen(new_engine, 'checkin', lambda *_: pool_stats.increment('checkins'))
+    event.listen(new_engine, 'invalidate', lambda *_: pool_stats.increment('invalidations'))
+
+
+def build_engine(url: str = DATABASE_URL, read_only: bool = False) -> Engine:
+    """Creates an engine with the pool configured from the environment.
+
+    In-memory SQLite databases only exist for the lifetime of a single
+    connection, so they share one connection through a StaticPool. Every
+    other database gets a sized QueuePool. With ``SQLITE_TUNED`` a SQLite
+    file gets its pragmas applied on connect and the primary engine keeps a
+    single connection, the one serialized writer.
+
+    Args:
+        url: The database URL.
+        read_only: Build the read-only counterpart of a tuned SQLite engine.
 
     Returns:
-        Generator[sessionmaker, None, None]: A generator yielding a database session.
+        Engine: The configured engine.
+    """
+    single_writer = _sqlite_single_writer(url)
+    if read_only:
+        url = _read_only_url(url)
+    new_engine = create_engine(url, **_engine_kwargs(url, TimedQueuePool, single_writer and not read_only))
+    if single_writer:
+        _tune_sqlite(new_engine, writer=not read_only)
+    _track_pool(new_engine)
+    return new_engine
 
-    Raises:
-        Exception: If there's an issue creating the database engine or the database.
+
+def build_async_engine(url: str = ASYNC_DATABASE_URL, read_only: bool = False) -> AsyncEngine:
+    """Creates an asyncio engine (aiosqlite, asyncpg) with the same pool settings.
+
+    Args:
+        url: The async database URL.
+        read_only: Build the read-only counterpart of a tuned SQLite engine.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    single_writer = _sqlite_single_writer(url)
+    if read_only:
+        url = _read_only_url(url)
+    new_engine = create_async_engine(url, **_engine_kwargs(url, TimedAsyncQueuePool, single_writer and not read_only))
+    if single_writer:
+        _tune_sqlite(new_engine.sync_engine, writer=not read_only)
+    _track_pool(new_engine.sync_engine)
+    return new_engine
+
+
+class RoutingSession(Session):
+    """Session that sends writes to its bind and plain reads elsewhere.
+
+    Flushes, INSERT/UPDATE/DELETE, raw SQL and SELECT ... FOR UPDATE go to
+    the primary. Each read transaction takes a replica from ``replicas``,
+    or ``read_bind`` when none is healthy or configured. Once a session has
+    written, the rest of it stays on the primary so it reads its own
+    changes, and so does the rest of a request that committed a write or
+    whose client wrote within the read-your-writes window. Without a
+    ``read_bind`` or ``replicas`` it behaves exactly like a plain Session.
     """
+
+    def __init__(
+        self,
+        *args: Any,
+        read_bind: Optional[Engine] = None,
+        replicas: Optional[ReplicaSet] = None,
+        use_async: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.read_bind = read_bind
+        self.replicas = replicas if replicas else None
+        self.use_async = use_async
+        self._wrote = False
+        self._reader: Optional[Engine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.read_bind is not None or self.replicas is not None:
+            if self._flushing or _is_write(clause):
+                self._wrote = True
+            if not self._wrote and not primary_pinned():
+                if self._reader is None:
+                    self._reader = self._choose_reader()
+                if self._reader is not None:
+                    return self._reader
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _choose_reader(self) -> Optional[Engine]:
+        replica = self.replicas.choose(self.use_async) if self.replicas is not None else None
+        return replica or self.read_bind
+
+    def close(self) -> None:
+        super().close()
+        self._wrote = False
+
+
+def _is_write(clause: Any) -> bool:
+    return isinstance(clause, (UpdateBase, TextClause)) or getattr(clause, '_for_update_arg', None) is not None
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _end_reading(session: RoutingSession, transaction) -> None:
+    # The next transaction may read from another replica.
+    if transaction.parent is None:
+        session._reader = None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session: RoutingSession) -> None:
+    if session._wrote:
+        note_write()
+
+
+# One engine and session factory per process, shared by every request.
+engine = build_engine()
+# Serves the sessions' reads when it differs from the primary engine.
+read_engine: Optional[Engine] = build_engine(read_only=True) if _sqlite_single_writer(DATABASE_URL) else None
+# Replica engines get the same pool settings; the health checks use the sync ones.
+replicas = ReplicaSet([
+    Replica(
+        replica_name(url),
+        build_engine(url, read_only=_sqlite_single_writer(url)),
+        build_async_engine(_async_url(url), read_only=_sqlite_single_writer(url)) if DB_ASYNC else None,
+    )
+    for url in DATABASE_REPLICA_URLS
+])
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, read_bind=read_engine, replicas=replicas
+)
+# For background workers whose reads feed their writes, so must not lag.
+PrimarySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# The async engine is only built when enabled so the asyncio drivers stay optional.
+async_engine: Optional[AsyncEngine] = build_async_engine() if DB_ASYNC else None
+async_read_engine: Optional[AsyncEngine] = (
+    build_async_engine(read_only=True)
+    if async_engine is not None and _sqlite_single_writer(ASYNC_DATABASE_URL)
+    else None
+)
+# Objects must stay loaded after commit; lazy refreshes cannot run outside the greenlet.
+AsyncSessionLocal = (
+    async_sessionmaker(
+        async_engine,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        read_bind=async_read_engine.sync_engine if async_read_engine is not None else None,
+        replicas=replicas,
+        use_async=True,
+    )
+    if async_engine is not None
+    else None
+)
+
+
+def init_db() -> None:
+    """Creates any missing tables, columns and indexes. Called once at application startup."""
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _add_autoincrement()
+    _add_missing_indexes()
+
+
+def _add_missing_columns() -> None:
+    # create_all never alters existing tables; add new nullable columns, and
+    # NOT NULL ones with a constant default, so databases created by an older
+    # release keep working.
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                if column.nullable:
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                elif column.server_default is not None and isinstance(column.server_default.arg, str):
+                    default = column.server_default.arg.replace("'", "''")
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NOT NULL DEFAULT '{default}'"
+                    ))
+
+
+def _add_autoincrement() -> None:
+    # SQLite cannot add AUTOINCREMENT to an existing table, and without it a
+    # new row may reuse the id of an archived or deleted one. Tables that
+    # declare it but were created without it are rebuilt: copied into a new
+    # table, which then takes the old one's place. Dropping the old table
+    # drops its indexes and triggers; _add_missing_indexes and the startup
+    # hooks that install triggers put them back.
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not table.dialect_options['sqlite']['autoincrement']:
+                continue
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table.name}
+            ).scalar()
+            if sql is not None and 'AUTOINCREMENT' not in sql.upper():
+                _rebuild_sqlite_table(conn, table)
+
+
+def _rebuild_sqlite_table(conn: Any, table: Any) -> None:
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    columns = ', '.join(column.name for column in table.columns if column.name in existing)
+    # The copy's foreign keys need the tables they point at beside it.
+    metadata = MetaData()
+    for other in Base.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(metadata)
+    rebuilt = table.to_metadata(metadata, name=f'{table.name}_rebuild')
+    archive = f'{table.name}_archive'
+    has_archive = inspect(conn).has_table(archive)
+    # Keeps the rename from re-checking triggers on other tables that name
+    # this one while it is briefly missing.
+    conn.exec_driver_sql('PRAGMA legacy_alter_table=ON')
     try:
-        engine = create_engine(
-            DATABASE_URL,
-            connect_args={'check_same_thread': False},
-            echo=True  # For debugging purposes, remove in production
+        conn.execute(text(f'DROP TABLE IF EXISTS {rebuilt.name}'))
+        conn.execute(CreateTable(rebuilt))
+        conn.execute(text(f'INSERT INTO {rebuilt.name} ({columns}) SELECT {columns} FROM {table.name}'))
+        conn.execute(text(f'DROP TABLE {table.name}'))
+        conn.execute(text(f'ALTER TABLE {rebuilt.name} RENAME TO {table.name}'))
+        # New ids start past every id already used, archived ones included.
+        highest = f'SELECT max(id) AS id FROM {table.name}'
+        if has_archive:
+            highest += f' UNION ALL SELECT max(id) FROM {archive}'
+        conn.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table.name})
+        conn.execute(
+            text(f'INSERT INTO sqlite_sequence (name, seq) SELECT :name, coalesce(max(id), 0) FROM ({highest})'),
+            {'name': table.name},
         )
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-        Base.metadata.create_all(bind=engine)
-        yield SessionLocal
-    except exc.SQLAlchemyError as e:
-        print(f"Database error: {e}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
         raise
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+    finally:
+        conn.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+
+
+def _add_missing_indexes() -> None:
+    # Likewise for indexes declared after a table already existed.
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+
+
+def get_pool_status() -> dict[str, Any]:
+    """Returns the current pool occupancy together with the cumulative counters.
+
+    Returns:
+        dict[str, Any]: Pool size, checked-out connections, overflow and
+        checkout/wait statistics.
+    """
+    primary = async_engine if async_engine is not None else engine
+    reader = async_read_engine if async_engine is not None else read_engine
+    pool = (reader or primary).pool
+    status: dict[str, Any] = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    if reader is not None:
+        # Reads are served from the pool above; this is the single writer.
+        status.update(writer_checked_out=primary.pool.checkedout())
+    status.update(pool_stats.snapshot())
+    return status
+
+
+def _ping(connection: Any) -> None:
+    connection.execute(text('SELECT 1'))
+
+
+async def check_database(timeout: float = 5.0) -> None:
+    """Round-trips ``SELECT 1`` through the pool that serves reads.
+
+    Raises:
+        Exception: Whatever the driver raised, or TimeoutError if no
+            connection could be used within ``timeout`` seconds.
+    """
+    # Pings the pool reads use, so a long write does not fail the probe.
+    async def ping() -> None:
+        if async_engine is not None:
+            async with (async_read_engine or async_engine).connect() as connection:
+                await connection.run_sync(_ping)
+        else:
+            def ping_sync() -> None:
+                with (read_engine or engine).connect() as connection:
+                    _ping(connection)
+
+            await run_in_threadpool(ping_sync)
+
+    await asyncio.wait_for(ping(), timeout)
+
+
+def get_db() -> Generator[Session, None, None]:
+    """Provides a database session for the duration of a request.
+
+    The session borrows a connection from the process-wide pool and returns it
+    when the request finishes.
+
+    Yields:
+        Session: A database session.
+
+    Raises:
+        exc.SQLAlchemyError: If there's an issue talking to the database.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except exc.SQLAlchemyError:
+        db.rollback()
+        logger.exception("Database error")
         raise
     finally:
-        # Ensure the engine is disposed of to prevent resource leaks
-        engine.dispose()
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Provides an asyncio database session for the duration of a request.
 
-```
\ No newline at end of file
+    Yields:
+        AsyncSession: A database session bound to the async engine.
+
+    Raises:
+        RuntimeError: If the async database path is not enabled.
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled; set DB_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except exc.SQLAlchemyError:
+            await db.rollback()
+            logger.exception("Database error")
+            raise
+
+
+# Dependency used by the routers; DB_ASYNC selects which path serves requests.
+get_session = get_async_db if DB_ASYNC else get_db
+
+DBSession = Union[Session, AsyncSession]
+
+
+async def run_in_session(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Runs a service function without blocking the event loop.
+
+    Service functions take the session as their last positional argument. On
+    the async path they run inside ``AsyncSession.run_sync`` so every query
+    goes through the asyncio driver; on the sync path they run in the
+    threadpool exactly as plain ``def`` endpoints would.
+
+    Args:
+        db: The session provided by ``get_session``.
+        fn: The service function to call.
+        *args: Positional arguments passed before the session.
+        **kwargs: Keyword arguments passed through to ``fn``.
+
+    Returns:
+        T: Whatever the service function returns.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda sync_db: fn(*args, sync_db, **kwargs))
+    return await run_in_threadpool(fn, *args, db, **kwargs)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel
+
+import serialization
+
+# Configuration section
+EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '1000'))
+
+
+@dataclass
+class EventFilter:
+    """Which events a subscriber wants; an empty criterion matches everything."""
+    entities: Optional[set[str]] = None
+    status: Optional[str] = None
+    incident_id: Optional[int] = None
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        if self.entities and event["entity"] not in self.entities:
+            return False
+        data = event.get("data") or {}
+        if self.status is not None and data.get("status", self.status) != self.status:
+            return False
+        if self.incident_id is not None:
+            incident_id = event["id"] if event["entity"] == "incident" else data.get("incident_id")
+            if incident_id is not None and incident_id != self.incident_id:
+                return False
+        return True
+
+
+@dataclass
+class Subscription:
+    """A subscriber's bounded queue on the event loop that consumes it."""
+    filter: EventFilter
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=EVENT_QUEUE_SIZE))
+    dropped: int = 0
+
+    def _deliver(self, event: dict[str, Any]) -> None:
+        # Runs on the subscriber's loop. A consumer that falls a full queue
+        # behind loses its backlog and is told to resync from the list endpoints,
+        # so one slow client never holds memory or delays the publishers.
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"entity": "feed", "action": "resync", "id": None, "data": None, "ts": time.time()})
+        self.queue.put_nowait(event)
+
+    async def get(self) -> dict[str, Any]:
+        return await self.queue.get()
+
+
+class EventHub:
+    """In-process publish/subscribe hub for entity change events.
+
+    Services publish from whichever thread committed the change; events are
+    handed to each matching subscriber's loop with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: list[Subscription] = []
+        self.published = 0
+
+    def subscribe(self, event_filter: EventFilter) -> Subscription:
+        """Registers a subscriber on the running event loop."""
+        subscription = Subscription(filter=event_filter, loop=asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(self, entity: str, action: str, entity_id: Optional[int], data: Optional[dict[str, Any]] = None) -> None:
+        """Fans an event out to every subscriber whose filter matches it.
+
+        Args:
+            entity: "incident", "resource" or "communication".
+            action: "created", "updated", "deleted" or "archived".
+            entity_id: The id of the changed entity.
+            data: The entity in its API shape, when available.
+        """
+        event = {"entity": entity, "action": action, "id": entity_id, "data": data, "ts": time.time()}
+        with self._lock:
+            self.published += 1
+            targets = [s for s in self._subscriptions if s.filter.matches(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; it will never read again.
+                self.unsubscribe(subscription)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscriptions),
+                'published': self.published,
+                'dropped': sum(s.dropped for s in self._subscriptions),
+            }
+
+
+hub = EventHub()
+
+
+def publish_model(entity: str, action: str, schema: Type[BaseModel], obj: Any) -> None:
+    """Publishes a change to an ORM object, serializing it only if someone listens.
+
+    The data is rendered by ``serialization.to_dict``, as the routers render
+    responses, so an event carries the entity exactly as the API returns it.
+    """
+    if hub.has_subscribers():
+        hub.publish(entity, action, obj.id, serialization.to_dict(schema, obj))
+
+
+def publish_ids(entity: str, action: str, entity_ids: list[int]) -> None:
+    """Publishes one data-less event per id, e.g. after a bulk write."""
+    if hub.has_subscribers():
+        for entity_id in entity_ids:
+            hub.publish(entity, action, entity_id)
+
+
+def _encode_default(value: Any) -> str:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode(event: dict[str, Any]) -> str:
+    """Renders an event as JSON text, with dates in ISO 8601 like the HTTP responses."""
+    return json.dumps(event, default=_encode_default, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
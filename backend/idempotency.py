@@ -0,0 +1,308 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configuration section
+IDEMPOTENCY_BACKEND = os.getenv('IDEMPOTENCY_BACKEND', 'memory')  # memory | redis | none
+IDEMPOTENCY_URL = os.getenv('IDEMPOTENCY_URL', os.getenv('CACHE_URL', 'redis://localhost:6379/0'))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400'))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MAX_KEYS', '10000'))
+# How long a duplicate waits for the first request with its key to finish.
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv('IDEMPOTENCY_WAIT_SECONDS', '30'))
+# How long a shared store holds an in-flight key if its process dies mid-request.
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv('IDEMPOTENCY_LOCK_SECONDS', '60'))
+IDEMPOTENCY_PREFIX = os.getenv('IDEMPOTENCY_PREFIX', 'ems:idempotency:')
+
+HEADER = b'idempotency-key'
+REPLAYED_HEADER = b'idempotent-replayed'
+MAX_KEY_LENGTH = 255
+
+# Outcomes of claiming a key.
+RUN = 'run'
+REPLAY = 'replay'
+MISMATCH = 'mismatch'
+BUSY = 'busy'
+
+
+class IdempotencyStats:
+    """Thread-safe counters of how keyed requests were handled."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts = {'executed': 0, 'replayed': 0, 'waited': 0, 'busy': 0, 'mismatched': 0, 'released': 0}
+
+    def increment(self, counter: str) -> None:
+        with self._lock:
+            self.counts[counter] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+class _Entry:
+    __slots__ = ('fingerprint', 'response', 'expires_at', 'done')
+
+    def __init__(self, fingerprint: str) -> None:
+        self.fingerprint = fingerprint
+        self.response: Optional[dict[str, Any]] = None
+        self.expires_at = float('inf')
+        self.done = asyncio.Event()
+
+
+class MemoryStore:
+    """In-process LRU of completed keys and their responses, which expire after a TTL.
+
+    Keys still in flight are held apart and never evicted, so their waiters
+    are always woken and a retry never runs the request a second time; only
+    completed keys count towards ``max_keys``. Only used from the event
+    loop, so a duplicate simply awaits the first request's completion event.
+    """
+
+    def __init__(self, max_keys: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL_SECONDS) -> None:
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._in_flight: dict[str, _Entry] = {}
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    async def claim(self, key: str, fingerprint: str, wait: float) -> tuple[str, Optional[dict[str, Any]]]:
+        deadline = time.monotonic() + wait
+        while True:
+            entry = self._in_flight.get(key) or self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._in_flight[key] = _Entry(fingerprint)
+                return RUN, None
+            if entry.fingerprint != fingerprint:
+                return MISMATCH, None
+            if entry.response is not None:
+                return REPLAY, entry.response
+            idempotency_stats.increment('waited')
+            try:
+                await asyncio.wait_for(entry.done.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                return BUSY, None
+            # Done: replay it, or run it here if the first attempt was released.
+
+    async def complete(self, key: str, fingerprint: str, response: dict[str, Any]) -> None:
+        entry = self._in_flight.pop(key, None)
+        if entry is not None:
+            entry.response = response
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries[key] = entry
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            entry.done.set()
+
+    async def release(self, key: str) -> None:
+        entry = self._in_flight.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+    def size(self) -> int:
+        return len(self._in_flight) + len(self._entries)
+
+
+class RedisStore:
+    """Store shared by every process, over a redis-py asyncio client.
+
+    An in-flight key holds a lease of ``lock_seconds``, so a key whose
+    process died becomes usable again; duplicates poll until it completes.
+    Bounding the number of keys is left to the server's maxmemory policy.
+    """
+
+    poll_seconds = 0.05
+
+    def __init__(
+        self,
+        client: Any,
+        ttl: float = IDEMPOTENCY_TTL_SECONDS,
+        lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS,
+        prefix: str = IDEMPOTENCY_PREFIX,
+    ) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.prefix = prefix
+
+    async def claim(self, key: str, fingerprint: str, wait: float) -> tuple[str, Optional[dict[str, Any]]]:
+        deadline = time.monotonic() + wait
+        pending = json.dumps({'fingerprint': fingerprint})
+        waited = False
+        while True:
+            if await self.client.set(self.prefix + key, pending, nx=True, px=int(self.lock_seconds * 1000)):
+                return RUN, None
+            raw = await self.client.get(self.prefix + key)
+            if raw is not None:
+                entry = json.loads(raw)
+                if entry['fingerprint'] != fingerprint:
+                    return MISMATCH, None
+                if 'response' in entry:
+                    return REPLAY, entry['response']
+            if time.monotonic() >= deadline:
+                return BUSY, None
+            if not waited:
+                idempotency_stats.increment('waited')
+                waited = True
+            await asyncio.sleep(self.poll_seconds)
+
+    async def complete(self, key: str, fingerprint: str, response: dict[str, Any]) -> None:
+        value = json.dumps({'fingerprint': fingerprint, 'response': response})
+        await self.client.set(self.prefix + key, value, px=int(self.ttl * 1000))
+
+    async def release(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+idempotency_stats = IdempotencyStats()
+
+
+def build_store(name: str = IDEMPOTENCY_BACKEND):
+    """Creates the configured key store, or None when idempotency keys are ignored.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+        ImportError: If the redis backend is selected but redis-py is missing.
+    """
+    if name == 'memory':
+        return MemoryStore()
+    if name == 'redis':
+        import redis.asyncio  # Optional dependency, only needed for the shared backend.
+
+        return RedisStore(redis.asyncio.Redis.from_url(IDEMPOTENCY_URL))
+    if name == 'none':
+        return None
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {name}")
+
+
+store = build_store()
+
+
+def get_idempotency_status() -> dict[str, Any]:
+    """Returns the store in use, its size where known, and the counters."""
+    return {
+        'backend': type(store).__name__,
+        'keys': store.size() if store is not None else 0,
+        **idempotency_stats.snapshot(),
+    }
+
+
+def _json_error(status: int, detail: str) -> tuple[Message, Message]:
+    body = json.dumps({'detail': detail}).encode()
+    start = {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    }
+    return start, {'type': 'http.response.body', 'body': body}
+
+
+class IdempotencyMiddleware:
+    """Makes POST requests carrying an ``Idempotency-Key`` header safe to retry.
+
+    The first request with a key runs normally and its response is stored
+    for ``IDEMPOTENCY_TTL_SECONDS``. Retries with the same key, method, path
+    and body get that response back, marked ``Idempotent-Replayed: true``,
+    without reaching the endpoint. A retry that arrives while the first is
+    still running waits for it, so concurrent duplicates execute once;
+    after ``IDEMPOTENCY_WAIT_SECONDS`` it gets 409 instead. Reusing a key
+    for a different body is a 422. Server errors are not stored, so a retry
+    after a 5xx runs again. Requests without the header are untouched.
+    """
+
+    def __init__(self, app: ASGIApp, wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS) -> None:
+        self.app = app
+        self.wait_seconds = wait_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        key = _header(scope, HEADER) if scope['type'] == 'http' and scope['method'] == 'POST' else None
+        if key is None or store is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            for message in _json_error(400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"):
+                await send(message)
+            return
+
+        messages = []
+        body = hashlib.sha256()
+        while True:
+            message = await receive()
+            messages.append(message)
+            body.update(message.get('body', b''))
+            if message['type'] != 'http.request' or not message.get('more_body', False):
+                break
+        store_key = f"{scope['path']}:{key.decode('latin-1')}"
+        fingerprint = body.hexdigest()
+
+        outcome, response = await store.claim(store_key, fingerprint, self.wait_seconds)
+        if outcome == REPLAY:
+            idempotency_stats.increment('replayed')
+            await _replay(response, send)
+            return
+        if outcome == MISMATCH:
+            idempotency_stats.increment('mismatched')
+            for message in _json_error(422, "Idempotency-Key was already used for a different request"):
+                await send(message)
+            return
+        if outcome == BUSY:
+            idempotency_stats.increment('busy')
+            for message in _json_error(409, "A request with this Idempotency-Key is still in progress"):
+                await send(message)
+            return
+
+        async def replay_receive() -> Message:
+            return messages.pop(0) if messages else await receive()
+
+        captured: dict[str, Any] = {'status': 500, 'headers': [], 'body': b''}
+
+        async def capture(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                captured['status'] = message['status']
+                captured['headers'] = list(message.get('headers', []))
+            elif message['type'] == 'http.response.body':
+                captured['body'] += message.get('body', b'')
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture)
+        except BaseException:
+            await store.release(store_key)
+            idempotency_stats.increment('released')
+            raise
+        if captured['status'] >= 500:
+            await store.release(store_key)
+            idempotency_stats.increment('released')
+            return
+        idempotency_stats.increment('executed')
+        await store.complete(store_key, fingerprint, {
+            'status': captured['status'],
+            'headers': [[name.decode('latin-1'), value.decode('latin-1')] for name, value in captured['headers']],
+            'body': base64.b64encode(captured['body']).decode(),
+        })
+
+
+def _header(scope: Scope, name: bytes) -> Optional[bytes]:
+    for header, value in scope.get('headers', ()):
+        if header == name:
+            return value.strip()
+    return None
+
+
+async def _replay(response: dict[str, Any], send: Send) -> None:
+    headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response['headers']]
+    await send({'type': 'http.response.start', 'status': response['status'], 'headers': [*headers, (REPLAYED_HEADER, b'true')]})
+    await send({'type': 'http.response.body', 'body': base64.b64decode(response['body'])})
@@ -1,19 +1,86 @@
-import uvicorn
 from fastapi import FastAPI, Request, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import os
 
-from database import SessionLocal, engine
-from models import Base
-from routers import incident_router, resource_router, communication_router  # Add more routers as needed
-
-Base.metadata.create_all(bind=engine)
+from cache import get_cache_status
+from compression import CompressionMiddleware, get_compression_status
+from database import (
+    DB_MAX_OVERFLOW,
+    PrimarySessionLocal,
+    async_engine,
+    async_read_engine,
+    check_database,
+    engine,
+    get_pool_status,
+    init_db,
+    read_engine,
+    replicas,
+)
+from events import hub
+from idempotency import IdempotencyMiddleware, get_idempotency_status
+from metrics import MetricsMiddleware, instrument_engine, registry
+from archiver import archiver
+from notifications import dispatcher
+from replicas import ReadYourWritesMiddleware
+from telemetry import buffer as telemetry_buffer
+from services.search_service import create_search_index
+from services.summary_service import create_summary_counters
+from services.change_log import create_change_log
+from services.spatial_index import rebuild_resource_index
+from routers import incident_router, resource_router, communication_router, events_router, allocation_router, summary_router, sync_router  # Add more routers as needed
 
 app = FastAPI()
 
+for sync_engine in (engine, read_engine):
+    if sync_engine is not None:
+        instrument_engine(sync_engine)
+for engine_async in (async_engine, async_read_engine):
+    if engine_async is not None:
+        instrument_engine(engine_async.sync_engine)
+for replica in replicas.replicas:
+    instrument_engine(replica.engine)
+    if replica.async_engine is not None:
+        instrument_engine(replica.async_engine.sync_engine)
+
+
+def prepare_database():
+    """Creates the tables, search index, summary counters and change log if missing."""
+    init_db()
+    create_search_index(engine)
+    create_summary_counters(engine)
+    create_change_log(engine)
+
+
+@app.on_event("startup")
+def on_startup():
+    # Schema creation runs once per process instead of on every request;
+    # with several workers server.run has already done it, once, for all of them.
+    if os.getenv("DATABASE_PREPARED") != "1":
+        prepare_database()
+    # The spatial index is kept in step with the primary from here on.
+    with PrimarySessionLocal() as db:
+        rebuild_resource_index(db)
+    replicas.start()
+    dispatcher.start()
+    telemetry_buffer.start()
+    archiver.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    archiver.stop()
+    dispatcher.stop()
+    # Writes the telemetry still buffered before the process exits.
+    telemetry_buffer.stop()
+    replicas.stop()
+
+
+# Innermost, so replayed responses still pass through CORS and the metrics.
+app.add_middleware(IdempotencyMiddleware)
+
 # CORS configuration
 origins = ["*"]  # Replace with your allowed origins in production
 app.add_middleware(
@@ -21,26 +88,69 @@ app.add_middleware(
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "If-Match", "If-None-Match", "Idempotency-Key"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Idempotent-Replayed"],
 )
-
-# Dependency injection for database session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+app.add_middleware(ReadYourWritesMiddleware)
+# Outside the idempotency store, so replays are compressed like first responses.
+app.add_middleware(CompressionMiddleware)
+# Added last so it is outermost and times the whole middleware stack.
+app.add_middleware(MetricsMiddleware)
 
 # Register routers
 app.include_router(incident_router.router)
 app.include_router(resource_router.router)
-app.include_router(communication_router.router) # Add more routers as needed
+app.include_router(communication_router.router)
+app.include_router(allocation_router.router)
+app.include_router(summary_router.router)
+app.include_router(sync_router.router)
+app.include_router(events_router.router) # Add more routers as needed
 
 # Health check endpoint
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+async def health_check():
+    """Readiness probe: 503 unless the database answers and the pool has room."""
+    checks = {"database": "ok"}
+    try:
+        await check_database()
+    except Exception as exc:
+        checks["database"] = f"error: {type(exc).__name__}: {exc}"
+    pool = get_pool_status()
+    if "size" in pool and pool["checked_out"] >= pool["size"] + DB_MAX_OVERFLOW:
+        checks["pool"] = "exhausted"
+    ready = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if ready else "unavailable",
+            "checks": checks,
+            "pool": pool,
+            "cache": get_cache_status(),
+            "events": hub.stats(),
+            "notifications": dispatcher.stats(),
+            "telemetry": telemetry_buffer.stats(),
+            "archive": archiver.stats(),
+            "replicas": replicas.stats(),
+            "idempotency": get_idempotency_status(),
+            "compression": get_compression_status(),
+        },
+    )
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    extra = {
+        "pool": get_pool_status(),
+        "cache": get_cache_status(),
+        "events": hub.stats(),
+        "notifications": dispatcher.stats(),
+        "telemetry": telemetry_buffer.stats(),
+        "archive": archiver.stats(),
+        "replicas": replicas.stats(),
+        "idempotency": get_idempotency_status(),
+        "compression": get_compression_status(),
+    }
+    return PlainTextResponse(registry.render(extra), media_type="text/plain; version=0.0.4")
 
 # Error handling
 @app.exception_handler(Exception)
@@ -65,4 +175,6 @@ if os.path.exists("static"):
 app.openapi_url = "/openapi.json"
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import server
+
+    server.run()
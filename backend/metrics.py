@@ -0,0 +1,243 @@
+import bisect
+import contextvars
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configuration section
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '1'))
+SLOW_REQUEST_SQL_LIMIT = int(os.getenv('SLOW_REQUEST_SQL_LIMIT', '5'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (not thread-safe)."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[tuple[str, int]]:
+        running = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            running += count
+            yield ('+Inf' if bound == math.inf else _number(bound)), running
+
+
+@dataclass
+class RequestStats:
+    """SQL activity attributed to the request being served."""
+    queries: int = 0
+    db_seconds: float = 0.0
+    # Slowest statements seen, as a min-heap of (seconds, sequence, sql).
+    slowest: list[tuple[float, int, str]] = field(default_factory=list)
+
+    def record(self, seconds: float, statement: str) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+        entry = (seconds, self.queries, statement)
+        if len(self.slowest) < SLOW_REQUEST_SQL_LIMIT:
+            heapq.heappush(self.slowest, entry)
+        elif SLOW_REQUEST_SQL_LIMIT and seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+# Set per request by the middleware. The stats object is shared, not copied,
+# with the threadpool and greenlet contexts that run the request's queries.
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar('request_stats', default=None)
+
+
+class Registry:
+    """Process-wide request and database metrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latency: dict[tuple[str, str, str], Histogram] = {}
+        self.response_size: dict[tuple[str, str], Histogram] = {}
+        self.request_queries: dict[tuple[str, str], Histogram] = {}
+        self.request_db_seconds: dict[tuple[str, str], Histogram] = {}
+        self.in_flight = 0
+        self.slow_requests = 0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.setdefault((method, route, str(status)), Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.response_size.setdefault(key, Histogram(SIZE_BUCKETS)).observe(size)
+            self.request_queries.setdefault(key, Histogram(QUERY_BUCKETS)).observe(stats.queries)
+            self.request_db_seconds.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(stats.db_seconds)
+            if seconds >= SLOW_REQUEST_SECONDS:
+                self.slow_requests += 1
+
+    def query(self, seconds: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def render(self, extra: Optional[dict[str, dict[str, Any]]] = None) -> str:
+        """Renders every metric in the Prometheus text exposition format.
+
+        Args:
+            extra: Additional gauges as {group: {name: value}}, e.g. pool or
+                cache counters; each numeric value becomes ``ems_<group>_<name>``.
+        """
+        lines: list[str] = []
+        with self._lock:
+            _histograms(lines, 'ems_http_request_duration_seconds', 'Request latency.',
+                        self.latency, ('method', 'route', 'status'))
+            _histograms(lines, 'ems_http_response_size_bytes', 'Response body size.',
+                        self.response_size, ('method', 'route'))
+            _histograms(lines, 'ems_http_request_db_queries', 'SQL statements per request.',
+                        self.request_queries, ('method', 'route'))
+            _histograms(lines, 'ems_http_request_db_seconds', 'Time spent in SQL per request.',
+                        self.request_db_seconds, ('method', 'route'))
+            _scalar(lines, 'ems_http_requests_in_flight', 'gauge', 'Requests being served.', self.in_flight)
+            _scalar(lines, 'ems_http_slow_requests_total', 'counter', 'Requests slower than SLOW_REQUEST_SECONDS.',
+                    self.slow_requests)
+            _scalar(lines, 'ems_db_queries_total', 'counter', 'SQL statements executed.', self.db_queries)
+            _scalar(lines, 'ems_db_seconds_total', 'counter', 'Time spent executing SQL.', self.db_seconds)
+        for group, values in (extra or {}).items():
+            for name, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    _scalar(lines, f'ems_{group}_{name}', 'gauge', f'{group} {name}.', value)
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], **more: str) -> str:
+    pairs = [*zip(names, values), *more.items()]
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+def _histograms(lines: list[str], name: str, help_text: str, series: dict, label_names: tuple[str, ...]) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for label_values, histogram in sorted(series.items()):
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{_labels(label_names, label_values, le=bound)} {count}')
+        lines.append(f'{name}_sum{_labels(label_names, label_values)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(label_names, label_values)} {histogram.count}')
+
+
+def _scalar(lines: list[str], name: str, kind: str, help_text: str, value: float) -> None:
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    lines.append(f'{name} {value}')
+
+
+registry = Registry()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Times every statement on ``engine`` and attributes it to the current request."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info['query_started'].pop()
+        registry.query(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.record(seconds, statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, size and SQL usage per route.
+
+    Routes are labelled by their path template (``/api/incidents/{incident_id}``),
+    so ids do not explode the series count. Requests slower than
+    ``SLOW_REQUEST_SECONDS`` are logged with their slowest SQL statements.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        registry.started()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            _current.reset(token)
+            route = route_template(scope)
+            registry.finished(scope['method'], route, status, seconds, size, stats)
+            if seconds >= SLOW_REQUEST_SECONDS:
+                _log_slow(scope, route, status, seconds, stats)
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route that served ``scope``, or "unmatched"."""
+    app = scope.get('app')
+    for route in getattr(getattr(app, 'router', None), 'routes', ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, 'path', scope['path'])
+    return 'unmatched'
+
+
+def _log_slow(scope: Scope, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+    statements = '\n'.join(
+        f'  {duration * 1000:.1f} ms: {" ".join(sql.split())}'
+        for duration, _, sql in sorted(stats.slowest, reverse=True)
+    )
+    logger.warning(
+        'Slow request %s %s (%s) -> %s in %.0f ms; %d queries, %.0f ms in SQL\n%s',
+        scope['method'], scope['path'], route, status, seconds * 1000, stats.queries, stats.db_seconds * 1000,
+        statements,
+    )
@@ -1,14 +1,45 @@
-```python
 import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Index, Text, false, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import relationship, synonym
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 
 Base = declarative_base()
 
+
+class utc_now(FunctionElement):
+    """The current time as naive UTC at whole seconds, on every database.
+
+    Timestamps are stored without a time zone and compared with naive UTC
+    from Python. SQLite's CURRENT_TIMESTAMP is UTC already, but PostgreSQL's
+    now() is in the session time zone and would be stored as local time.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utc_now)
+def _utc_now(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utc_now, "postgresql")
+def _utc_now_postgresql(element, compiler, **kw):
+    return "date_trunc('second', now() AT TIME ZONE 'utc')"
+
+
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds. Bound datetimes must use
+# the same text format, otherwise range filters and keyset cursors on these
+# columns compare strings like "12:00:00" against "12:00:00.000000".
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class Incident(Base):
     """Represents an emergency incident."""
     __tablename__ = "incidents"
@@ -16,9 +47,31 @@ class Incident(Base):
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=False)
     location = Column(String(255))
+    latitude = Column(Float)
+    longitude = Column(Float)
     status = Column(String(50))
-    created_at = Column(DateTime, default=func.now(), server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    created_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    updated_at = Column(Timestamp, onupdate=utc_now())
+    # Bumped by every write; the ETag is derived from it, since updated_at
+    # only has whole seconds.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Never lazy-loaded per incident; the timeline services fill it in bulk.
+    communications = relationship(
+        "Communication",
+        back_populates="incident",
+        order_by="(Communication.created_at, Communication.id)",
+        lazy="raise_on_sql",
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
+        # Dashboards filter by status and page by created_at; the trailing
+        # rowid in every SQLite index makes these serve (created_at, id) keysets.
+        Index("ix_incidents_status_created_at", "status", "created_at"),
+        Index("ix_incidents_created_at", "created_at"),
+        # Archived ids must never be handed out again; see archive_service.
+        {"sqlite_autoincrement": True},
+    )
 
 
 class Resource(Base):
@@ -29,8 +82,18 @@ class Resource(Base):
     name = Column(String(255))
     status = Column(String(50))
     location = Column(String(255))
-    created_at = Column(DateTime, default=func.now(), server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    latitude = Column(Float)
+    longitude = Column(Float)
+    created_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    updated_at = Column(Timestamp, onupdate=utc_now())
+    # Bumped by every write, like Incident.version.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        Index("ix_resources_type_status", "type", "status"),
+        Index("ix_resources_status_created_at", "status", "created_at"),
+        Index("ix_resources_created_at", "created_at"),
+    )
 
 
 class Communication(Base):
@@ -40,7 +103,162 @@ class Communication(Base):
     incident_id = Column(Integer, ForeignKey("incidents.id"))
     communication_text = Column(Text, nullable=False)
     channel = Column(String(50))
-    created_at = Column(DateTime, default=func.now(), server_default=func.now())
-    updated_at = Column(DateTime, onupdate=func.now())
+    # Roll-up of the outbound messages: queued, sent, partial or failed.
+    delivery_status = Column(String(20))
+    created_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    updated_at = Column(Timestamp, onupdate=utc_now())
+    incident = relationship("Incident", back_populates="communications")
+    # The API calls the text "message"; keep both names pointing at one column.
+    message = synonym("communication_text")
+
+    __table_args__ = (
+        Index("ix_communications_incident_created_at", "incident_id", "created_at"),
+        Index("ix_communications_created_at", "created_at"),
+        # Archived ids must never be handed out again; see archive_service.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class OutboundMessage(Base):
+    """Represents one queued delivery of a communication to a recipient."""
+    __tablename__ = "outbound_messages"
+    id = Column(Integer, primary_key=True, index=True)
+    communication_id = Column(Integer, ForeignKey("communications.id"), nullable=False)
+    channel = Column(String(50), nullable=False)
+    recipient = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    # A claimed message is owned by a worker until this time, then retried.
+    lease_until = Column(Timestamp)
+    last_error = Column(Text)
+    created_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    sent_at = Column(Timestamp)
+
+    __table_args__ = (
+        Index("ix_outbound_messages_due", "channel", "status", "next_attempt_at"),
+        Index("ix_outbound_messages_communication_status", "communication_id", "status"),
+    )
+
+
+class Assignment(Base):
+    """Represents a resource allocated to an incident."""
+    __tablename__ = "assignments"
+    id = Column(Integer, primary_key=True, index=True)
+    incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=False)
+    resource_id = Column(Integer, ForeignKey("resources.id"), nullable=False)
+    status = Column(String(50), nullable=False, default="active", server_default="active")
+    distance_km = Column(Float)
+    created_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+    released_at = Column(Timestamp)
     incident = relationship("Incident")
-```
\ No newline at end of file
+    resource = relationship("Resource")
+
+    __table_args__ = (
+        # A resource can hold at most one active assignment: the database
+        # rejects double-booking even if two allocations race.
+        Index(
+            "uq_assignments_active_resource",
+            "resource_id",
+            unique=True,
+            sqlite_where=text("status = 'active'"),
+            postgresql_where=text("status = 'active'"),
+        ),
+        Index("ix_assignments_incident_status", "incident_id", "status"),
+        # Archived ids must never be handed out again; see archive_service.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class SummaryCount(Base):
+    """Number of rows of an entity per pair of grouping values.
+
+    Maintained by triggers on the counted tables (see ``summary_service``).
+    Missing values are stored as an empty string so they can be part of the key.
+    """
+    __tablename__ = "summary_counts"
+    entity = Column(String(50), primary_key=True)
+    key1 = Column(String(255), primary_key=True)
+    key2 = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class ChangeLog(Base):
+    """The latest change to each incident, resource and communication.
+
+    Written by triggers on those tables (see ``change_log``). Every change
+    takes the next ``version`` and replaces the entity's previous entry, so
+    the table holds one row per entity, a tombstone once it is deleted.
+    """
+    __tablename__ = "change_log"
+    version = Column(Integer, primary_key=True)
+    entity = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default=false())
+    changed_at = Column(Timestamp, default=utc_now(), server_default=utc_now())
+
+    __table_args__ = (
+        Index("uq_change_log_entity", "entity", "entity_id", unique=True),
+        # SQLite would otherwise reuse the version of a replaced latest entry.
+        {"sqlite_autoincrement": True},
+    )
+
+
+class IncidentArchive(Base):
+    """A closed or resolved incident moved out of ``incidents`` by the archiver.
+
+    Has the columns of ``Incident`` in the same order, so the two tables
+    can be read together with UNION ALL, plus the time it was archived.
+    """
+    __tablename__ = "incidents_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=False)
+    location = Column(String(255))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    status = Column(String(50))
+    created_at = Column(Timestamp)
+    updated_at = Column(Timestamp)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    archived_at = Column(Timestamp, server_default=utc_now())
+
+    __table_args__ = (
+        Index("ix_incidents_archive_status_created_at", "status", "created_at"),
+        Index("ix_incidents_archive_created_at", "created_at"),
+    )
+
+
+class CommunicationArchive(Base):
+    """A communication moved out of ``communications`` by the archiver."""
+    __tablename__ = "communications_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    incident_id = Column(Integer)
+    communication_text = Column(Text, nullable=False)
+    channel = Column(String(50))
+    delivery_status = Column(String(20))
+    created_at = Column(Timestamp)
+    updated_at = Column(Timestamp)
+    archived_at = Column(Timestamp, server_default=utc_now())
+
+    __table_args__ = (
+        Index("ix_communications_archive_incident_created_at", "incident_id", "created_at"),
+        Index("ix_communications_archive_created_at", "created_at"),
+    )
+
+
+class AssignmentArchive(Base):
+    """A released assignment moved out of ``assignments`` with its incident."""
+    __tablename__ = "assignments_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    incident_id = Column(Integer, nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    status = Column(String(50), nullable=False)
+    distance_km = Column(Float)
+    created_at = Column(Timestamp)
+    released_at = Column(Timestamp)
+    archived_at = Column(Timestamp, server_default=utc_now())
+
+    __table_args__ = (
+        Index("ix_assignments_archive_incident", "incident_id"),
+    )
@@ -0,0 +1,156 @@
+import logging
+import os
+import threading
+from typing import Callable, Optional, Protocol
+
+from sqlalchemy.orm import Session
+
+from database import PrimarySessionLocal
+from services import notification_service
+from services.notification_service import OutboundItem
+
+# Configuration section
+NOTIFY_WORKERS = int(os.getenv('NOTIFY_WORKERS', '4'))
+NOTIFY_BATCH_SIZE = int(os.getenv('NOTIFY_BATCH_SIZE', '100'))
+# Most batches each channel may have in flight at once, as channel:limit pairs.
+NOTIFY_CONCURRENCY = os.getenv('NOTIFY_CONCURRENCY', 'email:4,sms:2,phone:1')
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+NOTIFY_BACKOFF_SECONDS = float(os.getenv('NOTIFY_BACKOFF_SECONDS', '2'))
+NOTIFY_BACKOFF_MAX_SECONDS = float(os.getenv('NOTIFY_BACKOFF_MAX_SECONDS', '300'))
+NOTIFY_LEASE_SECONDS = float(os.getenv('NOTIFY_LEASE_SECONDS', '60'))
+NOTIFY_POLL_SECONDS = float(os.getenv('NOTIFY_POLL_SECONDS', '1'))
+
+logger = logging.getLogger(__name__)
+
+
+class Sender(Protocol):
+    """Delivers a batch of messages for one channel."""
+
+    def send_batch(self, channel: str, items: list[OutboundItem]) -> list[Optional[str]]:
+        """Returns, per item, None if it was delivered or the reason it was not."""
+        ...
+
+
+class LogSender:
+    """Stand-in provider that only logs deliveries; register real ones per channel."""
+
+    def send_batch(self, channel: str, items: list[OutboundItem]) -> list[Optional[str]]:
+        for item in items:
+            logger.info("%s to %s: %s", channel, item.recipient, item.text)
+        return [None] * len(items)
+
+
+def parse_concurrency(spec: str) -> dict[str, int]:
+    """Parses ``NOTIFY_CONCURRENCY`` ("email:4,sms:2") into a channel -> limit map."""
+    limits = {}
+    for pair in filter(None, (part.strip() for part in spec.split(','))):
+        channel, _, limit = pair.partition(':')
+        limits[channel.strip()] = max(1, int(limit or 1))
+    return limits
+
+
+class NotificationDispatcher:
+    """Worker pool that drains the outbound message queue.
+
+    Each worker repeatedly claims a batch of due messages for a channel,
+    hands it to that channel's sender and records the outcome. A semaphore
+    per channel caps how many batches of it are in flight across all
+    workers, so a slow provider cannot take every worker. Workers sleep up
+    to ``poll_seconds`` when the queue is empty; ``wake`` cuts that short
+    after new messages are enqueued.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = PrimarySessionLocal,
+        workers: int = NOTIFY_WORKERS,
+        concurrency: Optional[dict[str, int]] = None,
+        batch_size: int = NOTIFY_BATCH_SIZE,
+        poll_seconds: float = NOTIFY_POLL_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.limits = concurrency if concurrency is not None else parse_concurrency(NOTIFY_CONCURRENCY)
+        self._slots = {channel: threading.BoundedSemaphore(limit) for channel, limit in self.limits.items()}
+        self._senders: dict[str, Sender] = {}
+        self._default_sender: Sender = LogSender()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.counts = {"batches": 0, "sent": 0, "retried": 0, "failed": 0, "errors": 0}
+
+    def register_sender(self, channel: str, sender: Sender) -> None:
+        """Routes a channel's deliveries to ``sender`` instead of the logging stand-in."""
+        self._senders[channel] = sender
+
+    def start(self) -> None:
+        if self._threads or self.workers < 1:
+            return
+        self._stopping.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"notify-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self) -> None:
+        """Tells idle workers there is new work."""
+        self._wakeup.set()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            if not self.drain_once():
+                self._wakeup.wait(self.poll_seconds)
+
+    def drain_once(self) -> bool:
+        """Delivers at most one batch per channel. Returns whether any work was done."""
+        worked = False
+        for channel, slots in self._slots.items():
+            if not slots.acquire(blocking=False):
+                continue
+            try:
+                worked |= self._deliver_batch(channel)
+            except Exception:
+                logger.exception("Notification batch for %s failed", channel)
+                self._count(errors=1)
+            finally:
+                slots.release()
+        return worked
+
+    def _deliver_batch(self, channel: str) -> bool:
+        with self.session_factory() as db:
+            items = notification_service.claim_batch(channel, self.batch_size, NOTIFY_LEASE_SECONDS, db)
+            if not items:
+                return False
+            sender = self._senders.get(channel, self._default_sender)
+            try:
+                errors = sender.send_batch(channel, items)
+            except Exception as e:
+                errors = [str(e) or type(e).__name__] * len(items)
+            counts = notification_service.complete_batch(
+                items, errors, db, NOTIFY_MAX_ATTEMPTS, NOTIFY_BACKOFF_SECONDS, NOTIFY_BACKOFF_MAX_SECONDS
+            )
+        self._count(batches=1, **counts)
+        return True
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counts[name] += amount
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"workers": len(self._threads), **self.counts}
+
+
+dispatcher = NotificationDispatcher()
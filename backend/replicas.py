@@ -0,0 +1,254 @@
+import contextvars
+import itertools
+import logging
+import os
+import threading
+import time
+from http.cookies import CookieError, SimpleCookie
+from typing import Any, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Configuration section
+# Comma-separated URLs of read replicas; reads use the primary when empty.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+DB_REPLICA_STRATEGY = os.getenv('DB_REPLICA_STRATEGY', 'round_robin')  # or least_connections
+DB_REPLICA_CHECK_SECONDS = float(os.getenv('DB_REPLICA_CHECK_SECONDS', '5'))
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '30'))  # PostgreSQL only
+# How long a client's reads stay on the primary after it wrote something.
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+READ_YOUR_WRITES_COOKIE = 'ems_primary_until'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """One read replica: its engine, the async engine if enabled, and its health."""
+
+    def __init__(self, name: str, engine: Engine, async_engine: Optional[Any] = None) -> None:
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.lag_seconds: Optional[float] = None
+        self.reason: Optional[str] = None
+
+    def bind(self, use_async: bool) -> Engine:
+        """The sync engine a session binds to; the async engine's when ``use_async``."""
+        return self.async_engine.sync_engine if use_async else self.engine
+
+
+class ReplicaSet:
+    """Picks a healthy replica for each read transaction.
+
+    ``round_robin`` rotates through the healthy replicas; ``least_connections``
+    takes the one with the fewest checked-out connections. A background
+    thread pings every replica each ``check_seconds`` and, on PostgreSQL,
+    also takes one out of rotation while its replay lag exceeds
+    ``max_lag_seconds``. A replica whose connection drops is taken out at
+    once and comes back after its next successful check. When no replica is
+    healthy, ``choose`` returns None and reads go to the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        strategy: str = DB_REPLICA_STRATEGY,
+        check_seconds: float = DB_REPLICA_CHECK_SECONDS,
+        max_lag_seconds: float = DB_REPLICA_MAX_LAG_SECONDS,
+    ) -> None:
+        if strategy not in ('round_robin', 'least_connections'):
+            raise ValueError(f"Unknown replica strategy {strategy!r}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self.check_seconds = check_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counts = {"chosen": 0, "fallbacks": 0, "failures": 0}
+        for replica in replicas:
+            _watch_disconnects(self, replica, replica.engine)
+            if replica.async_engine is not None:
+                _watch_disconnects(self, replica, replica.async_engine.sync_engine)
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def choose(self, use_async: bool = False) -> Optional[Engine]:
+        """Returns the engine of a healthy replica, or None to use the primary."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        with self._lock:
+            if not healthy:
+                self.counts["fallbacks"] += 1
+                return None
+            self.counts["chosen"] += 1
+            if self.strategy == 'least_connections':
+                replica = min(healthy, key=lambda candidate: candidate.bind(use_async).pool.checkedout())
+            else:
+                replica = healthy[next(self._turn) % len(healthy)]
+        return replica.bind(use_async)
+
+    def mark_down(self, replica: Replica, reason: str) -> None:
+        with self._lock:
+            if replica.healthy:
+                logger.warning("Read replica %s taken out of rotation: %s", replica.name, reason)
+                self.counts["failures"] += 1
+            replica.healthy = False
+            replica.reason = reason
+
+    def check(self) -> None:
+        """Pings every replica and updates whether it may serve reads."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag = _replication_lag(connection)
+            except Exception as exc:
+                self.mark_down(replica, f"{type(exc).__name__}: {exc}")
+                continue
+            replica.lag_seconds = lag
+            if lag is not None and lag > self.max_lag_seconds:
+                self.mark_down(replica, f"replication lag {lag:.1f}s")
+                continue
+            with self._lock:
+                if not replica.healthy:
+                    logger.info("Read replica %s back in rotation", replica.name)
+                replica.healthy = True
+                replica.reason = None
+
+    def start(self) -> None:
+        if self._thread is not None or not self.replicas:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._work, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self.check()
+            self._stopping.wait(self.check_seconds)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "healthy": sum(replica.healthy for replica in self.replicas),
+                **self.counts,
+                "status": {
+                    replica.name: "ok" if replica.healthy else f"down: {replica.reason}"
+                    for replica in self.replicas
+                },
+            }
+
+
+def _watch_disconnects(replicas: ReplicaSet, replica: Replica, engine: Engine) -> None:
+    def on_error(context) -> None:
+        if context.is_disconnect:
+            replicas.mark_down(replica, f"disconnected: {context.original_exception}")
+
+    event.listen(engine, 'handle_error', on_error)
+
+
+def _replication_lag(connection: Any) -> Optional[float]:
+    if connection.dialect.name != 'postgresql':
+        connection.execute(text('SELECT 1'))
+        return None
+    # NULL on a server that is not replaying WAL, i.e. not a standby. A
+    # standby that has replayed everything it received is current however
+    # long the primary has been idle.
+    lag = connection.execute(text(
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+    )).scalar()
+    return float(lag) if lag is not None else None
+
+
+def replica_name(url: str) -> str:
+    """A URL safe to log and report: no password."""
+    return make_url(url).render_as_string(hide_password=True)
+
+
+class ReadYourWrites:
+    """Per-request consistency state, shared with the threads running its queries."""
+
+    def __init__(self, pinned: bool = False) -> None:
+        self.pinned = pinned
+        self.wrote = False
+
+
+_current: contextvars.ContextVar[Optional[ReadYourWrites]] = contextvars.ContextVar('read_your_writes', default=None)
+
+
+def primary_pinned() -> bool:
+    """Whether reads of the current request must go to the primary."""
+    state = _current.get()
+    return state is not None and (state.pinned or state.wrote)
+
+
+def note_write() -> None:
+    """Records that the current request committed a write."""
+    state = _current.get()
+    if state is not None:
+        state.wrote = True
+
+
+class ReadYourWritesMiddleware:
+    """Keeps a client's reads on the primary for a while after it writes.
+
+    A request that commits a write gets a cookie holding the time until
+    which that client's reads skip the replicas, ``DB_READ_YOUR_WRITES_SECONDS``
+    from now, so it sees its own changes whatever the replica lag. Requests
+    other than GET, HEAD and OPTIONS always use the primary, as does the
+    rest of any request after it commits a write. The state lives in the
+    client, so it holds across processes.
+    """
+
+    def __init__(self, app: ASGIApp, window_seconds: float = DB_READ_YOUR_WRITES_SECONDS) -> None:
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        # Writes read what they are about to change, so those must not lag either.
+        pinned = scope['method'] not in SAFE_METHODS or _pinned_until(scope) > time.time()
+        state = ReadYourWrites(pinned=pinned)
+        token = _current.set(state)
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start' and state.wrote and self.window_seconds > 0:
+                cookie = (
+                    f'{READ_YOUR_WRITES_COOKIE}={time.time() + self.window_seconds:.3f}; '
+                    f'Max-Age={int(self.window_seconds) + 1}; Path=/; HttpOnly; SameSite=Lax'
+                )
+                message = {**message, 'headers': [*message.get('headers', []), (b'set-cookie', cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+
+
+def _pinned_until(scope: Scope) -> float:
+    for name, value in scope.get('headers', ()):
+        if name == b'cookie':
+            try:
+                morsel = SimpleCookie(value.decode('latin-1')).get(READ_YOUR_WRITES_COOKIE)
+                if morsel is not None:
+                    return float(morsel.value)
+            except (CookieError, ValueError):
+                return 0.0
+    return 0.0
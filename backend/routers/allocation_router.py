@@ -0,0 +1,61 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from database import DBSession, get_session, run_in_session
+from routers.responses import page_response
+from schemas import AllocationRequest, AllocationResult, Assignment, AssignmentCreate
+from services import allocation_service
+from services.allocation_service import AllocationConflict
+
+router = APIRouter(prefix="/api/allocations", tags=["Allocations"])
+
+@router.post("/solve", response_model=AllocationResult)
+async def solve_allocation(allocation: AllocationRequest, db: DBSession = Depends(get_session)):
+    try:
+        return await run_in_session(db, allocation_service.allocate, allocation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AllocationConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@router.get("", response_model=list[Assignment])
+async def get_assignments(
+    request: Request,
+    incident_id: Optional[int] = None,
+    resource_id: Optional[int] = None,
+    status_filter: str = Query("active", alias="status", description='"active", "released" or "all"'),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_session),
+):
+    try:
+        page = await run_in_session(
+            db,
+            allocation_service.get_assignments,
+            incident_id=incident_id,
+            resource_id=resource_id,
+            status=None if status_filter == "all" else status_filter,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, Assignment)
+
+@router.post("", status_code=status.HTTP_201_CREATED, response_model=Assignment)
+async def create_assignment(assignment: AssignmentCreate, db: DBSession = Depends(get_session)):
+    try:
+        db_assignment = await run_in_session(db, allocation_service.create_assignment, assignment)
+    except AllocationConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if not db_assignment:
+        raise HTTPException(status_code=404, detail="Incident or resource not found")
+    return db_assignment
+
+@router.delete("/{assignment_id}", response_model=Assignment)
+async def release_assignment(assignment_id: int, db: DBSession = Depends(get_session)):
+    db_assignment = await run_in_session(db, allocation_service.release_assignment, assignment_id)
+    if not db_assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+    return db_assignment
@@ -0,0 +1,52 @@
+import json
+from typing import Any
+
+from fastapi import HTTPException, Request, status
+
+from services.bulk import BULK_MAX_ITEMS
+
+
+async def read_bulk_items(request: Request) -> list[Any]:
+    """Reads the items of a bulk request from a JSON array or an NDJSON stream.
+
+    NDJSON (``application/x-ndjson``) is decoded line by line as the body
+    arrives; a line that is not valid JSON becomes an error string for that
+    item instead of failing the request.
+
+    Raises:
+        HTTPException: If the body is not a JSON array or holds too many items.
+    """
+    items: list[Any] = []
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            items.extend(_decode_line(line) for line in lines if line.strip())
+            _check_size(items)
+        if buffer.strip():
+            items.append(_decode_line(buffer))
+    else:
+        try:
+            items = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array")
+    _check_size(items)
+    return items
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return "Invalid JSON line"
+
+
+def _check_size(items: list[Any]) -> None:
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ITEMS} items per bulk request",
+        )
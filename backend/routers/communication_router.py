@@ -1,23 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
-from database import get_db
-from schemas import CommunicationCreate, Communication
-from services import communication_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from database import DBSession, get_session, run_in_session
+from routers.responses import export_response, json_response, page_response, parse_fields
+from schemas import CommunicationCreate, Communication, CommunicationSearchHit
+from services import cached_service, communication_service, search_service
 
 router = APIRouter(prefix="/api/communications", tags=["Communications"])
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=Communication)
-def create_communication(communication: CommunicationCreate, db: Session = Depends(get_db)):
-    return communication_service.create_communication(communication, db)
+async def create_communication(communication: CommunicationCreate, db: DBSession = Depends(get_session)):
+    return await run_in_session(db, communication_service.create_communication, communication)
 
 @router.get("", response_model=list[Communication])
-def get_communications(db: Session = Depends(get_db)):
-    return communication_service.get_communications(db)
+async def get_communications(
+    request: Request,
+    incident_id: Optional[int] = Query(None, ge=1),
+    channel: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", regex="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    include_archived: bool = Query(False, description="Also return archived records"),
+    db: DBSession = Depends(get_session),
+):
+    field_list = parse_fields(fields)
+    try:
+        page = await run_in_session(
+            db,
+            cached_service.get_communications,
+            incident_id=incident_id,
+            channel=channel,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            fields=field_list,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, Communication)
+
+@router.get("/export")
+async def export_communications(
+    incident_id: Optional[int] = Query(None, ge=1),
+    channel: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    include_archived: bool = Query(False, description="Also return archived records"),
+):
+    statement = communication_service.export_communications_statement(
+        incident_id=incident_id,
+        channel=channel,
+        created_after=created_after,
+        created_before=created_before,
+        include_archived=include_archived,
+    )
+    return export_response(statement, format, "communications")
+
+@router.get("/search", response_model=list[CommunicationSearchHit])
+async def search_communications(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words to find in the message text"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_session),
+):
+    try:
+        page = await run_in_session(db, search_service.search, "communication", q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, CommunicationSearchHit)
 
 @router.get("/{communication_id}", response_model=Communication)
-def get_communication(communication_id: int, db: Session = Depends(get_db)):
-    communication = communication_service.get_communication(communication_id, db)
+async def get_communication(
+    communication_id: int,
+    include_archived: bool = Query(False, description="Also look in the archive"),
+    db: DBSession = Depends(get_session),
+):
+    communication = await run_in_session(
+        db, cached_service.get_communication, communication_id, include_archived=include_archived
+    )
     if not communication:
         raise HTTPException(status_code=404, detail="Communication not found")
-    return communication
+    return json_response(communication, Communication)
@@ -0,0 +1,84 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+import events
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+HEARTBEAT_SECONDS = float(os.getenv('EVENT_HEARTBEAT_SECONDS', '15'))
+
+
+def _build_filter(entity: Optional[str], status: Optional[str], incident_id: Optional[int]) -> events.EventFilter:
+    entities = {name.strip() for name in entity.split(",") if name.strip()} if entity else None
+    return events.EventFilter(entities=entities, status=status, incident_id=incident_id)
+
+
+async def _sse_stream(request: Request, subscription: events.Subscription) -> AsyncIterator[str]:
+    try:
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"event: {event['entity']}.{event['action']}\ndata: {events.encode(event)}\n\n"
+    finally:
+        events.hub.unsubscribe(subscription)
+
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    entity: Optional[str] = Query(None, description="Comma-separated: incident, resource, communication"),
+    status: Optional[str] = None,
+    incident_id: Optional[int] = Query(None, ge=1),
+):
+    subscription = events.hub.subscribe(_build_filter(entity, status, incident_id))
+    return StreamingResponse(
+        _sse_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    entity: Optional[str] = None,
+    status: Optional[str] = None,
+    incident_id: Optional[int] = None,
+):
+    await websocket.accept()
+    subscription = events.hub.subscribe(_build_filter(entity, status, incident_id))
+    # Clients only listen; reading in the background notices a disconnect
+    # promptly instead of on the next send.
+    closed = asyncio.create_task(_wait_for_close(websocket))
+    try:
+        while not closed.done():
+            next_event = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {next_event, closed}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+            if next_event in done:
+                await websocket.send_text(events.encode(next_event.result()))
+            else:
+                next_event.cancel()
+                if not closed.done():
+                    await websocket.send_json({"entity": "feed", "action": "heartbeat", "id": None, "data": None})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        closed.cancel()
+        events.hub.unsubscribe(subscription)
+
+
+async def _wait_for_close(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
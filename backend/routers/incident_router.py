@@ -1,34 +1,196 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
-from database import get_db
-from schemas import IncidentCreate, Incident, IncidentUpdate
-from services import incident_service
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+
+import serialization
+from database import DBSession, get_session, run_in_session
+from routers.bulk import read_bulk_items
+from routers.responses import (
+    export_response,
+    json_response,
+    not_modified,
+    not_modified_response,
+    page_response,
+    parse_fields,
+    set_next_cursor,
+)
+from schemas import BulkResult, IncidentCreate, Incident, IncidentSearchHit, IncidentTimeline, IncidentUpdate
+from services import cached_service, incident_service, search_service
+from services.etag import PreconditionFailed, entity_etag, parse_etags
 
 router = APIRouter(prefix="/api/incidents", tags=["Incidents"])
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=Incident)
-def create_incident(incident: IncidentCreate, db: Session = Depends(get_db)):
-    return incident_service.create_incident(incident, db)
+async def create_incident(incident: IncidentCreate, db: DBSession = Depends(get_session)):
+    return await run_in_session(db, incident_service.create_incident, incident)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_incidents(request: Request, db: DBSession = Depends(get_session)):
+    items = await read_bulk_items(request)
+    return await run_in_session(db, incident_service.bulk_create_incidents, items)
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update_incidents(request: Request, db: DBSession = Depends(get_session)):
+    items = await read_bulk_items(request)
+    return await run_in_session(db, incident_service.bulk_update_incidents, items)
 
 @router.get("", response_model=list[Incident])
-def get_incidents(db: Session = Depends(get_db)):
-    return incident_service.get_incidents(db)
+async def get_incidents(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", regex="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    include_archived: bool = Query(False, description="Also return archived incidents"),
+    db: DBSession = Depends(get_session),
+):
+    field_list = parse_fields(fields)
+    try:
+        page = await run_in_session(
+            db,
+            cached_service.get_incidents,
+            status=status_filter,
+            location=location,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            fields=field_list,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, Incident)
+
+@router.get("/export")
+async def export_incidents(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    include_archived: bool = Query(False, description="Also return archived incidents"),
+):
+    statement = incident_service.export_incidents_statement(
+        status=status_filter,
+        location=location,
+        created_after=created_after,
+        created_before=created_before,
+        include_archived=include_archived,
+    )
+    return export_response(statement, format, "incidents")
+
+@router.get("/search", response_model=list[IncidentSearchHit])
+async def search_incidents(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words to find in the title or description"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_session),
+):
+    try:
+        page = await run_in_session(db, search_service.search, "incident", q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, IncidentSearchHit)
+
+@router.get("/timeline", response_model=list[IncidentTimeline])
+async def get_incident_timelines(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", regex="^(id|created_at)$"),
+    messages: int = Query(5, ge=0, le=100, description="Latest communications to embed per incident"),
+    db: DBSession = Depends(get_session),
+):
+    try:
+        page = await run_in_session(
+            db,
+            incident_service.get_incident_timelines,
+            status=status_filter,
+            location=location,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            messages=messages,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return page_response(request, page, IncidentTimeline)
+
+@router.get("/{incident_id}/timeline", response_model=IncidentTimeline)
+async def get_incident_timeline(
+    incident_id: int,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    include_archived: bool = Query(False, description="Also look in the archive"),
+    db: DBSession = Depends(get_session),
+):
+    try:
+        timeline = await run_in_session(
+            db,
+            incident_service.get_incident_timeline,
+            incident_id,
+            limit=limit,
+            cursor=cursor,
+            include_archived=include_archived,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not timeline:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    incident, page = timeline
+    response = json_response(serialization.to_dict(IncidentTimeline, incident), IncidentTimeline)
+    set_next_cursor(request, response, page.next_cursor)
+    return response
 
 @router.get("/{incident_id}", response_model=Incident)
-def get_incident(incident_id: int, db: Session = Depends(get_db)):
-    incident = incident_service.get_incident(incident_id, db)
+async def get_incident(
+    incident_id: int,
+    request: Request,
+    include_archived: bool = Query(False, description="Also look in the archive"),
+    db: DBSession = Depends(get_session),
+):
+    incident = await run_in_session(db, cached_service.get_incident, incident_id, include_archived=include_archived)
     if not incident:
         raise HTTPException(status_code=404, detail="Incident not found")
-    return incident
+    etag = entity_etag(incident["id"], incident["version"])
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    return json_response(incident, Incident, headers={"ETag": etag})
 
 @router.put("/{incident_id}", response_model=Incident)
-def update_incident(incident_id: int, incident: IncidentUpdate, db: Session = Depends(get_db)):
-    db_incident = incident_service.get_incident(incident_id, db)
+async def update_incident(
+    incident_id: int,
+    incident: IncidentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_session),
+):
+    try:
+        db_incident = await run_in_session(
+            db, incident_service.update_incident, incident_id, incident, if_match=parse_etags(if_match)
+        )
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not db_incident:
         raise HTTPException(status_code=404, detail="Incident not found")
-    return incident_service.update_incident(incident_id, incident, db)
+    response.headers["ETag"] = entity_etag(db_incident.id, db_incident.version)
+    return db_incident
 
 @router.delete("/{incident_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_incident(incident_id: int, db: Session = Depends(get_db)):
-    incident_service.delete_incident(incident_id, db)
+async def delete_incident(incident_id: int, db: DBSession = Depends(get_session)):
+    await run_in_session(db, incident_service.delete_incident, incident_id)
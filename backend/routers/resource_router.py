@@ -1,34 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
-from database import get_db
-from schemas import ResourceCreate, Resource, ResourceUpdate
-from services import resource_service
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+
+import serialization
+import telemetry
+from database import DBSession, get_session, run_in_session
+from routers.bulk import read_bulk_items
+from routers.responses import (
+    export_response,
+    json_response,
+    not_modified,
+    not_modified_response,
+    page_response,
+    parse_fields,
+)
+from schemas import BulkResult, NearestResource, ResourceCreate, Resource, ResourcePing, ResourceUpdate, TelemetryAccepted
+from services import cached_service, resource_service
+from services.etag import PreconditionFailed, entity_etag, parse_etags
 
 router = APIRouter(prefix="/api/resources", tags=["Resources"])
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=Resource)
-def create_resource(resource: ResourceCreate, db: Session = Depends(get_db)):
-    return resource_service.create_resource(resource, db)
+async def create_resource(resource: ResourceCreate, db: DBSession = Depends(get_session)):
+    return await run_in_session(db, resource_service.create_resource, resource)
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_resources(request: Request, db: DBSession = Depends(get_session)):
+    items = await read_bulk_items(request)
+    return await run_in_session(db, resource_service.bulk_create_resources, items)
+
+@router.put("/bulk", response_model=BulkResult)
+async def bulk_update_resources(request: Request, db: DBSession = Depends(get_session)):
+    items = await read_bulk_items(request)
+    return await run_in_session(db, resource_service.bulk_update_resources, items)
+
+@router.post("/telemetry", status_code=status.HTTP_202_ACCEPTED, response_model=TelemetryAccepted)
+async def record_telemetry(pings: list[ResourcePing]):
+    """Buffers status/location pings; they are written in batches shortly after."""
+    try:
+        pending = telemetry.buffer.record(ping.dict(exclude_unset=True) for ping in pings)
+    except telemetry.TelemetryBacklogFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
+    return TelemetryAccepted(accepted=len(pings), pending=pending)
 
 @router.get("", response_model=list[Resource])
-def get_resources(db: Session = Depends(get_db)):
-    return resource_service.get_resources(db)
+async def get_resources(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    order_by: str = Query("id", regex="^(id|created_at)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    db: DBSession = Depends(get_session),
+):
+    field_list = parse_fields(fields)
+    try:
+        page = await run_in_session(
+            db,
+            cached_service.get_resources,
+            status=status_filter,
+            type=type,
+            location=location,
+            created_after=created_after,
+            created_before=created_before,
+            limit=limit,
+            cursor=cursor,
+            order_by=order_by,
+            fields=field_list,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ids = [item["id"] for item in page.items if isinstance(item, dict) and "id" in item]
+    return page_response(request, page, Resource, versioned=not telemetry.buffer.has_pending(*ids))
+
+@router.get("/export")
+async def export_resources(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+):
+    statement = resource_service.export_resources_statement(
+        status=status_filter, type=type, location=location, created_after=created_after, created_before=created_before
+    )
+    return export_response(statement, format, "resources")
+
+@router.get("/nearest", response_model=list[NearestResource])
+async def get_nearest_resources(
+    incident_id: Optional[int] = Query(None, ge=1),
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    type: Optional[str] = None,
+    k: int = Query(5, ge=1, le=100),
+    db: DBSession = Depends(get_session),
+):
+    try:
+        matches = await run_in_session(
+            db,
+            resource_service.get_nearest_resources,
+            incident_id=incident_id,
+            latitude=latitude,
+            longitude=longitude,
+            type=type,
+            k=k,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if matches is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return json_response(
+        [
+            {**telemetry.buffer.overlay(serialization.to_dict(Resource, resource)), "distance_km": round(distance, 3)}
+            for resource, distance in matches
+        ],
+        NearestResource,
+    )
 
 @router.get("/{resource_id}", response_model=Resource)
-def get_resource(resource_id: int, db: Session = Depends(get_db)):
-    resource = resource_service.get_resource(resource_id, db)
+async def get_resource(resource_id: int, request: Request, db: DBSession = Depends(get_session)):
+    resource = await run_in_session(db, cached_service.get_resource, resource_id)
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
-    return resource
+    # The ETag stays that of the stored row, which is what If-Match checks;
+    # buffered telemetry is overlaid without a new version, so no 304 then.
+    etag = entity_etag(resource["id"], resource["version"])
+    if not_modified(request, etag) and not telemetry.buffer.has_pending(resource_id):
+        return not_modified_response(etag)
+    return json_response(resource, Resource, headers={"ETag": etag})
 
 @router.put("/{resource_id}", response_model=Resource)
-def update_resource(resource_id: int, resource: ResourceUpdate, db: Session = Depends(get_db)):
-    db_resource = resource_service.get_resource(resource_id, db)
+async def update_resource(
+    resource_id: int,
+    resource: ResourceUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_session),
+):
+    try:
+        db_resource = await run_in_session(
+            db, resource_service.update_resource, resource_id, resource, if_match=parse_etags(if_match)
+        )
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not db_resource:
         raise HTTPException(status_code=404, detail="Resource not found")
-    return resource_service.update_resource(resource_id, resource, db)
+    response.headers["ETag"] = entity_etag(db_resource.id, db_resource.version)
+    return db_resource
 
 @router.delete("/{resource_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_resource(resource_id: int, db: Session = Depends(get_db)):
-    resource_service.delete_resource(resource_id, db)
+async def delete_resource(resource_id: int, db: DBSession = Depends(get_session)):
+    await run_in_session(db, resource_service.delete_resource, resource_id)
@@ -0,0 +1,84 @@
+from typing import Any, Optional, Type
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+
+import schemas
+import serialization
+from services import export_service
+from services.etag import page_etag, parse_etags, weak_match
+from services.pagination import Page
+
+
+# Schemas whose items are fully described by their id and row version.
+VERSIONED_SCHEMAS = (schemas.Incident, schemas.Resource)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """Splits a comma-separated ``fields=`` query parameter."""
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(",") if name.strip()]
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names ``etag``."""
+    header = request.headers.get("if-none-match")
+    if header is not None and header.strip() == "*":
+        return True
+    candidates = parse_etags(header)
+    return candidates is not None and weak_match(etag, candidates)
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def page_response(request: Request, page: Page, schema: Type[BaseModel], versioned: bool = True) -> Response:
+    """Serializes a page of results and advertises the next page.
+
+    ORM objects are rendered through ``schema``; projected rows and cached
+    pages are already dicts in their API shape. The next cursor is sent in the
+    ``X-Next-Cursor`` and ``Link`` headers so the body stays a plain list.
+    Pages carry a weak ETag and a matching If-None-Match gets a bodiless 304.
+    Pass ``versioned=False`` when items hold changes their version does not
+    reflect, so the ETag hashes their content.
+    """
+    items = [item if isinstance(item, dict) else serialization.to_dict(schema, item) for item in page.items]
+    etag = page_etag(items, page.next_cursor, versioned=versioned and schema in VERSIONED_SCHEMAS)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    response = json_response(items, schema, headers={"ETag": etag})
+    set_next_cursor(request, response, page.next_cursor)
+    return response
+
+
+def json_response(
+    content: Any, schema: Type[BaseModel], status_code: int = 200, headers: Optional[dict[str, str]] = None
+) -> Response:
+    """Sends API dicts already in ``schema``'s shape, skipping ``response_model`` validation.
+
+    The body is byte-for-byte what a ``JSONResponse`` would send.
+    """
+    return Response(
+        serialization.dumps(content, schema), status_code=status_code, headers=headers, media_type="application/json"
+    )
+
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """Advertises the next page in the ``X-Next-Cursor`` and ``Link`` headers."""
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+
+
+def export_response(statement: Select, fmt: str, name: str) -> StreamingResponse:
+    """Streams an export of ``statement`` as an NDJSON or CSV attachment."""
+    return StreamingResponse(
+        export_service.stream_export(statement, fmt),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
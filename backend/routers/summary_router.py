@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, Request
+
+from database import DBSession, get_session, run_in_session
+from routers.responses import json_response, not_modified, not_modified_response
+from schemas import Summary
+from services import summary_service
+from services.etag import page_etag
+
+router = APIRouter(prefix="/api/summary", tags=["Summary"])
+
+@router.get("", response_model=Summary)
+async def get_summary(request: Request, db: DBSession = Depends(get_session)):
+    """Situation-report counts; poll with If-None-Match to get 304 while nothing changed."""
+    summary = await run_in_session(db, summary_service.get_summary)
+    etag = page_etag([summary], None)
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+    return json_response(summary, Summary, headers={"ETag": etag})
@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from database import DBSession, get_session, run_in_session
+from routers.bulk import read_bulk_items
+from routers.responses import json_response
+from schemas import SyncPage, SyncUploadResult
+from services import sync_service
+
+router = APIRouter(prefix="/api/sync", tags=["Sync"])
+
+@router.get("", response_model=SyncPage)
+async def get_changes(
+    since: int = Query(0, ge=0, description="The version returned by the previous sync"),
+    limit: Optional[int] = Query(None, ge=1),
+    db: DBSession = Depends(get_session),
+):
+    """Changed rows and tombstones after ``since``; repeat with the returned version while has_more."""
+    try:
+        page = await run_in_session(db, sync_service.get_changes, since, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(page, SyncPage)
+
+@router.post("", response_model=SyncUploadResult)
+async def apply_changes(request: Request, db: DBSession = Depends(get_session)):
+    """Applies a batch of offline changes; stale updates and deletes come back as conflicts."""
+    items = await read_bulk_items(request)
+    try:
+        return await run_in_session(db, sync_service.apply_changes, items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
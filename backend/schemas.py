@@ -1,8 +1,7 @@
-```python
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
 
 
 class IncidentBase(BaseModel):
@@ -10,6 +9,8 @@ class IncidentBase(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
     description: str = Field(..., min_length=10)
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     status: Optional[str] = Field("open", regex="^(open|closed|resolved)$", description="Status of the incident")
 
 
@@ -23,11 +24,17 @@ class IncidentUpdate(IncidentBase):
     pass
 
 
+class IncidentBulkUpdate(IncidentUpdate):
+    """Model for one item of a bulk incident update."""
+    id: int = Field(..., ge=1)
+
+
 class Incident(IncidentBase):
-    """Model for incidents, including database ID and timestamps."""
+    """Model for incidents, including database ID, timestamps and row version."""
     id: int
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = Field(1, description="Incremented by every write; the ETag changes with it")
 
     class Config:
         orm_mode = True
@@ -39,6 +46,8 @@ class ResourceBase(BaseModel):
     name: Optional[str] = None
     status: Optional[str] = Field("available", regex="^(available|unavailable|deployed)$", description="Status of the resource")
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class ResourceCreate(ResourceBase):
@@ -51,21 +60,51 @@ class ResourceUpdate(ResourceBase):
     pass
 
 
+class ResourceBulkUpdate(ResourceUpdate):
+    """Model for one item of a bulk resource update."""
+    id: int = Field(..., ge=1)
+
+
 class Resource(ResourceBase):
-    """Model for resources, including database ID and timestamps."""
+    """Model for resources, including database ID, timestamps and row version."""
     id: int
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = Field(1, description="Incremented by every write; the ETag changes with it")
 
     class Config:
         orm_mode = True
 
 
+class ResourcePing(BaseModel):
+    """A status and/or position report from a resource in the field."""
+    id: int = Field(..., ge=1)
+    status: Optional[str] = Field(None, regex="^(available|unavailable|deployed)$", description="Status of the resource")
+    location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @root_validator(skip_on_failure=True)
+    def check_reported(cls, values):
+        if all(values.get(name) is None for name in ("status", "location", "latitude", "longitude")):
+            raise ValueError("A ping must report a status, location or coordinates")
+        return values
+
+
+class TelemetryAccepted(BaseModel):
+    """Acknowledgement of buffered telemetry."""
+    accepted: int
+    pending: int
+
+
 class CommunicationCreate(BaseModel):
     """Model for creating new communication records."""
     incident_id: int = Field(..., ge=1)
     message: str = Field(..., min_length=1, max_length=500)
     channel: str = Field(..., regex="^(email|sms|phone)$", description="Communication channel")
+    recipients: list[str] = Field(
+        default_factory=list, max_items=10000, description="Addresses or numbers to deliver the message to"
+    )
 
 
 class Communication(BaseModel):
@@ -74,9 +113,167 @@ class Communication(BaseModel):
     incident_id: int
     message: str
     channel: str
+    delivery_status: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
-```
\ No newline at end of file
+
+
+class IncidentTimeline(Incident):
+    """An incident with its communications, oldest first."""
+    communications: list[Communication] = []
+
+
+class IncidentSearchHit(Incident):
+    """An incident matched by full-text search."""
+    score: float
+    snippet: str
+
+
+class CommunicationSearchHit(Communication):
+    """A communication matched by full-text search."""
+    score: float
+    snippet: str
+
+
+class NearestResource(Resource):
+    """A resource returned by a nearest-resource query, with its distance."""
+    distance_km: float
+
+
+class AssignmentCreate(BaseModel):
+    """Model for assigning one resource to an incident."""
+    incident_id: int = Field(..., ge=1)
+    resource_id: int = Field(..., ge=1)
+
+
+class AssignmentPlan(BaseModel):
+    """One resource-to-incident pairing chosen by the allocation solver."""
+    incident_id: int
+    resource_id: int
+    distance_km: Optional[float] = None
+
+
+class Assignment(AssignmentPlan):
+    """Model for resource assignments."""
+    id: int
+    status: str
+    created_at: datetime
+    released_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class AllocationRequest(BaseModel):
+    """Parameters for a batch allocation run."""
+    mode: str = Field("greedy", regex="^(greedy|optimal)$", description="Greedy nearest-first or optimal assignment")
+    resource_type: Optional[str] = Field(None, description="Only allocate resources of this type")
+    per_incident: int = Field(1, ge=1, le=20, description="Resources each open incident should hold")
+    max_distance_km: Optional[float] = Field(None, gt=0, description="Never assign resources farther than this")
+    dry_run: bool = Field(False, description="Compute the plan without writing it")
+
+
+class AllocationResult(BaseModel):
+    """Outcome of a batch allocation run."""
+    mode: str
+    committed: bool
+    incidents_considered: int
+    resources_considered: int
+    assignments: list[AssignmentPlan]
+    total_distance_km: float
+    solve_ms: float
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one item of a bulk request, by position in the request."""
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    """Outcome of a bulk request."""
+    succeeded: int
+    failed: int
+    items: list[BulkItemResult]
+
+
+class IncidentSummary(BaseModel):
+    """Incident counts; missing values are counted under ""."""
+    total: int
+    by_status: dict[str, int]
+    by_location: dict[str, int]
+    by_status_and_location: dict[str, dict[str, int]]
+
+
+class ResourceSummary(BaseModel):
+    """Resource counts; missing values are counted under ""."""
+    total: int
+    by_type: dict[str, int]
+    by_status: dict[str, int]
+    by_type_and_status: dict[str, dict[str, int]]
+
+
+class Summary(BaseModel):
+    """Situation-report counters for the dashboard."""
+    incidents: IncidentSummary
+    resources: ResourceSummary
+
+
+class SyncChange(BaseModel):
+    """The latest state of one entity that changed: its API shape, or a tombstone."""
+    entity: str
+    id: int
+    version: int
+    deleted: bool
+    data: Optional[dict[str, Any]] = None
+
+
+class SyncPage(BaseModel):
+    """A page of changes, oldest first; pass ``version`` as ``since`` to continue."""
+    changes: list[SyncChange]
+    version: int
+    has_more: bool
+
+
+class SyncUpload(BaseModel):
+    """One change made offline: a create (no id), an update, or a delete."""
+    entity: str = Field(..., regex="^(incident|resource|communication)$")
+    id: Optional[int] = Field(None, ge=1, description="Omit to create")
+    base_version: Optional[int] = Field(None, ge=0, description="Version the change was made against")
+    deleted: bool = False
+    data: Optional[dict[str, Any]] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_shape(cls, values):
+        if values["id"] is None:
+            if values["deleted"] or values["data"] is None:
+                raise ValueError("A create needs data and cannot be a delete")
+        elif values["base_version"] is None:
+            raise ValueError("Updates and deletes need base_version")
+        elif values["entity"] == "communication":
+            raise ValueError("Communications can only be created")
+        elif not values["deleted"] and values["data"] is None:
+            raise ValueError("An update needs data")
+        return values
+
+
+class SyncItemResult(BaseModel):
+    """Outcome of one uploaded change, by position in the upload."""
+    index: int
+    status: str = Field(..., description="created, updated, deleted, conflict or error")
+    id: Optional[int] = None
+    version: Optional[int] = None
+    error: Optional[str] = None
+    current: Optional[SyncChange] = Field(None, description="The server's state, on conflict")
+
+
+class SyncUploadResult(BaseModel):
+    """Outcome of a sync upload."""
+    applied: int
+    conflicts: int
+    failed: int
+    items: list[SyncItemResult]
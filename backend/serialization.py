@@ -0,0 +1,121 @@
+import json
+import os
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Iterable, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib path produces the same bytes.
+    orjson = None
+
+# Configuration section
+# Encode read responses straight from ORM rows, skipping per-object Pydantic
+# validation; set to 0 to go back to from_orm() + jsonable_encoder.
+FAST_JSON = os.getenv('FAST_JSON', '1') == '1'
+
+
+def _exact_float(value: Any) -> bool:
+    # orjson and json.dumps print the same digits for every float, but outside
+    # this range repr() switches to exponent notation ("1e-05") and orjson
+    # does not, or writes the exponent differently ("1e16" vs "1e+16").
+    # NaN and infinity fail the check too, so they still raise as before.
+    return not isinstance(value, float) or value == 0 or 1e-4 <= abs(value) < 1e16
+
+
+def _exact_any(value: Any) -> bool:
+    # Untyped fields (``dict[str, Any]``) can hold floats at any depth.
+    if isinstance(value, dict):
+        return all(_exact_any(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(_exact_any(v) for v in value)
+    return _exact_float(value)
+
+
+class ModelEncoder:
+    """Renders ORM objects in a response schema's shape without validating them.
+
+    ``to_dict`` equals ``schema.from_orm(obj).dict()`` for rows read from our
+    own database: fields are read by attribute in schema order, float fields
+    are coerced as Pydantic would, and nested models are encoded recursively.
+    """
+
+    def __init__(self, schema: Type[BaseModel]) -> None:
+        self.schema = schema
+        self.names = tuple(schema.__fields__)
+        self._get = attrgetter(*self.names)
+        self.float_fields: list[str] = []
+        self.nested: list[tuple[str, 'ModelEncoder', bool]] = []
+        self.untyped: list[str] = []
+        for name, field in schema.__fields__.items():
+            if isinstance(field.type_, type) and issubclass(field.type_, float) and field.shape == SHAPE_SINGLETON:
+                self.float_fields.append(name)
+            elif isinstance(field.type_, type) and issubclass(field.type_, BaseModel):
+                self.nested.append((name, encoder(field.type_), field.shape == SHAPE_LIST))
+            elif field.type_ is Any:
+                self.untyped.append(name)
+
+    def to_dict(self, obj: Any) -> dict[str, Any]:
+        values = self._get(obj)
+        item = dict(zip(self.names, values if len(self.names) > 1 else (values,)))
+        for name in self.float_fields:
+            value = item[name]
+            if value is not None and type(value) is not float:
+                item[name] = float(value)
+        for name, child, many in self.nested:
+            value = item[name]
+            if value is not None:
+                item[name] = [child.to_dict(v) for v in value] if many else child.to_dict(value)
+        return item
+
+    def orjson_exact(self, items: Iterable[dict[str, Any]]) -> bool:
+        """Whether orjson renders these API dicts byte-for-byte like json.dumps."""
+        for item in items:
+            for name in self.float_fields:
+                if not _exact_float(item.get(name)):
+                    return False
+            for name in self.untyped:
+                if not _exact_any(item.get(name)):
+                    return False
+            for name, child, many in self.nested:
+                value = item.get(name)
+                if value is not None and not child.orjson_exact(value if many else (value,)):
+                    return False
+        return True
+
+
+@lru_cache(maxsize=None)
+def encoder(schema: Type[BaseModel]) -> ModelEncoder:
+    return ModelEncoder(schema)
+
+
+def to_dict(schema: Type[BaseModel], obj: Any) -> Optional[dict[str, Any]]:
+    """Renders an ORM object (or None) as ``schema``'s API dict."""
+    if obj is None:
+        return None
+    if not FAST_JSON:
+        return schema.from_orm(obj).dict()
+    return encoder(schema).to_dict(obj)
+
+
+def dumps(content: Any, schema: Type[BaseModel]) -> bytes:
+    """Encodes API dicts, or a list of them, in ``schema``'s shape as JSON.
+
+    The bytes are exactly those ``JSONResponse(jsonable_encoder(content))``
+    would send. orjson is used when installed and the content has nothing
+    it prints differently; otherwise the stdlib encoder is.
+    """
+    if FAST_JSON and orjson is not None:
+        items = content if isinstance(content, list) else (content,)
+        if encoder(schema).orjson_exact(items):
+            try:
+                return orjson.dumps(content)
+            except TypeError:
+                pass
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
@@ -0,0 +1,82 @@
+import logging
+import os
+
+import uvicorn
+
+# Configuration section
+SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '8000'))
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '1'))  # 0 = one per CPU core, or one for SQLite
+SERVER_LOOP = os.getenv('SERVER_LOOP', 'auto')  # auto | uvloop | asyncio
+SERVER_HTTP = os.getenv('SERVER_HTTP', 'auto')  # auto | httptools | h11
+SERVER_KEEPALIVE_SECONDS = int(os.getenv('SERVER_KEEPALIVE_SECONDS', '5'))
+SERVER_GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv('SERVER_GRACEFUL_SHUTDOWN_SECONDS', '30'))
+SERVER_BACKLOG = int(os.getenv('SERVER_BACKLOG', '2048'))
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_count() -> int:
+    """CPU cores this process may run on, honouring affinity where the OS exposes it."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def worker_count(workers: int = SERVER_WORKERS) -> int:
+    """The number of server processes to start.
+
+    ``0`` means one per core, or a single process for a SQLite database,
+    since its writers take turns on one file anyway and the single-writer
+    mode only serializes writes within a process.
+    """
+    if workers > 0:
+        return workers
+    if os.getenv('DATABASE_URL', 'sqlite:///./emergency_management.db').startswith('sqlite'):
+        return 1
+    return cpu_count()
+
+
+def run(app: str = 'main:app') -> None:
+    """Serves ``app`` with uvicorn using the settings above.
+
+    Each worker is a separate process with its own pools, caches,
+    spatial index, event stream and background jobs, which is why a single
+    worker is the default. On SIGTERM or SIGINT the server stops accepting
+    connections, waits up to ``SERVER_GRACEFUL_SHUTDOWN_SECONDS`` for
+    requests in progress, then runs the shutdown handlers, which write
+    buffered telemetry and stop the workers.
+
+    With several workers the schema is created here first, since workers
+    running the same DDL at once can fail with "already exists" errors.
+    """
+    workers = worker_count()
+    if workers > 1:
+        import cache
+        import idempotency
+        import main
+
+        local = [name for name, backend in (('cache', cache.CACHE_BACKEND), ('idempotency', idempotency.IDEMPOTENCY_BACKEND))
+                 if backend == 'memory']
+        if local:
+            logger.warning(
+                "Starting %d workers with a per-process %s; use the redis backends to share them", workers, ' and '.join(local)
+            )
+        main.prepare_database()
+        main.engine.dispose()
+        os.environ['DATABASE_PREPARED'] = '1'
+    uvicorn.run(
+        app,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        workers=workers,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        timeout_keep_alive=SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        backlog=SERVER_BACKLOG,
+    )
+
+
+if __name__ == '__main__':
+    run()
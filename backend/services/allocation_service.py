@@ -0,0 +1,358 @@
+import os
+import time
+from typing import Any, Optional
+
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import cache
+import events
+import schemas
+from models import Assignment, Incident, Resource, utc_now
+from schemas import AllocationRequest, AllocationResult, AssignmentCreate, AssignmentPlan
+from services.pagination import Page, paginate
+from services.spatial_index import EARTH_RADIUS_KM, GridIndex, haversine_km, sync_resources
+
+# Largest incident-slot x resource cost matrix the optimal solver will build;
+# bigger requests are planned greedily. A square 4M-cell matrix solves in
+# under a second, one twice that size already takes several.
+ALLOCATION_MAX_MATRIX = int(os.getenv('ALLOCATION_MAX_MATRIX', '4000000'))
+
+# Incident statuses that end the incident's assignments.
+CLOSED_STATUSES = ("resolved", "closed")
+
+# (incident id, latitude, longitude), one entry per resource the incident still needs.
+Slot = tuple[int, float, float]
+Candidate = tuple[int, float, float]
+
+
+class AllocationConflict(Exception):
+    """Raised when a resource was taken by another allocation before commit."""
+
+
+def _demand(db: Session, resource_type: Optional[str], per_incident: int) -> list[Slot]:
+    held_query = (
+        select(Assignment.incident_id, func.count())
+        .join(Resource, Resource.id == Assignment.resource_id)
+        .where(Assignment.status == "active")
+        .group_by(Assignment.incident_id)
+    )
+    if resource_type is not None:
+        held_query = held_query.where(Resource.type == resource_type)
+    held = dict(db.execute(held_query).all())
+    incidents = db.execute(
+        select(Incident.id, Incident.latitude, Incident.longitude)
+        .where(Incident.status == "open", Incident.latitude.is_not(None), Incident.longitude.is_not(None))
+        .order_by(Incident.created_at, Incident.id)
+    ).all()
+    return [
+        (incident.id, incident.latitude, incident.longitude)
+        for incident in incidents
+        for _ in range(per_incident - held.get(incident.id, 0))
+    ]
+
+
+def _supply(db: Session, resource_type: Optional[str]) -> list[Candidate]:
+    # A resource set back to "available" by hand may still hold an assignment.
+    assigned = exists().where(Assignment.resource_id == Resource.id, Assignment.status == "active")
+    query = select(Resource.id, Resource.latitude, Resource.longitude).where(
+        Resource.status == "available", Resource.latitude.is_not(None), Resource.longitude.is_not(None), ~assigned
+    )
+    if resource_type is not None:
+        query = query.where(Resource.type == resource_type)
+    return [tuple(row) for row in db.execute(query.order_by(Resource.id))]
+
+
+def plan_greedy(slots: list[Slot], resources: list[Candidate], max_distance_km: Optional[float] = None) -> list[AssignmentPlan]:
+    """Gives each slot, oldest incident first, the nearest still-free resource.
+
+    Uses a throwaway grid index over the candidates, so each pick is a local
+    search rather than a scan of every resource.
+    """
+    index = GridIndex()
+    for resource_id, latitude, longitude in resources:
+        index.upsert(resource_id, latitude, longitude, "candidate", "available")
+    plan: list[AssignmentPlan] = []
+    for incident_id, latitude, longitude in slots:
+        if not len(index):
+            break
+        resource_id, distance = index.nearest(latitude, longitude, k=1)[0]
+        if max_distance_km is not None and distance > max_distance_km:
+            continue
+        index.remove(resource_id)
+        plan.append(AssignmentPlan(incident_id=incident_id, resource_id=resource_id, distance_km=round(distance, 3)))
+    return plan
+
+
+def plan_optimal(slots: list[Slot], resources: list[Candidate], max_distance_km: Optional[float] = None) -> list[AssignmentPlan]:
+    """Minimizes the total distance over all slots with a rectangular assignment.
+
+    Builds the full slot x resource haversine matrix with numpy and solves it
+    with scipy's ``linear_sum_assignment``.
+
+    Raises:
+        ValueError: If numpy/scipy are missing or the matrix would be too large.
+    """
+    if not slots or not resources:
+        return []
+    if len(slots) * len(resources) > ALLOCATION_MAX_MATRIX:
+        raise ValueError(
+            f"{len(slots)} x {len(resources)} exceeds ALLOCATION_MAX_MATRIX; filter by resource_type or use greedy mode"
+        )
+    try:
+        import numpy as np
+        from scipy.optimize import linear_sum_assignment
+    except ImportError as e:
+        raise ValueError("Optimal allocation requires numpy and scipy") from e
+
+    slot_coords = np.radians(np.array([(lat, lon) for _, lat, lon in slots], dtype=float))
+    resource_coords = np.radians(np.array([(lat, lon) for _, lat, lon in resources], dtype=float))
+    lat1, lon1 = slot_coords[:, 0:1], slot_coords[:, 1:2]
+    lat2, lon2 = resource_coords[:, 0], resource_coords[:, 1]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    cost = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+    unreachable = None
+    if max_distance_km is not None:
+        # Out-of-range pairs get a cost no in-range total can reach, then are dropped.
+        unreachable = cost > max_distance_km
+        cost[unreachable] = float(cost.shape[0] * max_distance_km + 1)
+    rows, cols = linear_sum_assignment(cost)
+    return [
+        AssignmentPlan(incident_id=slots[row][0], resource_id=resources[col][0], distance_km=round(float(cost[row, col]), 3))
+        for row, col in zip(rows, cols)
+        if unreachable is None or not unreachable[row, col]
+    ]
+
+
+def _resources_changed(resource_ids: list[int], db: Session) -> None:
+    cache.invalidate("resource", *resource_ids)
+    sync_resources(resource_ids, db)
+    events.publish_ids("resource", "updated", resource_ids)
+
+
+def _commit_plan(plan: list[AssignmentPlan], db: Session) -> list[int]:
+    resource_ids = [item.resource_id for item in plan]
+    try:
+        deployed = db.execute(
+            update(Resource)
+            .where(Resource.id.in_(resource_ids), Resource.status == "available")
+            .values(status="deployed", version=Resource.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if deployed != len(resource_ids):
+            db.rollback()
+            raise AllocationConflict(f"{len(resource_ids) - deployed} of {len(resource_ids)} resources are no longer available")
+        assignment_ids = db.execute(
+            insert(Assignment).returning(Assignment.id, sort_by_parameter_order=True),
+            [item.dict() for item in plan],
+        ).scalars().all()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise AllocationConflict("A resource already has an active assignment") from e
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise SQLAlchemyError(f"Database error committing allocation: {e}") from e
+    _resources_changed(resource_ids, db)
+    events.publish_ids("assignment", "created", list(assignment_ids))
+    return list(assignment_ids)
+
+
+def allocate(request: AllocationRequest, db: Session) -> AllocationResult:
+    """Matches available resources to open incidents in one batch.
+
+    Every open incident with coordinates gets up to ``per_incident``
+    resources (counting the ones it already holds). The whole plan is written
+    in a single transaction: resources move to "deployed" only if they are
+    all still available, otherwise nothing is written. Optimal requests
+    larger than ``ALLOCATION_MAX_MATRIX`` are planned greedily, and the
+    result's ``mode`` says so.
+
+    Args:
+        request: Solver mode and constraints.
+        db: The database session.
+
+    Returns:
+        The computed plan and whether it was committed.
+
+    Raises:
+        ValueError: If the optimal solver cannot run.
+        AllocationConflict: If a resource was taken concurrently.
+        SQLAlchemyError: If a database error occurs.
+    """
+    slots = _demand(db, request.resource_type, request.per_incident)
+    resources = _supply(db, request.resource_type)
+    mode = request.mode
+    if mode == "optimal" and len(slots) * len(resources) > ALLOCATION_MAX_MATRIX:
+        mode = "greedy"
+    started = time.perf_counter()
+    solver = plan_optimal if mode == "optimal" else plan_greedy
+    plan = solver(slots, resources, request.max_distance_km)
+    solve_ms = (time.perf_counter() - started) * 1000
+
+    committed = False
+    if plan and not request.dry_run:
+        _commit_plan(plan, db)
+        committed = True
+    return AllocationResult(
+        mode=mode,
+        committed=committed,
+        incidents_considered=len({slot[0] for slot in slots}),
+        resources_considered=len(resources),
+        assignments=plan,
+        total_distance_km=round(sum(item.distance_km or 0 for item in plan), 3),
+        solve_ms=round(solve_ms, 3),
+    )
+
+
+def create_assignment(assignment: AssignmentCreate, db: Session) -> Optional[Assignment]:
+    """Assigns one resource to an incident.
+
+    Args:
+        assignment: The incident and resource to pair.
+        db: The database session.
+
+    Returns:
+        The created assignment, or None if the incident or resource does not exist.
+
+    Raises:
+        AllocationConflict: If the resource is not available.
+        SQLAlchemyError: If a database error occurs.
+    """
+    incident = db.get(Incident, assignment.incident_id)
+    resource = db.get(Resource, assignment.resource_id)
+    if incident is None or resource is None:
+        return None
+    distance = None
+    if None not in (incident.latitude, incident.longitude, resource.latitude, resource.longitude):
+        distance = round(haversine_km(incident.latitude, incident.longitude, resource.latitude, resource.longitude), 3)
+    plan = AssignmentPlan(incident_id=incident.id, resource_id=resource.id, distance_km=distance)
+    assignment_id = _commit_plan([plan], db)[0]
+    return db.get(Assignment, assignment_id)
+
+
+def release_incident_assignments(incident_ids: list[int], db: Session) -> tuple[list[int], list[int]]:
+    """Ends the active assignments of closed incidents, in the caller's transaction.
+
+    Their resources go back to "available" if they are still deployed. The
+    caller commits, then passes the result to ``assignments_released``.
+
+    Returns:
+        The ids of the released assignments and of their resources.
+    """
+    rows = db.execute(
+        select(Assignment.id, Assignment.resource_id)
+        .where(Assignment.incident_id.in_(incident_ids), Assignment.status == "active")
+    ).all()
+    if not rows:
+        return [], []
+    assignment_ids = [row.id for row in rows]
+    resource_ids = [row.resource_id for row in rows]
+    db.execute(
+        update(Assignment)
+        .where(Assignment.id.in_(assignment_ids))
+        .values(status="released", released_at=utc_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Resource)
+        .where(Resource.id.in_(resource_ids), Resource.status == "deployed")
+        .values(status="available", version=Resource.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return assignment_ids, resource_ids
+
+
+def assignments_released(released: tuple[list[int], list[int]], db: Session) -> None:
+    """Announces assignments ended by ``release_incident_assignments`` once committed."""
+    assignment_ids, resource_ids = released
+    if assignment_ids:
+        _resources_changed(resource_ids, db)
+        events.publish_ids("assignment", "updated", assignment_ids)
+
+
+def delete_assignments(where: Any, db: Session) -> list[int]:
+    """Deletes the assignments matching ``where``, in the caller's transaction.
+
+    Used before deleting their incident or resource, which the assignments
+    reference. Release active ones first if their resources stay.
+
+    Returns:
+        The ids of the deleted assignments.
+    """
+    assignment_ids = list(db.scalars(select(Assignment.id).where(where)))
+    if assignment_ids:
+        db.execute(
+            delete(Assignment).where(Assignment.id.in_(assignment_ids)),
+            execution_options={"synchronize_session": False},
+        )
+    return assignment_ids
+
+
+def release_assignment(assignment_id: int, db: Session) -> Optional[Assignment]:
+    """Ends an active assignment and makes its resource available again.
+
+    Args:
+        assignment_id: The ID of the assignment.
+        db: The database session.
+
+    Returns:
+        The released assignment, or None if not found.
+
+    Raises:
+        SQLAlchemyError: If a database error occurs.
+    """
+    try:
+        db_assignment = db.get(Assignment, assignment_id)
+        if db_assignment is None:
+            return None
+        if db_assignment.status == "active":
+            db_assignment.status = "released"
+            db_assignment.released_at = utc_now()
+            db.execute(
+                update(Resource)
+                .where(Resource.id == db_assignment.resource_id, Resource.status == "deployed")
+                .values(status="available", version=Resource.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            db.refresh(db_assignment)
+            _resources_changed([db_assignment.resource_id], db)
+            events.publish_model("assignment", "updated", schemas.Assignment, db_assignment)
+        return db_assignment
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise SQLAlchemyError(f"Database error releasing assignment: {e}") from e
+
+
+def get_assignments(
+    db: Session,
+    incident_id: Optional[int] = None,
+    resource_id: Optional[int] = None,
+    status: Optional[str] = "active",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Retrieves one page of assignments.
+
+    Args:
+        db: The database session.
+        incident_id: Only return assignments for this incident.
+        resource_id: Only return assignments of this resource.
+        status: Only return assignments in this state; None for all.
+        limit: Maximum number of assignments to return.
+        cursor: Cursor from the previous page.
+
+    Returns:
+        A page of assignments and the cursor for the next page.
+    """
+    query = db.query(Assignment)
+    if incident_id is not None:
+        query = query.filter(Assignment.incident_id == incident_id)
+    if resource_id is not None:
+        query = query.filter(Assignment.resource_id == resource_id)
+    if status is not None:
+        query = query.filter(Assignment.status == status)
+    return paginate(query, Assignment, limit=limit, cursor=cursor)
@@ -0,0 +1,166 @@
+import datetime
+import logging
+import os
+from typing import Any
+
+from sqlalchemy import bindparam, delete, exists, func, insert, select, text, union_all
+from sqlalchemy.orm import Session, aliased
+
+import cache
+import events
+from models import (
+    Assignment,
+    AssignmentArchive,
+    Communication,
+    CommunicationArchive,
+    Incident,
+    IncidentArchive,
+    OutboundMessage,
+)
+from services.notification_service import PENDING, SENDING, utcnow
+
+# Configuration section
+ARCHIVE_AFTER_DAYS = float(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_STATUSES = tuple(
+    status.strip() for status in os.getenv('ARCHIVE_STATUSES', 'closed,resolved').split(',') if status.strip()
+)
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+
+# Hot table -> archive table with the same columns.
+ARCHIVES = {
+    Incident: IncidentArchive,
+    Communication: CommunicationArchive,
+    Assignment: AssignmentArchive,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def with_archive(model: Any) -> Any:
+    """An entity standing for ``model``'s rows plus its archived rows.
+
+    Query it like the model itself: filters, ordering and keyset paging
+    apply to a UNION ALL of the hot table and its archive.
+    """
+    archive = ARCHIVES[model].__table__
+    columns = model.__table__.columns
+    both = union_all(
+        select(*columns),
+        select(*(archive.c[column.name] for column in columns)),
+    ).subquery(f"{model.__tablename__}_all")
+    return aliased(model, both)
+
+
+def source_fields(field_map: dict[str, Any], source: Any) -> dict[str, Any]:
+    """Points an API field -> column map at ``source`` (a model or ``with_archive`` entity)."""
+    return {name: getattr(source, column.key) for name, column in field_map.items()}
+
+
+def _move(model: Any, ids: list[int], db: Session) -> None:
+    columns = model.__table__.columns
+    for start in range(0, len(ids), ARCHIVE_BATCH_SIZE):
+        chunk = ids[start:start + ARCHIVE_BATCH_SIZE]
+        db.execute(
+            insert(ARCHIVES[model]).from_select(
+                [column.name for column in columns], select(*columns).where(model.id.in_(chunk))
+            )
+        )
+        db.execute(delete(model).where(model.id.in_(chunk)), execution_options={"synchronize_session": False})
+
+
+def _reuses_ids(db: Session) -> bool:
+    # Without AUTOINCREMENT, SQLite gives a new row max(id) + 1: once the
+    # newest rows are deleted, that can be an id already in the archive, and
+    # include_archived reads would return both rows.
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    statement = text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN :names")
+    rows = db.execute(
+        statement.bindparams(bindparam("names", expanding=True)),
+        {"names": [model.__tablename__ for model in ARCHIVES]},
+    )
+    return any("AUTOINCREMENT" not in sql.upper() for (sql,) in rows)
+
+
+def archive_batch(
+    db: Session,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    older_than_days: float = ARCHIVE_AFTER_DAYS,
+) -> dict[str, int]:
+    """Moves one batch of old records into the archive tables, in one transaction.
+
+    Takes up to ``batch_size`` closed or resolved incidents not changed for
+    ``older_than_days``, with all their communications and released
+    assignments, plus up to ``batch_size`` communications of that age on
+    incidents that stay. Incidents holding an active assignment and
+    communications with deliveries still queued are left alone; finished
+    deliveries are dropped, ``delivery_status`` keeps their outcome. On
+    PostgreSQL rows locked by other writers are skipped until the next
+    batch. Archived rows leave the change log as tombstones and stop
+    counting towards the summary, like deleted ones. On SQLite the hot
+    tables need AUTOINCREMENT, which ``init_db`` adds to tables created by
+    older versions; until it has, nothing is archived.
+
+    Args:
+        db: The database session.
+        batch_size: Incidents, and communications of remaining incidents, per batch.
+        older_than_days: Age past which records are archived.
+
+    Returns:
+        The number of incidents, communications and assignments moved.
+    """
+    if _reuses_ids(db):
+        logger.warning("Not archiving: the SQLite tables were created without AUTOINCREMENT and could reuse archived ids")
+        return {"incidents": 0, "communications": 0, "assignments": 0}
+    cutoff = utcnow() - datetime.timedelta(days=older_than_days)
+    undelivered = exists().where(
+        OutboundMessage.communication_id == Communication.id, OutboundMessage.status.in_((PENDING, SENDING))
+    )
+    movable = ~undelivered
+    try:
+        incident_ids = list(db.scalars(
+            select(Incident.id)
+            .where(
+                Incident.status.in_(ARCHIVE_STATUSES),
+                func.coalesce(Incident.updated_at, Incident.created_at) < cutoff,
+                ~exists().where(Assignment.incident_id == Incident.id, Assignment.status == "active"),
+                ~exists().where(Communication.incident_id == Incident.id, ~movable),
+            )
+            .order_by(Incident.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ))
+        old_ids = set(db.scalars(
+            select(Communication.id)
+            .where(Communication.created_at < cutoff, movable)
+            .order_by(Communication.created_at, Communication.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ))
+        assignment_ids: list[int] = []
+        if incident_ids:
+            old_ids.update(db.scalars(select(Communication.id).where(Communication.incident_id.in_(incident_ids))))
+            assignment_ids = list(db.scalars(select(Assignment.id).where(Assignment.incident_id.in_(incident_ids))))
+        communication_ids = sorted(old_ids)
+
+        for start in range(0, len(communication_ids), ARCHIVE_BATCH_SIZE):
+            chunk = communication_ids[start:start + ARCHIVE_BATCH_SIZE]
+            db.execute(delete(OutboundMessage).where(OutboundMessage.communication_id.in_(chunk)))
+        _move(Communication, communication_ids, db)
+        _move(Assignment, assignment_ids, db)
+        _move(Incident, incident_ids, db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if incident_ids:
+        cache.invalidate("incident", *incident_ids)
+        events.publish_ids("incident", "archived", incident_ids)
+    if communication_ids:
+        cache.invalidate("communication", *communication_ids)
+        events.publish_ids("communication", "archived", communication_ids)
+    return {
+        "incidents": len(incident_ids),
+        "communications": len(communication_ids),
+        "assignments": len(assignment_ids),
+    }
@@ -0,0 +1,163 @@
+import os
+from typing import Any, Callable, Iterable, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from schemas import BulkItemResult, BulkResult
+
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '500'))
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '10000'))
+
+# A per-item check beyond schema validation; returns an error message or None.
+ItemCheck = Callable[[BaseModel], Optional[str]]
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def validate_items(
+    raw_items: list[Any],
+    schema: Type[BaseModel],
+    check: Optional[ItemCheck] = None,
+) -> tuple[list[tuple[int, BaseModel]], list[BulkItemResult]]:
+    """Validates each raw item against ``schema`` independently.
+
+    Args:
+        raw_items: Decoded request items; an item may already be an error string.
+        schema: The Pydantic model every item must satisfy.
+        check: Optional extra validation applied after the schema.
+
+    Returns:
+        The valid (index, model) pairs and an error result for every invalid item.
+    """
+    valid: list[tuple[int, BaseModel]] = []
+    errors: list[BulkItemResult] = []
+    for index, raw in enumerate(raw_items):
+        if isinstance(raw, str):
+            errors.append(BulkItemResult(index=index, error=raw))
+            continue
+        try:
+            item = schema.parse_obj(raw)
+        except ValidationError as e:
+            errors.append(BulkItemResult(index=index, error=str(e)))
+            continue
+        message = check(item) if check else None
+        if message:
+            errors.append(BulkItemResult(index=index, error=message))
+            continue
+        valid.append((index, item))
+    return valid, errors
+
+
+def bulk_insert(
+    model: Any,
+    rows: list[tuple[int, dict[str, Any]]],
+    db: Session,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> list[BulkItemResult]:
+    """Inserts rows in batches using executemany ``INSERT ... RETURNING id``.
+
+    Each batch is its own transaction. If a batch fails, it is rolled back and
+    its rows are retried one at a time so a single bad row only fails itself.
+
+    Args:
+        model: The mapped class to insert into.
+        rows: (request index, column values) pairs.
+        db: The database session.
+        batch_size: Rows per INSERT statement and transaction.
+
+    Returns:
+        One result per row, holding the new id or the error.
+    """
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    results: list[BulkItemResult] = []
+    for batch in _chunks(rows, batch_size):
+        try:
+            ids = db.execute(statement, [values for _, values in batch]).scalars().all()
+            db.commit()
+            results.extend(BulkItemResult(index=index, id=new_id) for (index, _), new_id in zip(batch, ids))
+        except SQLAlchemyError:
+            db.rollback()
+            for index, values in batch:
+                try:
+                    new_id = db.execute(statement, [values]).scalar_one()
+                    db.commit()
+                    results.append(BulkItemResult(index=index, id=new_id))
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    results.append(BulkItemResult(index=index, error=f"Database error: {e.__class__.__name__}"))
+    return results
+
+
+def _bump_versions(model: Any, ids: list[int], db: Session) -> None:
+    if hasattr(model, "version"):
+        db.execute(
+            update(model).where(model.id.in_(ids)).values(version=model.version + 1),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def bulk_update(
+    model: Any,
+    rows: list[tuple[int, dict[str, Any]]],
+    db: Session,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> list[BulkItemResult]:
+    """Updates rows by primary key in batches using executemany ``UPDATE``.
+
+    Rows whose id does not exist are reported as errors; failing batches are
+    retried row by row like ``bulk_insert``. Models with a ``version``
+    column get it bumped in the same transaction.
+
+    Args:
+        model: The mapped class to update.
+        rows: (request index, column values including "id") pairs.
+        db: The database session.
+        batch_size: Rows per UPDATE statement and transaction.
+
+    Returns:
+        One result per row, holding the id or the error.
+    """
+    results: list[BulkItemResult] = []
+    for batch in _chunks(rows, batch_size):
+        ids = [values["id"] for _, values in batch]
+        existing = set(db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+        found = []
+        for index, values in batch:
+            if values["id"] in existing:
+                found.append((index, values))
+            else:
+                results.append(BulkItemResult(index=index, id=values["id"], error="Not found"))
+        if not found:
+            continue
+        try:
+            db.execute(update(model), [values for _, values in found])
+            _bump_versions(model, [values["id"] for _, values in found], db)
+            db.commit()
+            results.extend(BulkItemResult(index=index, id=values["id"]) for index, values in found)
+        except SQLAlchemyError:
+            db.rollback()
+            for index, values in found:
+                try:
+                    db.execute(update(model), [values])
+                    _bump_versions(model, [values["id"]], db)
+                    db.commit()
+                    results.append(BulkItemResult(index=index, id=values["id"]))
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    results.append(
+                        BulkItemResult(index=index, id=values["id"], error=f"Database error: {e.__class__.__name__}")
+                    )
+    return results
+
+
+def summarize(results: list[BulkItemResult]) -> BulkResult:
+    """Orders item results by request index and counts successes and failures."""
+    items = sorted(results, key=lambda result: result.index)
+    failed = sum(1 for item in items if item.error)
+    return BulkResult(succeeded=len(items) - failed, failed=failed, items=items)
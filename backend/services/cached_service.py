@@ -0,0 +1,104 @@
+from typing import Any, Callable, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+import cache
+import database
+import schemas
+import serialization
+import telemetry
+from replicas import primary_pinned
+from services import communication_service, incident_service, resource_service
+from services.pagination import Page
+
+# Read-through wrappers in front of the service reads. Values are cached in
+# their API (schema) shape so they can be shared across sessions and
+# processes; the services' write paths invalidate the affected keys.
+
+
+def _refresh() -> bool:
+    # Cached values may come from a lagging replica. A request pinned to the
+    # primary reads past them, and stores what it read in their place.
+    return primary_pinned() and len(database.replicas) > 0
+
+
+def _dump(schema: Type[BaseModel], obj: Any) -> Optional[dict[str, Any]]:
+    return serialization.to_dict(schema, obj)
+
+
+def _cached_page(
+    entity: str,
+    schema: Type[BaseModel],
+    load: Callable[..., Page],
+    db: Session,
+    params: dict[str, Any],
+) -> Page:
+    def loader() -> dict[str, Any]:
+        page = load(db, **params)
+        items = page.items if params.get("fields") else [_dump(schema, item) for item in page.items]
+        return {"items": items, "next_cursor": page.next_cursor}
+
+    value = cache.get_or_load(cache.list_key(entity, params), loader, refresh=_refresh())
+    return Page(items=value["items"], next_cursor=value["next_cursor"])
+
+
+def get_incident(incident_id: int, db: Session, include_archived: bool = False) -> Optional[dict[str, Any]]:
+    """Cached ``incident_service.get_incident``; archived incidents are read uncached."""
+    incident = cache.get_or_load(
+        cache.entity_key("incident", incident_id),
+        lambda: _dump(schemas.Incident, incident_service.get_incident(incident_id, db)),
+        refresh=_refresh(),
+    )
+    if incident is None and include_archived:
+        incident = _dump(schemas.Incident, incident_service.get_incident(incident_id, db, include_archived=True))
+    return incident
+
+
+def get_incidents(db: Session, **params: Any) -> Page:
+    """Cached ``incident_service.get_incidents``; takes the same keyword filters."""
+    return _cached_page("incident", schemas.Incident, incident_service.get_incidents, db, params)
+
+
+def get_resource(resource_id: int, db: Session) -> Optional[dict[str, Any]]:
+    """Cached ``resource_service.get_resource_by_id``, with unwritten telemetry applied."""
+    resource = cache.get_or_load(
+        cache.entity_key("resource", resource_id),
+        lambda: _dump(schemas.Resource, resource_service.get_resource_by_id(resource_id, db)),
+        refresh=_refresh(),
+    )
+    return telemetry.buffer.overlay(resource)
+
+
+def get_resources(db: Session, **params: Any) -> Page:
+    """Cached ``resource_service.get_resources``, with unwritten telemetry applied.
+
+    Filters match the stored values, so a resource whose buffered status no
+    longer matches ``status=`` can still appear until the ping is written.
+    """
+    page = _cached_page("resource", schemas.Resource, resource_service.get_resources, db, params)
+    return Page(items=telemetry.buffer.overlay_all(page.items), next_cursor=page.next_cursor)
+
+
+def get_communication(
+    communication_id: int, db: Session, include_archived: bool = False
+) -> Optional[dict[str, Any]]:
+    """Cached ``communication_service.get_communication``; archived records are read uncached."""
+    communication = cache.get_or_load(
+        cache.entity_key("communication", communication_id),
+        lambda: _dump(schemas.Communication, communication_service.get_communication(communication_id, db)),
+        refresh=_refresh(),
+    )
+    if communication is None and include_archived:
+        communication = _dump(
+            schemas.Communication,
+            communication_service.get_communication(communication_id, db, include_archived=True),
+        )
+    return communication
+
+
+def get_communications(db: Session, **params: Any) -> Page:
+    """Cached ``communication_service.get_communications``; takes the same keyword filters."""
+    return _cached_page(
+        "communication", schemas.Communication, communication_service.get_communications, db, params
+    )
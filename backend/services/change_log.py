@@ -0,0 +1,101 @@
+from typing import Optional
+
+from sqlalchemy import Engine, insert, literal, select
+from sqlalchemy.orm import Session
+
+from models import ChangeLog, Communication, Incident, Resource
+
+# Entities whose changes are logged for delta sync: entity -> (model, table name).
+TRACKED = {
+    "incident": (Incident, "incidents"),
+    "resource": (Resource, "resources"),
+    "communication": (Communication, "communications"),
+}
+
+# Serializes the change-log step of commits on PostgreSQL, so versions commit in order.
+_PG_LOCK_KEY = 4_201_023
+
+
+def _sqlite_ddl(entity: str, table_name: str) -> list[str]:
+    def log(row: str, deleted: int) -> str:
+        return (
+            f"DELETE FROM change_log WHERE entity = '{entity}' AND entity_id = {row}.id; "
+            f"INSERT INTO change_log(entity, entity_id, deleted) VALUES ('{entity}', {row}.id, {deleted});"
+        )
+
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS change_log_{table_name}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {log('new', 0)} END",
+        f"CREATE TRIGGER IF NOT EXISTS change_log_{table_name}_au AFTER UPDATE ON {table_name} "
+        f"BEGIN {log('new', 0)} END",
+        f"CREATE TRIGGER IF NOT EXISTS change_log_{table_name}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {log('old', 1)} END",
+    ]
+
+
+def _postgresql_ddl(entity: str, table_name: str) -> list[str]:
+    # Versions come from a sequence: if a later version could commit first, a
+    # client syncing in between would skip the earlier one. The trigger is
+    # deferred to commit time and takes a transaction-level advisory lock
+    # there, so only the log write and the commit itself run one at a time;
+    # the rest of each transaction, row locks included, stays concurrent.
+    function = f"change_log_{table_name}"
+    return [
+        f"LOCK TABLE {table_name} IN SHARE ROW EXCLUSIVE MODE",
+        f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        f"DECLARE row_id integer; BEGIN "
+        f"PERFORM pg_advisory_xact_lock({_PG_LOCK_KEY}); "
+        f"IF TG_OP = 'DELETE' THEN row_id := OLD.id; ELSE row_id := NEW.id; END IF; "
+        f"DELETE FROM change_log WHERE entity = '{entity}' AND entity_id = row_id; "
+        f"INSERT INTO change_log (entity, entity_id, deleted) VALUES ('{entity}', row_id, TG_OP = 'DELETE'); "
+        f"RETURN NULL; END $$",
+        f"DROP TRIGGER IF EXISTS {function} ON {table_name}",
+        f"CREATE CONSTRAINT TRIGGER {function} AFTER INSERT OR UPDATE OR DELETE ON {table_name} "
+        f"DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION {function}()",
+    ]
+
+
+def create_change_log(engine: Engine) -> None:
+    """Installs the change-log triggers and logs rows that have no entry yet.
+
+    The triggers record every insert, update and delete on the tracked
+    tables in the same transaction, whichever path made it, and keep one
+    entry per entity: its latest version, or its tombstone. Rows that
+    predate the triggers are given a version on first startup; deletions
+    from that time leave no tombstone. Other databases get no change log,
+    and delta sync raises ``ValueError`` there.
+
+    On PostgreSQL the log is written when a transaction commits, so a
+    transaction does not see its own entries before then. Commits that
+    touch the tracked tables still take one global lock in turn; it is held
+    only for the log write and the commit, not the whole transaction.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    with engine.begin() as conn:
+        for entity, (model, table_name) in TRACKED.items():
+            ddl = _sqlite_ddl if dialect == "sqlite" else _postgresql_ddl
+            for statement in ddl(entity, table_name):
+                conn.exec_driver_sql(statement)
+            logged = select(ChangeLog.entity_id).where(ChangeLog.entity == entity)
+            conn.execute(
+                insert(ChangeLog).from_select(
+                    [ChangeLog.entity, ChangeLog.entity_id],
+                    select(literal(entity), model.id).where(model.id.not_in(logged)).order_by(model.id),
+                )
+            )
+
+
+def current_version(entity: str, entity_id: int, db: Session) -> Optional[int]:
+    """The version of an entity's latest change, or None if none was logged."""
+    return db.scalar(
+        select(ChangeLog.version).where(ChangeLog.entity == entity, ChangeLog.entity_id == entity_id)
+    )
+
+
+def changes_since(version: int, limit: int, db: Session) -> list[ChangeLog]:
+    """The oldest ``limit`` entries with a version above ``version``."""
+    return list(
+        db.scalars(select(ChangeLog).where(ChangeLog.version > version).order_by(ChangeLog.version).limit(limit))
+    )
@@ -1,14 +1,37 @@
-```python
+from datetime import datetime
+
+from sqlalchemy import Select, delete, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from models import Communication
+import cache
+import events
+import notifications
+import schemas
+from models import Communication, OutboundMessage
 from schemas import CommunicationCreate
+from services import notification_service
+from services.archive_service import source_fields, with_archive
+from services.pagination import Page, paginate, projection_columns, resolve_fields
 from typing import Optional
 
+# API field name -> column, for ``fields=`` projections.
+COMMUNICATION_FIELDS = {
+    "id": Communication.id,
+    "incident_id": Communication.incident_id,
+    "message": Communication.communication_text,
+    "channel": Communication.channel,
+    "delivery_status": Communication.delivery_status,
+    "created_at": Communication.created_at,
+    "updated_at": Communication.updated_at,
+}
+
 
 def create_communication(communication: CommunicationCreate, db: Session) -> Communication:
-    """Creates a new communication record in the database.
+    """Creates a new communication record and queues its deliveries.
+
+    One outbound message per recipient is stored in the same transaction;
+    the notification workers deliver them and update ``delivery_status``.
 
     Args:
         communication: The communication data to create.
@@ -22,10 +45,16 @@ def create_communication(communication: CommunicationCreate, db: Session) -> Com
         ValueError: If the communication data is invalid.
     """
     try:
-        db_communication = Communication(**communication.dict())
+        db_communication = Communication(**communication.dict(exclude={"recipients"}))
         db.add(db_communication)
+        # Deliveries are only queued here; the notification workers send them.
+        notification_service.enqueue(db_communication, communication.recipients, db)
         db.commit()
         db.refresh(db_communication)
+        cache.invalidate("communication", db_communication.id)
+        events.publish_model("communication", "created", schemas.Communication, db_communication)
+        if communication.recipients:
+            notifications.dispatcher.wake()
         return db_communication
     except SQLAlchemyError as e:
         db.rollback()
@@ -34,30 +63,100 @@ def create_communication(communication: CommunicationCreate, db: Session) -> Com
         raise ValueError(f"Invalid communication data: {e}") from e
 
 
-def get_communications(db: Session) -> list[Communication]:
-    """Retrieves all communication records from the database.
+def get_communications(
+    db: Session,
+    incident_id: Optional[int] = None,
+    channel: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    fields: Optional[list[str]] = None,
+    include_archived: bool = False,
+) -> Page:
+    """Retrieves one page of communication records matching the given filters.
 
     Args:
         db: The database session.
+        incident_id: Only return communications for this incident.
+        channel: Only return communications sent over this channel.
+        created_after: Only return records created at or after this time.
+        created_before: Only return records created before this time.
+        limit: Maximum number of records to return.
+        cursor: Cursor from the previous page.
+        order_by: Keyset sort key, "id" or "created_at".
+        fields: Only select these columns; items are then dicts.
+        include_archived: Also page through archived records.
 
     Returns:
-        A list of communication records.
+        A page of communication records and the cursor for the next page.
 
     Raises:
         SQLAlchemyError: If there is an error during database operations.
+        ValueError: If a field, cursor or paging argument is invalid.
     """
+    source = with_archive(Communication) if include_archived else Communication
+    fields = resolve_fields(fields, COMMUNICATION_FIELDS)
+    query = (
+        db.query(*projection_columns(fields, source_fields(COMMUNICATION_FIELDS, source), order_by))
+        if fields
+        else db.query(source)
+    )
+    query = _filter_communications(query, incident_id, channel, created_after, created_before, source)
     try:
-        return db.query(Communication).all()
+        return paginate(query, source, limit=limit, cursor=cursor, order_by=order_by, fields=fields)
     except SQLAlchemyError as e:
         raise SQLAlchemyError(f"Error retrieving communications: {e}") from e
 
 
-def get_communication(communication_id: int, db: Session) -> Optional[Communication]:
+def export_communications_statement(
+    incident_id: Optional[int] = None,
+    channel: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    include_archived: bool = False,
+) -> Select:
+    """Builds the statement that streams every matching communication for export.
+
+    Args:
+        incident_id: Only export communications for this incident.
+        channel: Only export communications sent over this channel.
+        created_after: Only export records created at or after this time.
+        created_before: Only export records created before this time.
+        include_archived: Also export archived records.
+
+    Returns:
+        A select of all communication fields, ordered by id.
+    """
+    source = with_archive(Communication) if include_archived else Communication
+    field_map = source_fields(COMMUNICATION_FIELDS, source)
+    statement = select(*(column.label(name) for name, column in field_map.items()))
+    statement = _filter_communications(statement, incident_id, channel, created_after, created_before, source)
+    return statement.order_by(source.id)
+
+
+def _filter_communications(query, incident_id, channel, created_after, created_before, source=Communication):
+    if incident_id is not None:
+        query = query.filter(source.incident_id == incident_id)
+    if channel is not None:
+        query = query.filter(source.channel == channel)
+    if created_after is not None:
+        query = query.filter(source.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(source.created_at < created_before)
+    return query
+
+
+def get_communication(
+    communication_id: int, db: Session, include_archived: bool = False
+) -> Optional[Communication]:
     """Retrieves a specific communication record from the database.
 
     Args:
         communication_id: The ID of the communication to retrieve.
         db: The database session.
+        include_archived: Also look in the archive.
 
     Returns:
         The communication record, or None if not found.
@@ -69,7 +168,29 @@ def get_communication(communication_id: int, db: Session) -> Optional[Communicat
     if not isinstance(communication_id, int) or communication_id <= 0:
         raise ValueError("Invalid communication ID")
     try:
-        return db.query(Communication).filter(Communication.id == communication_id).first()
+        source = with_archive(Communication) if include_archived else Communication
+        return db.query(source).filter(source.id == communication_id).first()
     except SQLAlchemyError as e:
         raise SQLAlchemyError(f"Error retrieving communication: {e}") from e
-```
\ No newline at end of file
+
+
+def delete_incident_communications(incident_id: int, db: Session) -> list[int]:
+    """Deletes an incident's communications and their outbound messages, in the caller's transaction.
+
+    Deliveries still queued for them are dropped.
+
+    Returns:
+        The ids of the deleted communications.
+    """
+    communication_ids = list(db.scalars(select(Communication.id).where(Communication.incident_id == incident_id)))
+    if communication_ids:
+        of_incident = select(Communication.id).where(Communication.incident_id == incident_id)
+        db.execute(
+            delete(OutboundMessage).where(OutboundMessage.communication_id.in_(of_incident)),
+            execution_options={"synchronize_session": False},
+        )
+        db.execute(
+            delete(Communication).where(Communication.incident_id == incident_id),
+            execution_options={"synchronize_session": False},
+        )
+    return communication_ids
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable, Iterator, Union
+
+from sqlalchemy import Select
+
+import database
+
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(rows: Iterable[dict[str, Any]]) -> str:
+    """Encodes a batch of rows as newline-delimited JSON."""
+    return "".join(json.dumps(row, default=_json_default, separators=(",", ":")) + "\n" for row in rows)
+
+
+def encode_csv(rows: Iterable[dict[str, Any]], columns: list[str], header: bool = False) -> str:
+    """Encodes a batch of rows as CSV, optionally preceded by the header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow(
+            [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row.values()]
+        )
+    return buffer.getvalue()
+
+
+def _encode_batch(rows: list[dict[str, Any]], fmt: str, columns: list[str]) -> str:
+    if fmt == "csv":
+        return encode_csv(rows, columns)
+    return encode_ndjson(rows)
+
+
+def iter_export(statement: Select, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """Streams the rows of a statement as encoded chunks on the sync engine.
+
+    Rows are fetched with ``yield_per`` (a server-side cursor where the driver
+    supports one) and each batch is encoded and yielded before the next one is
+    read, so memory stays bounded by ``batch_size``.
+
+    Args:
+        statement: A select of labelled columns.
+        fmt: "ndjson" or "csv".
+        batch_size: Rows fetched and encoded per chunk.
+
+    Yields:
+        str: Encoded chunks of the export.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    # The export owns its session: it outlives the request handler that started it.
+    with database.SessionLocal() as db:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            yield encode_csv([], columns, header=True)
+        for partition in result.partitions():
+            yield _encode_batch([row._asdict() for row in partition], fmt, columns)
+
+
+async def aiter_export(statement: Select, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[str]:
+    """Streams the rows of a statement as encoded chunks on the async engine.
+
+    Args:
+        statement: A select of labelled columns.
+        fmt: "ndjson" or "csv".
+        batch_size: Rows fetched and encoded per chunk.
+
+    Yields:
+        str: Encoded chunks of the export.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=batch_size))
+        if fmt == "csv":
+            yield encode_csv([], columns, header=True)
+        async for partition in result.partitions():
+            yield _encode_batch([row._asdict() for row in partition], fmt, columns)
+
+
+def stream_export(statement: Select, fmt: str) -> Union[Iterator[str], AsyncIterator[str]]:
+    """Returns the export iterator for whichever database path is enabled.
+
+    Args:
+        statement: A select of labelled columns.
+        fmt: "ndjson" or "csv".
+
+    Returns:
+        A sync or async iterator of encoded chunks for a StreamingResponse.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if database.DB_ASYNC:
+        return aiter_export(statement, fmt)
+    return iter_export(statement, fmt)
@@ -1,11 +1,36 @@
-```python
+from datetime import datetime
+
 from sqlalchemy.orm import Session
-from sqlalchemy import exc
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import Select, exc, func, select, update
 
-from models import Incident
-from schemas import IncidentCreate, IncidentUpdate
+import cache
+import events
+import schemas
+from models import Assignment, Communication, Incident
+from schemas import BulkResult, IncidentBulkUpdate, IncidentCreate, IncidentUpdate
+from services import allocation_service, communication_service
+from services.archive_service import source_fields, with_archive
+from services.change_log import current_version
+from services.etag import PreconditionFailed, entity_etag
+from services.bulk import bulk_insert, bulk_update, summarize, validate_items
+from services.pagination import Page, paginate, projection_columns, resolve_fields
 from typing import Optional
 
+# API field name -> column, for ``fields=`` projections.
+INCIDENT_FIELDS = {
+    "id": Incident.id,
+    "title": Incident.title,
+    "description": Incident.description,
+    "location": Incident.location,
+    "latitude": Incident.latitude,
+    "longitude": Incident.longitude,
+    "status": Incident.status,
+    "created_at": Incident.created_at,
+    "updated_at": Incident.updated_at,
+    "version": Incident.version,
+}
+
 
 def create_incident(incident: IncidentCreate, db: Session) -> Incident:
     """Creates a new incident.
@@ -29,58 +54,311 @@ def create_incident(incident: IncidentCreate, db: Session) -> Incident:
         db.add(db_incident)
         db.commit()
         db.refresh(db_incident)
+        cache.invalidate("incident", db_incident.id)
+        events.publish_model("incident", "created", schemas.Incident, db_incident)
         return db_incident
     except exc.SQLAlchemyError as e:
         db.rollback()
         raise exc.SQLAlchemyError(f"Error creating incident: {e}") from e
 
 
-def get_incidents(db: Session) -> list[Incident]:
-    """Retrieves all incidents.
+def bulk_create_incidents(items: list, db: Session) -> BulkResult:
+    """Creates many incidents with batched inserts.
+
+    Args:
+        items: Raw incident payloads, each validated against IncidentCreate.
+        db: The database session.
+
+    Returns:
+        The per-item outcome; invalid or failing items do not abort the rest.
+    """
+    valid, errors = validate_items(items, IncidentCreate)
+    results = bulk_insert(Incident, [(index, item.dict()) for index, item in valid], db)
+    created = [result.id for result in results if result.id]
+    cache.invalidate("incident", *created)
+    events.publish_ids("incident", "created", created)
+    return summarize(errors + results)
+
+
+def bulk_update_incidents(items: list, db: Session) -> BulkResult:
+    """Updates many incidents by id with batched updates.
 
     Args:
+        items: Raw incident payloads with an "id", validated against IncidentBulkUpdate.
         db: The database session.
 
     Returns:
-        A list of incidents.
+        The per-item outcome; unknown ids are reported as errors.
+        Incidents closed or resolved here release their assignments.
     """
-    return db.query(Incident).all()
+    valid, errors = validate_items(items, IncidentBulkUpdate)
+    results = bulk_update(Incident, [(index, item.dict(exclude_unset=True)) for index, item in valid], db)
+    updated = [result.id for result in results if not result.error]
+    cache.invalidate("incident", *updated)
+    events.publish_ids("incident", "updated", updated)
+    closed = {item.id for _, item in valid if item.status in allocation_service.CLOSED_STATUSES} & set(updated)
+    if closed:
+        released = allocation_service.release_incident_assignments(sorted(closed), db)
+        db.commit()
+        allocation_service.assignments_released(released, db)
+    return summarize(errors + results)
 
 
-def get_incident(incident_id: int, db: Session) -> Optional[Incident]:
+def get_incidents(
+    db: Session,
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    fields: Optional[list[str]] = None,
+    include_archived: bool = False,
+) -> Page:
+    """Retrieves one page of incidents matching the given filters.
+
+    Args:
+        db: The database session.
+        status: Only return incidents with this status.
+        location: Only return incidents at this exact location.
+        created_after: Only return incidents created at or after this time.
+        created_before: Only return incidents created before this time.
+        limit: Maximum number of incidents to return.
+        cursor: Cursor from the previous page.
+        order_by: Keyset sort key, "id" or "created_at".
+        fields: Only select these columns; items are then dicts.
+        include_archived: Also page through archived incidents.
+
+    Returns:
+        A page of incidents and the cursor for the next page.
+
+    Raises:
+        ValueError: If a field, cursor or paging argument is invalid.
+    """
+    source = with_archive(Incident) if include_archived else Incident
+    fields = resolve_fields(fields, INCIDENT_FIELDS)
+    field_map = source_fields(INCIDENT_FIELDS, source)
+    query = db.query(*projection_columns(fields, field_map, order_by)) if fields else db.query(source)
+    query = _filter_incidents(query, status, location, created_after, created_before, source)
+    return paginate(query, source, limit=limit, cursor=cursor, order_by=order_by, fields=fields)
+
+
+def export_incidents_statement(
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    include_archived: bool = False,
+) -> Select:
+    """Builds the statement that streams every matching incident for export.
+
+    Args:
+        status: Only export incidents with this status.
+        location: Only export incidents at this exact location.
+        created_after: Only export incidents created at or after this time.
+        created_before: Only export incidents created before this time.
+        include_archived: Also export archived incidents.
+
+    Returns:
+        A select of all incident fields, ordered by id.
+    """
+    source = with_archive(Incident) if include_archived else Incident
+    statement = select(*(column.label(name) for name, column in source_fields(INCIDENT_FIELDS, source).items()))
+    statement = _filter_incidents(statement, status, location, created_after, created_before, source)
+    return statement.order_by(source.id)
+
+
+def _filter_incidents(query, status, location, created_after, created_before, source=Incident):
+    if status is not None:
+        query = query.filter(source.status == status)
+    if location is not None:
+        query = query.filter(source.location == location)
+    if created_after is not None:
+        query = query.filter(source.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(source.created_at < created_before)
+    return query
+
+
+def get_incident(incident_id: int, db: Session, include_archived: bool = False) -> Optional[Incident]:
     """Retrieves an incident by ID.
 
     Args:
         incident_id: The ID of the incident.
         db: The database session.
+        include_archived: Also look in the archive.
 
     Returns:
         The incident if found, otherwise None.
     """
-    return db.query(Incident).filter(Incident.id == incident_id).first()
+    source = with_archive(Incident) if include_archived else Incident
+    return db.query(source).filter(source.id == incident_id).first()
+
+
+def get_incident_timeline(
+    incident_id: int,
+    db: Session,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_archived: bool = False,
+) -> Optional[tuple[Incident, Page]]:
+    """Retrieves an incident and one page of its communications, oldest first.
+
+    Args:
+        incident_id: The ID of the incident.
+        db: The database session.
+        limit: Maximum number of communications to return.
+        cursor: Cursor from the previous page of communications.
+        include_archived: Also look in the archive, for the incident and
+            for its communications.
+
+    Returns:
+        The incident and the page of communications, or None if not found.
+
+    Raises:
+        ValueError: If a cursor or paging argument is invalid.
+    """
+    incident = get_incident(incident_id, db, include_archived=include_archived)
+    if incident is None:
+        return None
+    source = with_archive(Communication) if include_archived else Communication
+    query = db.query(source).filter(source.incident_id == incident_id)
+    page = paginate(query, source, limit=limit, cursor=cursor, order_by="created_at")
+    set_committed_value(incident, "communications", page.items)
+    return incident, page
+
 
+def get_incident_timelines(
+    db: Session,
+    status: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    messages: int = 5,
+) -> Page:
+    """Retrieves one page of incidents, each with its latest communications.
 
-def update_incident(incident_id: int, incident: IncidentUpdate, db: Session) -> Optional[Incident]:
+    Runs two queries whatever the page size: the incident page, then the
+    newest ``messages`` communications of every incident on it, ranked per
+    incident with a window function so each child list is cut off in SQL.
+
+    Args:
+        db: The database session.
+        status: Only return incidents with this status.
+        location: Only return incidents at this exact location.
+        created_after: Only return incidents created at or after this time.
+        created_before: Only return incidents created before this time.
+        limit: Maximum number of incidents to return.
+        cursor: Cursor from the previous page.
+        order_by: Keyset sort key, "id" or "created_at".
+        messages: Communications to embed per incident, oldest first.
+
+    Returns:
+        A page of incidents with ``communications`` loaded.
+
+    Raises:
+        ValueError: If a cursor or paging argument is invalid.
+    """
+    page = get_incidents(
+        db,
+        status=status,
+        location=location,
+        created_after=created_after,
+        created_before=created_before,
+        limit=limit,
+        cursor=cursor,
+        order_by=order_by,
+    )
+    by_incident: dict[int, list[Communication]] = {incident.id: [] for incident in page.items}
+    if by_incident and messages > 0:
+        ranked = (
+            select(
+                Communication.id,
+                func.row_number()
+                .over(
+                    partition_by=Communication.incident_id,
+                    order_by=(Communication.created_at.desc(), Communication.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(Communication.incident_id.in_(list(by_incident)))
+            .subquery()
+        )
+        latest = (
+            db.query(Communication)
+            .join(ranked, ranked.c.id == Communication.id)
+            .filter(ranked.c.rank <= messages)
+            .order_by(Communication.created_at, Communication.id)
+        )
+        for communication in latest:
+            by_incident[communication.incident_id].append(communication)
+    for incident in page.items:
+        set_committed_value(incident, "communications", by_incident[incident.id])
+    return page
+
+
+def update_incident(
+    incident_id: int,
+    incident: IncidentUpdate,
+    db: Session,
+    if_match: Optional[list[str]] = None,
+    if_version: Optional[int] = None,
+) -> Optional[Incident]:
     """Updates an incident.
 
     Args:
         incident_id: The ID of the incident to update.
         incident: The updated incident data.
         db: The database session.
+        if_match: When given, the update only applies if the incident's
+            current ETag is one of these.
+        if_version: When given, the update only applies if the incident's
+            latest change-log version is this one.
 
     Returns:
-        The updated incident if found, otherwise None.
+        The updated incident if found, otherwise None. Closing or resolving
+        an incident releases its assignments in the same transaction.
 
     Raises:
         exc.SQLAlchemyError: If there's an error during database operations.
+        PreconditionFailed: If the incident changed since the caller read it.
     """
     try:
-        db_incident = db.query(Incident).filter(Incident.id == incident_id).first()
+        query = db.query(Incident).filter(Incident.id == incident_id)
+        locked = if_match is not None or if_version is not None
+        db_incident = (query.with_for_update() if locked else query).first()
         if db_incident:
-            for key, value in incident.dict(exclude_unset=True).items():
-                setattr(db_incident, key, value)
+            if if_match is not None and entity_etag(db_incident.id, db_incident.version) not in if_match:
+                db.rollback()
+                raise PreconditionFailed("Incident was modified since it was read")
+            if if_version is not None and current_version("incident", incident_id, db) != if_version:
+                db.rollback()
+                raise PreconditionFailed(f"Incident was modified since version {if_version}")
+            statement = update(Incident).where(Incident.id == incident_id)
+            if locked:
+                # The row lock does nothing on SQLite; checking the version in
+                # the UPDATE itself is what keeps a concurrent write from being lost.
+                statement = statement.where(Incident.version == db_incident.version)
+            values = incident.dict(exclude_unset=True)
+            written = db.execute(
+                statement.values(**values, version=Incident.version + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not written:
+                db.rollback()
+                raise PreconditionFailed("Incident was modified since it was read")
+            released = ([], [])
+            if values.get("status") in allocation_service.CLOSED_STATUSES:
+                released = allocation_service.release_incident_assignments([incident_id], db)
             db.commit()
             db.refresh(db_incident)
+            cache.invalidate("incident", incident_id)
+            events.publish_model("incident", "updated", schemas.Incident, db_incident)
+            allocation_service.assignments_released(released, db)
             return db_incident
         else:
             return None
@@ -89,22 +367,41 @@ def update_incident(incident_id: int, incident: IncidentUpdate, db: Session) ->
         raise exc.SQLAlchemyError(f"Error updating incident: {e}") from e
 
 
-def delete_incident(incident_id: int, db: Session) -> None:
-    """Deletes an incident.
+def delete_incident(incident_id: int, db: Session, if_version: Optional[int] = None) -> None:
+    """Deletes an incident with its communications and assignments.
+
+    Active assignments are released first, so their resources become
+    available again; queued deliveries of its communications are dropped.
+    Everything happens in one transaction.
 
     Args:
         incident_id: The ID of the incident to delete.
         db: The database session.
+        if_version: When given, the incident is only deleted if its latest
+            change-log version is this one.
 
     Raises:
         exc.SQLAlchemyError: If there's an error during database operations.
     """
     try:
-        db_incident = db.query(Incident).filter(Incident.id == incident_id).first()
+        query = db.query(Incident).filter(Incident.id == incident_id)
+        db_incident = (query.with_for_update() if if_version is not None else query).first()
         if db_incident:
+            if if_version is not None and current_version("incident", incident_id, db) != if_version:
+                db.rollback()
+                raise PreconditionFailed(f"Incident was modified since version {if_version}")
+            released = allocation_service.release_incident_assignments([incident_id], db)
+            assignment_ids = allocation_service.delete_assignments(Assignment.incident_id == incident_id, db)
+            communication_ids = communication_service.delete_incident_communications(incident_id, db)
             db.delete(db_incident)
             db.commit()
+            cache.invalidate("incident", incident_id)
+            allocation_service.assignments_released(released, db)
+            events.publish_ids("assignment", "deleted", assignment_ids)
+            if communication_ids:
+                cache.invalidate("communication", *communication_ids)
+                events.publish_ids("communication", "deleted", communication_ids)
+            events.hub.publish("incident", "deleted", incident_id)
     except exc.SQLAlchemyError as e:
         db.rollback()
         raise exc.SQLAlchemyError(f"Error deleting incident: {e}") from e
-```
\ No newline at end of file
@@ -0,0 +1,195 @@
+import datetime
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+import cache
+import events
+from models import Communication, OutboundMessage
+
+# Statuses an outbound message moves through.
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+
+@dataclass
+class OutboundItem:
+    """A claimed message, with everything a sender needs to deliver it."""
+    id: int
+    communication_id: int
+    channel: str
+    recipient: str
+    text: str
+    attempts: int
+
+
+def utcnow() -> datetime.datetime:
+    # Naive UTC, matching what models.utc_now() stores.
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def enqueue(communication: Communication, recipients: list[str], db: Session) -> None:
+    """Adds one outbound message per recipient to the caller's transaction.
+
+    The caller commits, so a communication and its deliveries are stored
+    together or not at all.
+    """
+    if not recipients:
+        return
+    communication.delivery_status = "queued"
+    db.flush()
+    db.execute(
+        insert(OutboundMessage),
+        [
+            {"communication_id": communication.id, "channel": communication.channel, "recipient": recipient}
+            for recipient in dict.fromkeys(recipients)
+        ],
+    )
+
+
+def claim_batch(channel: str, limit: int, lease_seconds: float, db: Session) -> list[OutboundItem]:
+    """Claims up to ``limit`` due messages of one channel for this worker.
+
+    Due means pending with ``next_attempt_at`` passed, or claimed by a worker
+    whose lease ran out. The claim is a single conditional UPDATE, so two
+    workers never get the same message.
+
+    Returns:
+        The claimed messages, oldest first.
+    """
+    now = utcnow()
+    claimable = or_(
+        and_(OutboundMessage.status == PENDING, OutboundMessage.next_attempt_at <= now),
+        and_(OutboundMessage.status == SENDING, OutboundMessage.lease_until < now),
+    )
+    due = (
+        select(OutboundMessage.id)
+        .where(OutboundMessage.channel == channel, claimable)
+        .order_by(OutboundMessage.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    claimed = db.execute(
+        update(OutboundMessage)
+        .where(OutboundMessage.id.in_(due), claimable)
+        .values(status=SENDING, lease_until=now + datetime.timedelta(seconds=lease_seconds))
+        .returning(OutboundMessage.id, OutboundMessage.communication_id, OutboundMessage.recipient, OutboundMessage.attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.commit()
+    if not claimed:
+        return []
+    texts = dict(
+        db.execute(
+            select(Communication.id, Communication.communication_text).where(
+                Communication.id.in_({row.communication_id for row in claimed})
+            )
+        ).all()
+    )
+    return sorted(
+        (
+            OutboundItem(row.id, row.communication_id, channel, row.recipient, texts.get(row.communication_id, ""), row.attempts)
+            for row in claimed
+        ),
+        key=lambda item: item.id,
+    )
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def complete_batch(
+    items: list[OutboundItem],
+    errors: list[Optional[str]],
+    db: Session,
+    max_attempts: int,
+    backoff_base: float,
+    backoff_cap: float,
+) -> dict[str, int]:
+    """Records the outcome of a delivery attempt for each claimed message.
+
+    Failed messages go back to pending with an exponential backoff until
+    ``max_attempts`` is reached, then stay failed. The parent communications'
+    ``delivery_status`` is recomputed in the same transaction.
+
+    Args:
+        items: The messages that were attempted.
+        errors: For each item, None on success or the failure reason.
+        db: The database session.
+        max_attempts: Attempts before a message is given up on.
+        backoff_base: Delay in seconds after the first failure.
+        backoff_cap: Longest delay between attempts.
+
+    Returns:
+        Counts of messages "sent", "retried" and "failed".
+    """
+    now = utcnow()
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+    rows = []
+    for item, error in zip(items, errors):
+        attempts = item.attempts + 1
+        row = {"id": item.id, "attempts": attempts, "lease_until": None, "last_error": error}
+        if error is None:
+            row.update(status=SENT, sent_at=now)
+            counts["sent"] += 1
+        elif attempts >= max_attempts:
+            row.update(status=FAILED)
+            counts["failed"] += 1
+        else:
+            delay = backoff_seconds(attempts, backoff_base, backoff_cap)
+            row.update(status=PENDING, next_attempt_at=now + datetime.timedelta(seconds=delay))
+            counts["retried"] += 1
+        rows.append(row)
+    if rows:
+        db.execute(update(OutboundMessage), rows)
+    communication_ids = sorted({item.communication_id for item in items})
+    _refresh_delivery_status(communication_ids, db)
+    db.commit()
+    if communication_ids:
+        cache.invalidate("communication", *communication_ids)
+        events.publish_ids("communication", "updated", communication_ids)
+    return counts
+
+
+def _delivery_status(counts: dict[str, int]) -> str:
+    if counts.get(PENDING) or counts.get(SENDING):
+        return "queued"
+    if not counts.get(SENT):
+        return "failed"
+    return "sent" if not counts.get(FAILED) else "partial"
+
+
+def _refresh_delivery_status(communication_ids: list[int], db: Session) -> None:
+    if not communication_ids:
+        return
+    counts: dict[int, dict[str, int]] = {communication_id: {} for communication_id in communication_ids}
+    rows = db.execute(
+        select(OutboundMessage.communication_id, OutboundMessage.status, func.count())
+        .where(OutboundMessage.communication_id.in_(communication_ids))
+        .group_by(OutboundMessage.communication_id, OutboundMessage.status)
+    )
+    for communication_id, status, count in rows:
+        counts[communication_id][status] = count
+    db.execute(
+        update(Communication),
+        [
+            {"id": communication_id, "delivery_status": _delivery_status(by_status)}
+            for communication_id, by_status in counts.items()
+        ],
+    )
+
+
+def queue_depth(db: Session) -> dict[str, int]:
+    """Number of undelivered (pending or in-flight) messages per channel."""
+    rows = db.execute(
+        select(OutboundMessage.channel, func.count())
+        .where(OutboundMessage.status.in_((PENDING, SENDING)))
+        .group_by(OutboundMessage.channel)
+    )
+    return dict(rows.all())
@@ -0,0 +1,147 @@
+import base64
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '100'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+
+# Keyset sort keys; "id" alone is unique, "created_at" is tie-broken by id.
+SORT_KEYS = ('id', 'created_at')
+
+
+@dataclass
+class Page:
+    """One page of results plus the cursor that fetches the next page."""
+    items: list[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encodes the position of the last row of a page as an opaque cursor.
+
+    Args:
+        sort_value: The value of the sort column for the last row.
+        row_id: The primary key of the last row.
+
+    Returns:
+        A URL-safe cursor string.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, order_by: str) -> tuple[Any, int]:
+    """Decodes a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: The cursor string.
+        order_by: The sort key the cursor was produced for.
+
+    Returns:
+        The (sort value, id) pair of the last row already returned.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if order_by == 'created_at':
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def resolve_fields(fields: Optional[Sequence[str]], field_map: dict[str, Any]) -> Optional[list[str]]:
+    """Validates a ``fields=`` projection against the columns a model exposes.
+
+    Args:
+        fields: The requested field names, or None for whole objects.
+        field_map: Mapping of API field name to model attribute.
+
+    Returns:
+        The requested field names in request order, or None.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in field_map]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def projection_columns(fields: list[str], field_map: dict[str, Any], order_by: str) -> list[Any]:
+    """Builds the labelled columns to select for a projection.
+
+    The keyset columns are always selected so the next cursor can be built,
+    even when the caller did not ask for them.
+    """
+    names = list(dict.fromkeys([*fields, 'id', order_by]))
+    return [field_map[name].label(name) for name in names]
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = 'id',
+    fields: Optional[list[str]] = None,
+) -> Page:
+    """Applies keyset pagination to a query and executes it.
+
+    Rows are ordered by ``(order_by, id)`` and the cursor holds the last
+    row's key, so each page is an index range scan rather than an OFFSET.
+
+    Args:
+        query: The filtered query, selecting either the model or labelled columns.
+        model: The mapped class being paged.
+        limit: Page size, capped at ``MAX_PAGE_SIZE``.
+        cursor: Cursor returned with the previous page.
+        order_by: One of ``SORT_KEYS``.
+        fields: When set, items are returned as dicts holding only these keys.
+
+    Returns:
+        Page: The items and the cursor for the next page, if there is one.
+
+    Raises:
+        ValueError: If the sort key, limit or cursor is invalid.
+    """
+    if order_by not in SORT_KEYS:
+        raise ValueError(f"order_by must be one of: {', '.join(SORT_KEYS)}")
+    limit = DEFAULT_PAGE_SIZE if limit is None else limit
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    id_col = model.id
+    sort_col = getattr(model, order_by)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, order_by)
+        if order_by == 'id':
+            query = query.filter(id_col > last_id)
+        else:
+            query = query.filter(or_(sort_col > sort_value, and_(sort_col == sort_value, id_col > last_id)))
+    order = [id_col] if order_by == 'id' else [sort_col, id_col]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, order_by), last.id)
+    if fields:
+        rows = [{name: getattr(row, name) for name in fields} for row in rows]
+    return Page(items=rows, next_cursor=next_cursor)
@@ -1,11 +1,37 @@
-```python
+from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Select, select, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from models import Resource
-from schemas import ResourceCreate, ResourceUpdate
+import cache
+import events
+import schemas
+import telemetry
+from models import Assignment, Incident, Resource
+from schemas import BulkResult, ResourceBulkUpdate, ResourceCreate, ResourceUpdate
+from services import allocation_service
+from services.change_log import current_version
+from services.etag import PreconditionFailed, entity_etag
+from services.bulk import bulk_insert, bulk_update, summarize, validate_items
+from services.pagination import Page, paginate, projection_columns, resolve_fields
+from services.spatial_index import haversine_km, resource_index, sync_resources
+from services.telemetry_service import PING_FIELDS
+
+# API field name -> column, for ``fields=`` projections.
+RESOURCE_FIELDS = {
+    "id": Resource.id,
+    "type": Resource.type,
+    "name": Resource.name,
+    "status": Resource.status,
+    "location": Resource.location,
+    "latitude": Resource.latitude,
+    "longitude": Resource.longitude,
+    "created_at": Resource.created_at,
+    "updated_at": Resource.updated_at,
+    "version": Resource.version,
+}
 
 
 def create_resource(resource: ResourceCreate, db: Session) -> Resource:
@@ -30,30 +56,211 @@ def create_resource(resource: ResourceCreate, db: Session) -> Resource:
         db.add(db_resource)
         db.commit()
         db.refresh(db_resource)
+        cache.invalidate("resource", db_resource.id)
+        _index_resource(db_resource)
+        events.publish_model("resource", "created", schemas.Resource, db_resource)
         return db_resource
     except SQLAlchemyError as e:
         db.rollback()
         raise SQLAlchemyError(f"Database error creating resource: {e}") from e
 
 
-def get_resources(db: Session) -> list[Resource]:
-    """Retrieves all resources.
+def _index_resource(resource: Resource) -> None:
+    resource_index.upsert(resource.id, resource.latitude, resource.longitude, resource.type, resource.status)
+
+
+def _check_resource(resource: ResourceCreate) -> Optional[str]:
+    if not resource.name or not resource.type:
+        return "Resource name and type are required."
+    return None
+
+
+def bulk_create_resources(items: list, db: Session) -> BulkResult:
+    """Creates many resources with batched inserts.
+
+    Args:
+        items: Raw resource payloads, each validated against ResourceCreate.
+        db: The database session.
+
+    Returns:
+        The per-item outcome; invalid or failing items do not abort the rest.
+    """
+    valid, errors = validate_items(items, ResourceCreate, check=_check_resource)
+    results = bulk_insert(Resource, [(index, item.dict()) for index, item in valid], db)
+    created = [result.id for result in results if result.id]
+    cache.invalidate("resource", *created)
+    sync_resources(created, db)
+    events.publish_ids("resource", "created", created)
+    return summarize(errors + results)
+
+
+def bulk_update_resources(items: list, db: Session) -> BulkResult:
+    """Updates many resources by id with batched updates.
+
+    Args:
+        items: Raw resource payloads with an "id", validated against ResourceBulkUpdate.
+        db: The database session.
+
+    Returns:
+        The per-item outcome; unknown ids are reported as errors.
+    """
+    valid, errors = validate_items(items, ResourceBulkUpdate)
+    results = bulk_update(Resource, [(index, item.dict(exclude_unset=True)) for index, item in valid], db)
+    updated = [result.id for result in results if not result.error]
+    telemetry.buffer.discard(*updated)
+    cache.invalidate("resource", *updated)
+    sync_resources(updated, db)
+    events.publish_ids("resource", "updated", updated)
+    return summarize(errors + results)
+
+
+def get_resources(
+    db: Session,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    fields: Optional[list[str]] = None,
+) -> Page:
+    """Retrieves one page of resources matching the given filters.
 
     Args:
         db: The database session.
+        status: Only return resources with this status.
+        type: Only return resources of this type.
+        location: Only return resources at this exact location.
+        created_after: Only return resources created at or after this time.
+        created_before: Only return resources created before this time.
+        limit: Maximum number of resources to return.
+        cursor: Cursor from the previous page.
+        order_by: Keyset sort key, "id" or "created_at".
+        fields: Only select these columns; items are then dicts.
 
     Returns:
-        A list of all resources.
+        A page of resources and the cursor for the next page.
 
     Raises:
         SQLAlchemyError: If a database error occurs.
+        ValueError: If a field, cursor or paging argument is invalid.
     """
+    fields = resolve_fields(fields, RESOURCE_FIELDS)
+    query = db.query(*projection_columns(fields, RESOURCE_FIELDS, order_by)) if fields else db.query(Resource)
+    query = _filter_resources(query, status, type, location, created_after, created_before)
     try:
-        return db.query(Resource).all()
+        return paginate(query, Resource, limit=limit, cursor=cursor, order_by=order_by, fields=fields)
     except SQLAlchemyError as e:
         raise SQLAlchemyError(f"Database error retrieving resources: {e}") from e
 
 
+def export_resources_statement(
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Select:
+    """Builds the statement that streams every matching resource for export.
+
+    Args:
+        status: Only export resources with this status.
+        type: Only export resources of this type.
+        location: Only export resources at this exact location.
+        created_after: Only export resources created at or after this time.
+        created_before: Only export resources created before this time.
+
+    Returns:
+        A select of all resource fields, ordered by id.
+    """
+    statement = select(*(column.label(name) for name, column in RESOURCE_FIELDS.items()))
+    return _filter_resources(statement, status, type, location, created_after, created_before).order_by(Resource.id)
+
+
+def _filter_resources(query, status, type, location, created_after, created_before):
+    if status is not None:
+        query = query.filter(Resource.status == status)
+    if type is not None:
+        query = query.filter(Resource.type == type)
+    if location is not None:
+        query = query.filter(Resource.location == location)
+    if created_after is not None:
+        query = query.filter(Resource.created_at >= created_after)
+    if created_before is not None:
+        query = query.filter(Resource.created_at < created_before)
+    return query
+
+
+def get_nearest_resources(
+    db: Session,
+    incident_id: Optional[int] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    type: Optional[str] = None,
+    k: int = 5,
+) -> Optional[list[tuple[Resource, float]]]:
+    """Finds the k available resources closest to an incident or a point.
+
+    Args:
+        db: The database session.
+        incident_id: Search around this incident's coordinates.
+        latitude: Search around this latitude when no incident is given.
+        longitude: Search around this longitude when no incident is given.
+        type: Only consider resources of this type.
+        k: Number of resources to return.
+
+    Returns:
+        (resource, distance in km) pairs, closest first, or None if the
+        incident does not exist.
+
+    Raises:
+        ValueError: If no search point can be determined.
+    """
+    if incident_id is not None:
+        incident = db.get(Incident, incident_id)
+        if incident is None:
+            return None
+        latitude, longitude = incident.latitude, incident.longitude
+        if latitude is None or longitude is None:
+            raise ValueError("Incident has no coordinates")
+    elif latitude is None or longitude is None:
+        raise ValueError("Either incident_id or latitude and longitude are required")
+
+    # The index may lag behind writes made by other processes, so its
+    # candidates are checked against the rows, with unwritten telemetry
+    # applied, and more are asked for until k of them hold up.
+    want = 2 * k
+    while True:
+        matches = resource_index.nearest(latitude, longitude, k=want, type=type)
+        rows = {row.id: row for row in db.query(Resource).filter(Resource.id.in_([rid for rid, _ in matches]))}
+        results: list[tuple[Resource, float]] = []
+        stale: list[int] = []
+        for resource_id, _ in matches:
+            row = rows.get(resource_id)
+            stored = {"id": resource_id, **({name: getattr(row, name) for name in PING_FIELDS} if row else {})}
+            current = telemetry.buffer.overlay(stored)
+            if (
+                row is None
+                or current["status"] != "available"
+                or current["latitude"] is None
+                or current["longitude"] is None
+                or (type is not None and row.type != type)
+            ):
+                if current is stored:
+                    stale.append(resource_id)
+                continue
+            results.append((row, haversine_km(latitude, longitude, current["latitude"], current["longitude"])))
+        if len(results) >= k or len(matches) < want:
+            break
+        want *= 4
+    if stale:
+        sync_resources(stale, db)
+    results.sort(key=lambda pair: pair[1])
+    return results[:k]
+
+
 def get_resource_by_id(resource_id: int, db: Session) -> Optional[Resource]:
     """Retrieves a resource by ID.
 
@@ -73,27 +280,61 @@ def get_resource_by_id(resource_id: int, db: Session) -> Optional[Resource]:
         raise SQLAlchemyError(f"Database error retrieving resource: {e}") from e
 
 
-def update_resource(resource_id: int, resource: ResourceUpdate, db: Session) -> Optional[Resource]:
+def update_resource(
+    resource_id: int,
+    resource: ResourceUpdate,
+    db: Session,
+    if_match: Optional[list[str]] = None,
+    if_version: Optional[int] = None,
+) -> Optional[Resource]:
     """Updates a resource.
 
     Args:
         resource_id: The ID of the resource to update.
         resource: The updated resource data.
         db: The database session.
+        if_match: When given, the update only applies if the resource's
+            current ETag is one of these.
+        if_version: When given, the update only applies if the resource's
+            latest change-log version is this one.
 
     Returns:
         The updated resource if found, otherwise None.
 
     Raises:
         SQLAlchemyError: If a database error occurs.
+        PreconditionFailed: If the resource changed since the caller read it.
     """
     try:
-        db_resource = db.query(Resource).filter(Resource.id == resource_id).first()
+        query = db.query(Resource).filter(Resource.id == resource_id)
+        locked = if_match is not None or if_version is not None
+        db_resource = (query.with_for_update() if locked else query).first()
         if db_resource:
-            updates = resource.dict(exclude_unset=True)
-            db.query(Resource).filter(Resource.id == resource_id).update(updates)
+            if if_match is not None and entity_etag(db_resource.id, db_resource.version) not in if_match:
+                db.rollback()
+                raise PreconditionFailed("Resource was modified since it was read")
+            if if_version is not None and current_version("resource", resource_id, db) != if_version:
+                db.rollback()
+                raise PreconditionFailed(f"Resource was modified since version {if_version}")
+            statement = update(Resource).where(Resource.id == resource_id)
+            if locked:
+                # The row lock does nothing on SQLite; checking the version in
+                # the UPDATE itself is what keeps a concurrent write from being lost.
+                statement = statement.where(Resource.version == db_resource.version)
+            written = db.execute(
+                statement.values(**resource.dict(exclude_unset=True), version=Resource.version + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not written:
+                db.rollback()
+                raise PreconditionFailed("Resource was modified since it was read")
             db.commit()
-            return db.query(Resource).get(resource_id)
+            db.refresh(db_resource)
+            telemetry.buffer.discard(resource_id)
+            cache.invalidate("resource", resource_id)
+            _index_resource(db_resource)
+            events.publish_model("resource", "updated", schemas.Resource, db_resource)
+            return db_resource
         else:
             return None
     except SQLAlchemyError as e:
@@ -101,22 +342,33 @@ def update_resource(resource_id: int, resource: ResourceUpdate, db: Session) ->
         raise SQLAlchemyError(f"Database error updating resource: {e}") from e
 
 
-def delete_resource(resource_id: int, db: Session) -> None:
-    """Deletes a resource.
+def delete_resource(resource_id: int, db: Session, if_version: Optional[int] = None) -> None:
+    """Deletes a resource and its assignments, ending any active one.
 
     Args:
         resource_id: The ID of the resource to delete.
         db: The database session.
+        if_version: When given, the resource is only deleted if its latest
+            change-log version is this one.
 
     Raises:
         SQLAlchemyError: If a database error occurs.
     """
     try:
-        db_resource = db.query(Resource).filter(Resource.id == resource_id).first()
+        query = db.query(Resource).filter(Resource.id == resource_id)
+        db_resource = (query.with_for_update() if if_version is not None else query).first()
         if db_resource:
+            if if_version is not None and current_version("resource", resource_id, db) != if_version:
+                db.rollback()
+                raise PreconditionFailed(f"Resource was modified since version {if_version}")
+            assignment_ids = allocation_service.delete_assignments(Assignment.resource_id == resource_id, db)
             db.delete(db_resource)
             db.commit()
+            events.publish_ids("assignment", "deleted", assignment_ids)
+            telemetry.buffer.discard(resource_id)
+            cache.invalidate("resource", resource_id)
+            resource_index.remove(resource_id)
+            events.hub.publish("resource", "deleted", resource_id)
     except SQLAlchemyError as e:
         db.rollback()
         raise SQLAlchemyError(f"Database error deleting resource: {e}") from e
-```
\ No newline at end of file
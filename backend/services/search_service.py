@@ -0,0 +1,198 @@
+import html
+import os
+import re
+from typing import Any, Optional
+
+from sqlalchemy import Engine, and_, column, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+
+import schemas
+import serialization
+from models import Communication, Incident
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page, decode_cursor, encode_cursor
+
+SEARCH_LANGUAGE = os.getenv('SEARCH_LANGUAGE', 'english')  # PostgreSQL text search configuration
+SEARCH_SNIPPET_TOKENS = int(os.getenv('SEARCH_SNIPPET_TOKENS', '12'))
+SEARCH_MIN_PREFIX = int(os.getenv('SEARCH_MIN_PREFIX', '3'))
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+# The database brackets matches with these private-use characters; the
+# snippet is HTML-escaped before they become the highlight tags, so markup
+# in user-entered text is never passed through.
+_MATCH_START = '\ue000'
+_MATCH_END = '\ue001'
+
+# Searchable text per entity: (model, table name, indexed columns, snippet source).
+# PostgreSQL headlines one column, so the snippet source is the longest text.
+SEARCHABLE = {
+    "incident": (Incident, "incidents", ("title", "description"), "description"),
+    "communication": (Communication, "communications", ("communication_text",), "communication_text"),
+}
+
+_TERM = re.compile(r'\w+\*?', re.UNICODE)
+
+
+def _sqlite_ddl(table_name: str, columns: tuple[str, ...]) -> list[str]:
+    fts = f"{table_name}_fts"
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{name}" for name in columns)
+    old_values = ", ".join(f"old.{name}" for name in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table_name}', content_rowid='id', "
+        "tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table_name} BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _postgresql_ddl(table_name: str, columns: tuple[str, ...]) -> list[str]:
+    document = " || ' ' || ".join(f"coalesce({name}, '')" for name in columns)
+    return [
+        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_LANGUAGE}', {document})) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_search_vector ON {table_name} USING GIN (search_vector)",
+    ]
+
+
+def create_search_index(engine: Engine) -> None:
+    """Creates the full-text index for every searchable table if it is missing.
+
+    On SQLite this is an external-content FTS5 table per entity, kept in step
+    with its base table by triggers, so every insert, update and delete path
+    (single, bulk or raw SQL) updates the index in the same transaction.
+    Existing rows are indexed when the FTS table is created, and again if a
+    trigger went missing, as it does when the base table is rebuilt. On
+    PostgreSQL it is a generated ``tsvector`` column with a GIN index.
+    Other databases get no index and search raises ``ValueError``.
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        for _, table_name, columns, _ in SEARCHABLE.values():
+            if dialect == "sqlite":
+                fts = f"{table_name}_fts"
+                found = conn.execute(
+                    text("SELECT count(*) FROM sqlite_master WHERE name IN (:fts, :ai, :ad, :au)"),
+                    {"fts": fts, "ai": f"{fts}_ai", "ad": f"{fts}_ad", "au": f"{fts}_au"},
+                ).scalar()
+                statements = [] if found == 4 else _sqlite_ddl(table_name, columns)
+            elif dialect == "postgresql":
+                statements = _postgresql_ddl(table_name, columns)
+            else:
+                statements = []
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+
+
+def fts5_query(q: str) -> str:
+    """Turns free text into an FTS5 query matching every term.
+
+    Each word is quoted so punctuation and FTS5 operators in user input are
+    taken literally; a trailing ``*`` keeps its prefix-match meaning on words
+    of at least ``SEARCH_MIN_PREFIX`` characters.
+
+    Raises:
+        ValueError: If the text contains no searchable terms.
+    """
+    terms = []
+    for term in _TERM.findall(q):
+        word, star = (term[:-1], "*") if term.endswith("*") else (term, "")
+        if len(word) < SEARCH_MIN_PREFIX:
+            # Very short prefixes match most of the vocabulary and rank the whole table.
+            star = ""
+        terms.append(f'"{word}"{star}')
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return " ".join(terms)
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escapes a snippet and wraps its matches in ``<mark>`` tags."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+
+def _ranked_statement(entity: str, q: str, dialect: str):
+    model, table_name, columns, snippet_column = SEARCHABLE[entity]
+    if dialect == "sqlite":
+        fts = table(f"{table_name}_fts", column("rowid"))
+        fts_ref = literal_column(f"{table_name}_fts")
+        # bm25 is lower-is-better; negate it so both dialects sort by score descending.
+        score = (-func.bm25(fts_ref)).label("score")
+        snippet = func.snippet(
+            fts_ref, -1, _MATCH_START, _MATCH_END, "…", SEARCH_SNIPPET_TOKENS
+        ).label("snippet")
+        statement = (
+            select(model, score, snippet)
+            .join(fts, fts.c.rowid == model.id)
+            .where(fts_ref.op("MATCH")(fts5_query(q)))
+        )
+        return statement, score
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(SEARCH_LANGUAGE, q)
+        vector = literal_column(f"{table_name}.search_vector")
+        score = func.ts_rank(vector, query).label("score")
+        snippet = func.ts_headline(
+            SEARCH_LANGUAGE,
+            getattr(model, snippet_column),
+            query,
+            f"StartSel={_MATCH_START}, StopSel={_MATCH_END}, MaxWords={SEARCH_SNIPPET_TOKENS * 2}, "
+            f"MinWords={SEARCH_SNIPPET_TOKENS}",
+        ).label("snippet")
+        return select(model, score, snippet).where(vector.op("@@")(query)), score
+    raise ValueError(f"Full-text search is not supported on {dialect}")
+
+
+def search(
+    entity: str,
+    q: str,
+    db: Session,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Page:
+    """Full-text search over incidents or communications, best match first.
+
+    Args:
+        entity: "incident" or "communication".
+        q: Free text; every word must match.
+        db: The database session.
+        limit: Maximum number of results to return.
+        cursor: Cursor from the previous page.
+
+    Returns:
+        A page of dicts in the entity's API shape plus ``score`` and a
+        ``snippet``: HTML-escaped text with the matches wrapped in
+        ``<mark>`` tags, safe to render as HTML.
+
+    Raises:
+        ValueError: If the query, cursor or limit is invalid, or the database
+            has no full-text support.
+    """
+    limit = DEFAULT_PAGE_SIZE if limit is None else limit
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    model = SEARCHABLE[entity][0]
+    statement, score = _ranked_statement(entity, q, db.get_bind().dialect.name)
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, "score")
+        statement = statement.where(
+            or_(score < last_score, and_(score == last_score, model.id > last_id))
+        )
+    rows = db.execute(statement.order_by(score.desc(), model.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1][0].id)
+    schema = schemas.Incident if entity == "incident" else schemas.Communication
+    items: list[dict[str, Any]] = [
+        {**serialization.to_dict(schema, row[0]), "score": row.score, "snippet": highlight(row.snippet)}
+        for row in rows
+    ]
+    return Page(items=items, next_cursor=next_cursor)
@@ -0,0 +1,239 @@
+import heapq
+import math
+import os
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Resource
+
+SPATIAL_CELL_DEGREES = float(os.getenv('SPATIAL_CELL_DEGREES', '0.05'))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON_EQUATOR = 111.320
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class _Grid:
+    """Bucket grid for one resource type."""
+
+    def __init__(self) -> None:
+        self.cells: dict[tuple[int, int], set[int]] = defaultdict(set)
+        self.count = 0
+        # Occupied-cell extent; only grows, which keeps the search bound safe.
+        self.min_x = self.min_y = math.inf
+        self.max_x = self.max_y = -math.inf
+
+    def add(self, cell: tuple[int, int], resource_id: int) -> None:
+        self.cells[cell].add(resource_id)
+        self.count += 1
+        self.min_x, self.max_x = min(self.min_x, cell[0]), max(self.max_x, cell[0])
+        self.min_y, self.max_y = min(self.min_y, cell[1]), max(self.max_y, cell[1])
+
+    def discard(self, cell: tuple[int, int], resource_id: int) -> None:
+        bucket = self.cells.get(cell)
+        if bucket and resource_id in bucket:
+            bucket.remove(resource_id)
+            self.count -= 1
+            if not bucket:
+                del self.cells[cell]
+
+
+class GridIndex:
+    """In-memory grid index of *available* resources with coordinates.
+
+    Resources are bucketed into ``cell_degrees`` square cells, once per type
+    and once in an all-types grid. A k-nearest query scans rings of cells
+    outwards from the query point and stops as soon as no unscanned cell can
+    hold a closer resource, so its cost depends on local density rather than
+    on the total number of resources.
+
+    The index is per process: it is rebuilt from the database at startup and
+    kept in sync by the resource write services.
+    """
+
+    def __init__(self, cell_degrees: float = SPATIAL_CELL_DEGREES) -> None:
+        self.cell_degrees = cell_degrees
+        self._lock = threading.RLock()
+        self._points: dict[int, tuple[float, float, str]] = {}
+        self._grids: dict[Optional[str], _Grid] = defaultdict(_Grid)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def upsert(
+        self,
+        resource_id: int,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        type: str,
+        status: Optional[str],
+    ) -> None:
+        """Indexes a resource, or drops it if it is unavailable or unlocated."""
+        with self._lock:
+            self._remove(resource_id)
+            if status == "available" and latitude is not None and longitude is not None:
+                cell = self._cell(latitude, longitude)
+                self._points[resource_id] = (latitude, longitude, type)
+                self._grids[type].add(cell, resource_id)
+                self._grids[None].add(cell, resource_id)
+
+    def remove(self, resource_id: int) -> None:
+        with self._lock:
+            self._remove(resource_id)
+
+    def move(
+        self,
+        resource_id: int,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        status: Optional[str] = None,
+    ) -> None:
+        """Applies a partial position or status change to an indexed resource.
+
+        Resources not in the index are left alone: their type, and whether
+        they are available, is only known once the change is synced from the
+        database.
+        """
+        with self._lock:
+            point = self._points.get(resource_id)
+            if point is None:
+                return
+            self.upsert(
+                resource_id,
+                point[0] if latitude is None else latitude,
+                point[1] if longitude is None else longitude,
+                point[2],
+                status or "available",
+            )
+
+    def _remove(self, resource_id: int) -> None:
+        point = self._points.pop(resource_id, None)
+        if point is not None:
+            latitude, longitude, type = point
+            cell = self._cell(latitude, longitude)
+            self._grids[type].discard(cell, resource_id)
+            self._grids[None].discard(cell, resource_id)
+
+    def rebuild(self, rows: Iterable[tuple[int, Optional[float], Optional[float], str, Optional[str]]]) -> None:
+        """Replaces the index contents with (id, latitude, longitude, type, status) rows."""
+        with self._lock:
+            self._points.clear()
+            self._grids.clear()
+            for row in rows:
+                self.upsert(*row)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 5,
+        type: Optional[str] = None,
+    ) -> list[tuple[int, float]]:
+        """Finds the k closest available resources.
+
+        Args:
+            latitude: Query latitude in degrees.
+            longitude: Query longitude in degrees.
+            k: Number of resources to return.
+            type: Only consider resources of this type.
+
+        Returns:
+            (resource id, distance in km) pairs, closest first.
+        """
+        with self._lock:
+            grid = self._grids.get(type)
+            if grid is None or grid.count == 0 or k < 1:
+                return []
+            cx, cy = self._cell(latitude, longitude)
+            max_ring = max(cx - grid.min_x, grid.max_x - cx, cy - grid.min_y, grid.max_y - cy, 0)
+            best: list[tuple[float, int]] = []  # max-heap of (-distance, id)
+            scanned = 0
+            ring = 0
+            while ring <= max_ring:
+                for cell in self._ring_cells(cx, cy, ring):
+                    scanned += 1
+                    for resource_id in grid.cells.get(cell, ()):
+                        self._offer(best, k, resource_id, latitude, longitude)
+                if len(best) == k and -best[0][0] <= self._ring_bound_km(latitude, ring):
+                    break
+                if scanned > grid.count:
+                    # Sparse grid far from the query: a linear pass is cheaper than more rings.
+                    best = []
+                    for cell_ids in grid.cells.values():
+                        for resource_id in cell_ids:
+                            self._offer(best, k, resource_id, latitude, longitude)
+                    break
+                ring += 1
+            return [(resource_id, -negative) for negative, resource_id in sorted(best, reverse=True)]
+
+    def _offer(self, best: list[tuple[float, int]], k: int, resource_id: int, latitude: float, longitude: float) -> None:
+        point_lat, point_lon, _ = self._points[resource_id]
+        distance = haversine_km(latitude, longitude, point_lat, point_lon)
+        if len(best) < k:
+            heapq.heappush(best, (-distance, resource_id))
+        elif distance < -best[0][0]:
+            heapq.heapreplace(best, (-distance, resource_id))
+
+    def _ring_bound_km(self, latitude: float, ring: int) -> float:
+        # Anything outside rings 0..ring is at least `ring` whole cells away.
+        # Longitude degrees shrink towards the poles, so use the widest latitude reached.
+        far_latitude = min(89.9, abs(latitude) + (ring + 1) * self.cell_degrees)
+        km_per_degree = min(KM_PER_DEGREE_LAT, KM_PER_DEGREE_LON_EQUATOR * math.cos(math.radians(far_latitude)))
+        return ring * self.cell_degrees * km_per_degree
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int) -> Iterable[tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+resource_index = GridIndex()
+
+
+def rebuild_resource_index(db: Session) -> None:
+    """Loads every resource's location and status into ``resource_index``."""
+    rows = db.execute(
+        select(Resource.id, Resource.latitude, Resource.longitude, Resource.type, Resource.status)
+        .where(Resource.status == "available", Resource.latitude.is_not(None), Resource.longitude.is_not(None))
+    )
+    resource_index.rebuild(tuple(row) for row in rows)
+
+
+def sync_resources(resource_ids: list[int], db: Session) -> None:
+    """Re-reads the given resources and updates their index entries."""
+    if not resource_ids:
+        return
+    rows = db.execute(
+        select(Resource.id, Resource.latitude, Resource.longitude, Resource.type, Resource.status)
+        .where(Resource.id.in_(resource_ids))
+    ).all()
+    seen = set()
+    for row in rows:
+        resource_index.upsert(*row)
+        seen.add(row.id)
+    for resource_id in resource_ids:
+        if resource_id not in seen:
+            resource_index.remove(resource_id)
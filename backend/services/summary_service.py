@@ -0,0 +1,150 @@
+from collections import defaultdict
+from typing import Any, Iterable
+
+from sqlalchemy import Engine, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from models import Incident, Resource, SummaryCount
+
+# Counted entities: (model, table name, first and second grouping column).
+COUNTED = {
+    "incident": (Incident, "incidents", "status", "location"),
+    "resource": (Resource, "resources", "type", "status"),
+}
+
+
+def _sqlite_ddl(entity: str, table_name: str, first: str, second: str) -> list[str]:
+    def increment(row: str) -> str:
+        return (
+            f"INSERT INTO summary_counts(entity, key1, key2, count) "
+            f"VALUES ('{entity}', coalesce({row}.{first}, ''), coalesce({row}.{second}, ''), 1) "
+            f"ON CONFLICT(entity, key1, key2) DO UPDATE SET count = count + 1;"
+        )
+
+    def decrement(row: str) -> str:
+        return (
+            f"UPDATE summary_counts SET count = count - 1 WHERE entity = '{entity}' "
+            f"AND key1 = coalesce({row}.{first}, '') AND key2 = coalesce({row}.{second}, '');"
+        )
+
+    changed = f"old.{first} IS NOT new.{first} OR old.{second} IS NOT new.{second}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS summary_{table_name}_ai AFTER INSERT ON {table_name} "
+        f"BEGIN {increment('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS summary_{table_name}_ad AFTER DELETE ON {table_name} "
+        f"BEGIN {decrement('old')} END",
+        f"CREATE TRIGGER IF NOT EXISTS summary_{table_name}_au AFTER UPDATE OF {first}, {second} ON {table_name} "
+        f"WHEN {changed} BEGIN {decrement('old')} {increment('new')} END",
+    ]
+
+
+def _postgresql_ddl(entity: str, table_name: str, first: str, second: str) -> list[str]:
+    function = f"summary_{table_name}"
+    changed = f"OLD.{first} IS DISTINCT FROM NEW.{first} OR OLD.{second} IS DISTINCT FROM NEW.{second}"
+    return [
+        # Writers wait while the triggers are replaced and the counts rebuilt.
+        f"LOCK TABLE {table_name} IN SHARE ROW EXCLUSIVE MODE",
+        f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        f"IF TG_OP <> 'INSERT' THEN "
+        f"UPDATE summary_counts SET count = count - 1 WHERE entity = '{entity}' "
+        f"AND key1 = coalesce(OLD.{first}, '') AND key2 = coalesce(OLD.{second}, ''); "
+        f"END IF; "
+        f"IF TG_OP <> 'DELETE' THEN "
+        f"INSERT INTO summary_counts (entity, key1, key2, count) "
+        f"VALUES ('{entity}', coalesce(NEW.{first}, ''), coalesce(NEW.{second}, ''), 1) "
+        f"ON CONFLICT (entity, key1, key2) DO UPDATE SET count = summary_counts.count + 1; "
+        f"END IF; "
+        f"RETURN NULL; END $$",
+        f"DROP TRIGGER IF EXISTS {function}_insert_delete ON {table_name}",
+        f"CREATE TRIGGER {function}_insert_delete AFTER INSERT OR DELETE ON {table_name} "
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()",
+        f"DROP TRIGGER IF EXISTS {function}_update ON {table_name}",
+        f"CREATE TRIGGER {function}_update AFTER UPDATE OF {first}, {second} ON {table_name} "
+        f"FOR EACH ROW WHEN ({changed}) EXECUTE FUNCTION {function}()",
+    ]
+
+
+def _grouped(entity: str):
+    model, _, first, second = COUNTED[entity]
+    first_key = func.coalesce(getattr(model, first), "")
+    second_key = func.coalesce(getattr(model, second), "")
+    return select(literal(entity), first_key, second_key, func.count()).group_by(first_key, second_key)
+
+
+def create_summary_counters(engine: Engine) -> None:
+    """Installs the counter triggers and rebuilds ``summary_counts`` with GROUP BY.
+
+    Triggers on each counted table adjust the matching counter row in the
+    same transaction as every insert, delete and grouping-column update,
+    whichever path (single, bulk, telemetry, allocation or raw SQL) made
+    it. The rebuild at each startup counts rows written before the
+    triggers existed and clears counters that dropped to zero. Other
+    databases get no triggers; ``get_summary`` then groups the base tables
+    on every call.
+    """
+    dialect = engine.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    with engine.begin() as conn:
+        for entity, (_, table_name, first, second) in COUNTED.items():
+            ddl = _sqlite_ddl if dialect == "sqlite" else _postgresql_ddl
+            for statement in ddl(entity, table_name, first, second):
+                conn.exec_driver_sql(statement)
+            conn.execute(delete(SummaryCount).where(SummaryCount.entity == entity))
+            conn.execute(
+                insert(SummaryCount).from_select(
+                    [SummaryCount.entity, SummaryCount.key1, SummaryCount.key2, SummaryCount.count],
+                    _grouped(entity),
+                )
+            )
+
+
+def _rollup(rows: Iterable[tuple[str, str, int]]) -> tuple[int, dict, dict, dict]:
+    total = 0
+    by_first: dict[str, int] = defaultdict(int)
+    by_second: dict[str, int] = defaultdict(int)
+    by_both: dict[str, dict[str, int]] = defaultdict(dict)
+    for first, second, count in sorted(rows):
+        total += count
+        by_first[first] += count
+        by_second[second] += count
+        by_both[first][second] = count
+    return total, dict(by_first), dict(sorted(by_second.items())), dict(by_both)
+
+
+def get_summary(db: Session) -> dict[str, Any]:
+    """Counts incidents by status and location, and resources by type and status.
+
+    Reads the trigger-maintained counters, so the cost depends on the number
+    of distinct groups, not on the size of the tables. Resource pings still
+    buffered by the telemetry endpoint are counted once they are written.
+
+    Args:
+        db: The database session.
+
+    Returns:
+        The summary in the shape of ``schemas.Summary``.
+    """
+    rows: dict[str, list[tuple[str, str, int]]] = {entity: [] for entity in COUNTED}
+    if db.get_bind().dialect.name in ("sqlite", "postgresql"):
+        counters = db.execute(
+            select(SummaryCount.entity, SummaryCount.key1, SummaryCount.key2, SummaryCount.count)
+            .where(SummaryCount.count > 0)
+        )
+        for entity, first, second, count in counters:
+            if entity in rows:
+                rows[entity].append((first, second, count))
+    else:
+        for entity in COUNTED:
+            rows[entity] = [(first, second, count) for _, first, second, count in db.execute(_grouped(entity))]
+
+    total, by_status, by_location, by_status_and_location = _rollup(rows["incident"])
+    incidents = {
+        "total": total,
+        "by_status": by_status,
+        "by_location": by_location,
+        "by_status_and_location": by_status_and_location,
+    }
+    total, by_type, by_status, by_type_and_status = _rollup(rows["resource"])
+    resources = {"total": total, "by_type": by_type, "by_status": by_status, "by_type_and_status": by_type_and_status}
+    return {"incidents": incidents, "resources": resources}
@@ -0,0 +1,179 @@
+import os
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import schemas
+import serialization
+from models import ChangeLog
+from schemas import SyncItemResult, SyncUpload, SyncUploadResult
+from services import communication_service, incident_service, resource_service
+from services.bulk import BULK_BATCH_SIZE, validate_items
+from services.change_log import TRACKED, changes_since
+from services.etag import PreconditionFailed
+
+# Configuration section
+SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', '500'))
+SYNC_MAX_PAGE_SIZE = int(os.getenv('SYNC_MAX_PAGE_SIZE', '5000'))
+
+# entity -> (response schema, create schema, update schema, create, update, delete).
+ENTITIES = {
+    "incident": (
+        schemas.Incident,
+        schemas.IncidentCreate,
+        schemas.IncidentUpdate,
+        incident_service.create_incident,
+        incident_service.update_incident,
+        incident_service.delete_incident,
+    ),
+    "resource": (
+        schemas.Resource,
+        schemas.ResourceCreate,
+        schemas.ResourceUpdate,
+        resource_service.create_resource,
+        resource_service.update_resource,
+        resource_service.delete_resource,
+    ),
+    "communication": (
+        schemas.Communication,
+        schemas.CommunicationCreate,
+        None,
+        communication_service.create_communication,
+        None,
+        None,
+    ),
+}
+
+
+def _check_dialect(db: Session) -> None:
+    if db.get_bind().dialect.name not in ("sqlite", "postgresql"):
+        raise ValueError("Delta sync needs SQLite or PostgreSQL")
+
+
+def _rows(entity: str, ids: list[int], db: Session) -> dict[int, Any]:
+    model = TRACKED[entity][0]
+    rows = {}
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        batch = ids[start:start + BULK_BATCH_SIZE]
+        rows.update((row.id, row) for row in db.scalars(select(model).where(model.id.in_(batch))))
+    return rows
+
+
+def _change(entry: ChangeLog, row: Any) -> dict[str, Any]:
+    data = None if entry.deleted else serialization.to_dict(ENTITIES[entry.entity][0], row)
+    return {"entity": entry.entity, "id": entry.entity_id, "version": entry.version, "deleted": entry.deleted, "data": data}
+
+
+def get_changes(since: int, db: Session, limit: Optional[int] = None) -> dict[str, Any]:
+    """Returns what changed after version ``since``, oldest first.
+
+    Each changed incident, resource or communication appears once, in its
+    current state, however often it changed; a deleted one appears as a
+    tombstone. Clients store the returned ``version`` and pass it as
+    ``since`` on their next call, so a resync reads the change log from an
+    index instead of re-reading the tables.
+
+    Args:
+        since: The last version the client has seen; 0 for a full download.
+        db: The database session.
+        limit: Maximum changes to return; defaults to ``SYNC_PAGE_SIZE``.
+
+    Returns:
+        The page in the shape of ``schemas.SyncPage``.
+
+    Raises:
+        ValueError: If the database has no change log.
+    """
+    _check_dialect(db)
+    limit = min(limit or SYNC_PAGE_SIZE, SYNC_MAX_PAGE_SIZE)
+    entries = changes_since(since, limit + 1, db)
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    rows: dict[str, dict[int, Any]] = {}
+    for entity in TRACKED:
+        ids = [entry.entity_id for entry in entries if entry.entity == entity and not entry.deleted]
+        rows[entity] = _rows(entity, ids, db) if ids else {}
+    changes = []
+    for entry in entries:
+        row = rows[entry.entity].get(entry.entity_id)
+        # Deleted after the log was read: its tombstone has a later version.
+        if entry.deleted or row is not None:
+            changes.append(_change(entry, row))
+    version = entries[-1].version if entries else since
+    return {"changes": changes, "version": version, "has_more": has_more}
+
+
+def _current(entity: str, entity_id: int, db: Session) -> Optional[dict[str, Any]]:
+    entry = db.scalar(select(ChangeLog).where(ChangeLog.entity == entity, ChangeLog.entity_id == entity_id))
+    if entry is None:
+        return None
+    row = None if entry.deleted else db.get(TRACKED[entity][0], entity_id, populate_existing=True)
+    return _change(entry, row) if entry.deleted or row is not None else None
+
+
+def _apply(index: int, item: SyncUpload, db: Session) -> SyncItemResult:
+    _, create_schema, update_schema, create, update, delete = ENTITIES[item.entity]
+    if item.id is None:
+        row = create(create_schema.parse_obj(item.data), db)
+        current = _current(item.entity, row.id, db)
+        return SyncItemResult(index=index, status="created", id=row.id, version=current and current["version"])
+    try:
+        if item.deleted:
+            delete(item.id, db, if_version=item.base_version)
+        else:
+            update(item.id, update_schema.parse_obj(item.data), db, if_version=item.base_version)
+    except PreconditionFailed as e:
+        current = _current(item.entity, item.id, db)
+        return SyncItemResult(index=index, status="conflict", id=item.id, error=str(e), current=current)
+    current = _current(item.entity, item.id, db)
+    if current is None:
+        return SyncItemResult(index=index, status="error", id=item.id, error="Not found")
+    if current["deleted"] and not item.deleted:
+        # Updated offline while someone else deleted it.
+        return SyncItemResult(
+            index=index, status="conflict", id=item.id, error="Deleted on the server", current=current
+        )
+    status = "deleted" if item.deleted else "updated"
+    return SyncItemResult(index=index, status=status, id=item.id, version=current["version"])
+
+
+def apply_changes(raw_items: list[Any], db: Session) -> SyncUploadResult:
+    """Applies changes made offline, in order, detecting conflicts.
+
+    Creates omit ``id``. Updates and deletes carry the ``base_version`` the
+    client last synced for that entity and only apply if nothing changed it
+    since; otherwise the item is a conflict and ``current`` holds the
+    server's state for the client to merge and resend. Deleting something
+    already deleted succeeds. Each item commits on its own, so one conflict
+    or error does not hold back the rest.
+
+    Args:
+        raw_items: Raw ``SyncUpload`` payloads.
+        db: The database session.
+
+    Returns:
+        The per-item outcome, with each applied change's new version.
+
+    Raises:
+        ValueError: If the database has no change log.
+    """
+    _check_dialect(db)
+    valid, errors = validate_items(raw_items, SyncUpload)
+    results = [SyncItemResult(index=error.index, status="error", error=error.error) for error in errors]
+    for index, item in valid:
+        try:
+            results.append(_apply(index, item, db))
+        except ValueError as e:
+            results.append(SyncItemResult(index=index, status="error", id=item.id, error=str(e)))
+        except SQLAlchemyError as e:
+            db.rollback()
+            results.append(
+                SyncItemResult(index=index, status="error", id=item.id, error=f"Database error: {e.__class__.__name__}")
+            )
+    items = sorted(results, key=lambda result: result.index)
+    applied = sum(1 for item in items if item.status in ("created", "updated", "deleted"))
+    conflicts = sum(1 for item in items if item.status == "conflict")
+    return SyncUploadResult(applied=applied, conflicts=conflicts, failed=len(items) - applied - conflicts, items=items)
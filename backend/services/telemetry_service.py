@@ -0,0 +1,74 @@
+import datetime
+from typing import Any
+
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.orm import Session
+
+import cache
+import events
+from models import Resource
+from services.bulk import BULK_BATCH_SIZE
+from services.spatial_index import sync_resources
+
+# Resource fields a telemetry ping may report.
+PING_FIELDS = ("status", "location", "latitude", "longitude")
+
+
+def utcnow() -> datetime.datetime:
+    # Naive UTC at whole seconds, like models.utc_now() on updated_at.
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def apply_pings(pings: dict[int, dict[str, Any]], db: Session) -> list[int]:
+    """Writes buffered telemetry to the resources table in one transaction.
+
+    Each ping holds the reported fields plus ``updated_at``, the time it was
+    received. A ping is skipped when its resource no longer exists or was
+    written at or after the second the ping arrived (e.g. by
+    ``PUT /api/resources/{id}``). The check is part of each UPDATE, so an
+    edit committed while the batch is being written still wins over older
+    telemetry.
+
+    Args:
+        pings: Resource id -> fields to set, including "updated_at".
+        db: The database session.
+
+    Returns:
+        The ids of the resources that were updated.
+    """
+    ids = sorted(pings)
+    current: dict[int, Any] = {}
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        chunk = ids[start:start + BULK_BATCH_SIZE]
+        current.update(db.execute(select(Resource.id, Resource.updated_at).where(Resource.id.in_(chunk))).all())
+    # Rows reporting the same fields share one executemany UPDATE.
+    groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+    for resource_id in ids:
+        ping = pings[resource_id]
+        if resource_id not in current or (current[resource_id] is not None and current[resource_id] >= ping["updated_at"]):
+            continue
+        fields = tuple(name for name in PING_FIELDS if name in ping)
+        groups.setdefault(fields, []).append(
+            {"b_id": resource_id, "b_received_at": ping["updated_at"], **{f"b_{name}": ping[name] for name in fields}}
+        )
+    if not groups:
+        db.rollback()
+        return []
+    table = Resource.__table__
+    received_at = bindparam("b_received_at", type_=table.c.updated_at.type)
+    for fields, rows in groups.items():
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), or_(table.c.updated_at.is_(None), table.c.updated_at < received_at))
+            .values(
+                {**{name: bindparam(f"b_{name}") for name in fields}, "updated_at": received_at, "version": table.c.version + 1}
+            ),
+            rows,
+        )
+    db.commit()
+    # A row an edit got to first is still reported; refreshing it is harmless.
+    updated = sorted(row["b_id"] for rows in groups.values() for row in rows)
+    cache.invalidate("resource", *updated)
+    sync_resources(updated, db)
+    events.publish_ids("resource", "updated", updated)
+    return updated
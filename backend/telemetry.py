@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from database import PrimarySessionLocal
+from services import telemetry_service
+from services.spatial_index import resource_index
+from services.telemetry_service import PING_FIELDS
+
+# Configuration section
+TELEMETRY_FLUSH_SECONDS = float(os.getenv('TELEMETRY_FLUSH_SECONDS', '1'))
+TELEMETRY_FLUSH_SIZE = int(os.getenv('TELEMETRY_FLUSH_SIZE', '1000'))  # resources pending before an early flush
+TELEMETRY_MAX_PENDING = int(os.getenv('TELEMETRY_MAX_PENDING', '50000'))
+
+logger = logging.getLogger(__name__)
+
+
+class TelemetryBacklogFull(Exception):
+    """Raised when pings arrive faster than they can be written."""
+
+
+class TelemetryBuffer:
+    """Coalesces resource status and location pings in memory.
+
+    Pings are merged per resource, the latest value of each field winning,
+    and a background thread writes everything pending in one transaction
+    every ``flush_seconds``, or sooner once ``flush_size`` resources are
+    waiting. Until a ping is committed, ``overlay`` lays it over what the
+    database or cache returned, and the spatial index is moved straight
+    away, so readers in this process always see the freshest position. The
+    buffer is per process; other processes see a ping once it is flushed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = PrimarySessionLocal,
+        flush_seconds: float = TELEMETRY_FLUSH_SECONDS,
+        flush_size: int = TELEMETRY_FLUSH_SIZE,
+        max_pending: int = TELEMETRY_MAX_PENDING,
+    ) -> None:
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[int, dict[str, Any]] = {}
+        # The batch being written; still overlaid until it is committed.
+        self._flushing: dict[int, dict[str, Any]] = {}
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.counts = {"received": 0, "flushes": 0, "written": 0, "skipped": 0, "errors": 0}
+
+    def record(self, pings: Iterable[dict[str, Any]]) -> int:
+        """Buffers pings, each a resource "id" plus the fields it reports.
+
+        Returns:
+            The number of resources with unwritten telemetry.
+
+        Raises:
+            TelemetryBacklogFull: If ``max_pending`` resources are already waiting.
+        """
+        pings = list(pings)
+        received_at = telemetry_service.utcnow()
+        with self._lock:
+            new = {ping["id"] for ping in pings} - self._pending.keys()
+            if new and len(self._pending) + len(new) > self.max_pending:
+                raise TelemetryBacklogFull("Telemetry backlog is full; retry shortly")
+            for ping in pings:
+                entry = self._pending.setdefault(ping["id"], {})
+                entry.update({name: ping[name] for name in PING_FIELDS if name in ping})
+                entry["updated_at"] = received_at
+                self.counts["received"] += 1
+            pending = len(self._pending)
+        for ping in pings:
+            resource_index.move(ping["id"], ping.get("latitude"), ping.get("longitude"), ping.get("status"))
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return pending
+
+    def overlay(self, item: Optional[dict[str, Any]]) -> Optional[dict[str, Any]]:
+        """Returns a resource's API dict with its unwritten telemetry applied.
+
+        Projected dicts only receive the fields they already hold. The item
+        itself is never modified, since it may be shared by the cache.
+        """
+        if item is None or "id" not in item:
+            return item
+        with self._lock:
+            flushing = self._flushing.get(item["id"])
+            pending = self._pending.get(item["id"])
+        if flushing is None and pending is None:
+            return item
+        fields = {**(flushing or {}), **(pending or {})}
+        # Only the reported fields: updated_at and version stay those of the
+        # stored row, so the ETag matches what a conditional PUT checks.
+        return {**item, **{name: fields[name] for name in PING_FIELDS if name in fields and name in item}}
+
+    def has_pending(self, *resource_ids: int) -> bool:
+        """Whether any of these resources has telemetry not yet committed.
+
+        Their overlaid fields change without the row version, so responses
+        holding them must not be answered with a 304 on the version alone.
+        """
+        with self._lock:
+            return any(rid in self._pending or rid in self._flushing for rid in resource_ids)
+
+    def overlay_all(self, items: list[Any]) -> list[Any]:
+        if not self._pending and not self._flushing:
+            return items
+        return [self.overlay(item) for item in items]
+
+    def discard(self, *resource_ids: int) -> None:
+        """Drops unwritten telemetry, e.g. because the resource was edited or deleted.
+
+        Pings already in the batch being written stop being overlaid; the
+        write itself skips rows edited after the pings arrived.
+        """
+        with self._lock:
+            for resource_id in resource_ids:
+                self._pending.pop(resource_id, None)
+                self._flushing.pop(resource_id, None)
+
+    def flush(self) -> int:
+        """Writes everything pending. Returns the number of resources updated."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._flushing = dict(batch)
+            try:
+                with self.session_factory() as db:
+                    updated = telemetry_service.apply_pings(batch, db)
+            except Exception:
+                logger.exception("Telemetry flush of %d resources failed", len(batch))
+                with self._lock:
+                    # Retry next time, except discarded pings; pings received
+                    # meanwhile are newer and win.
+                    for resource_id, fields in self._flushing.items():
+                        self._pending[resource_id] = {**fields, **self._pending.get(resource_id, {})}
+                    self._flushing = {}
+                    self.counts["errors"] += 1
+                return 0
+            with self._lock:
+                self._flushing = {}
+                self.counts["flushes"] += 1
+                self.counts["written"] += len(updated)
+                self.counts["skipped"] += len(batch) - len(updated)
+            return len(updated)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._work, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the flusher and writes whatever is still pending."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._pending), **self.counts}
+
+
+buffer = TelemetryBuffer()
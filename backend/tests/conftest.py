@@ -0,0 +1,58 @@
+"""Shared fixtures for the API tests.
+
+The application reads its settings at import time, so they are set here,
+before any test module imports it: a throwaway SQLite database, no
+delivery workers, no background archiving, and a telemetry buffer that
+only flushes when a test asks it to. Every test shares one app and one
+database, so tests create the records they need and filter on them.
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+
+_DIRECTORY = tempfile.mkdtemp(prefix="ems-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DIRECTORY}/test.db"
+os.environ["NOTIFY_WORKERS"] = "0"
+os.environ["ARCHIVE_INTERVAL_SECONDS"] = "0"
+os.environ["TELEMETRY_FLUSH_SECONDS"] = "3600"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def tag() -> str:
+    """A value unique to the test, to filter its own records by."""
+    return uuid.uuid4().hex[:12]
+
+
+@pytest.fixture
+def make_incident(client, tag):
+    def make(**fields):
+        body = {"title": "Structure fire", "description": "Smoke seen from the roof", "location": tag, **fields}
+        response = client.post("/api/incidents", json=body)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return make
+
+
+@pytest.fixture
+def make_resource(client, tag):
+    def make(**fields):
+        body = {"type": "ambulance", "name": f"Unit {tag}", "status": "available", "location": tag,
+                "latitude": 40.7, "longitude": -74.0, **fields}
+        response = client.post("/api/resources", json=body)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return make
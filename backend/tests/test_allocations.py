@@ -0,0 +1,78 @@
+"""Resource assignments: manual and solved allocation, release and deletes."""
+from sqlalchemy import text
+
+import database
+
+
+def _foreign_key_violations() -> list:
+    with database.engine.connect() as conn:
+        return conn.execute(text("PRAGMA foreign_key_check")).all()
+
+
+def _assign(client, incident, resource):
+    return client.post("/api/allocations", json={"incident_id": incident["id"], "resource_id": resource["id"]})
+
+
+def test_assignment_deploys_and_release_frees_the_resource(client, make_incident, make_resource):
+    incident, resource = make_incident(), make_resource()
+    assignment = _assign(client, incident, resource)
+    assert assignment.status_code == 201
+    assert client.get(f"/api/resources/{resource['id']}").json()["status"] == "deployed"
+
+    released = client.delete(f"/api/allocations/{assignment.json()['id']}")
+    assert released.json()["status"] == "released"
+    assert client.get(f"/api/resources/{resource['id']}").json()["status"] == "available"
+
+
+def test_resource_cannot_be_assigned_twice(client, make_incident, make_resource):
+    resource = make_resource()
+    assert _assign(client, make_incident(), resource).status_code == 201
+    assert _assign(client, make_incident(), resource).status_code == 409
+
+
+def test_closing_an_incident_releases_its_resources(client, make_incident, make_resource):
+    incident, resource = make_incident(), make_resource()
+    _assign(client, incident, resource)
+
+    client.put(f"/api/incidents/{incident['id']}", json={**incident, "status": "closed"})
+    assert client.get(f"/api/resources/{resource['id']}").json()["status"] == "available"
+    assert client.get("/api/allocations", params={"incident_id": incident["id"]}).json() == []
+
+
+def test_solve_commits_and_skips_deployed_resources(client, make_incident, make_resource, tag):
+    # A resource type of its own keeps other tests' resources out of the run.
+    incident = make_incident(latitude=-45.0, longitude=170.0)
+    resource = make_resource(type=tag, latitude=-45.01, longitude=170.01)
+    body = {"resource_type": tag, "mode": "optimal"}
+
+    first = client.post("/api/allocations/solve", json=body).json()
+    assert first["committed"]
+    assert {"incident_id": incident["id"], "resource_id": resource["id"]}.items() <= first["assignments"][0].items()
+    second = client.post("/api/allocations/solve", json=body)
+    assert second.status_code == 200
+    assert second.json()["resources_considered"] == 0
+
+
+def test_deleting_an_incident_releases_and_removes_its_records(client, make_incident, make_resource):
+    incident, resource = make_incident(), make_resource()
+    _assign(client, incident, resource)
+    communication = client.post(
+        "/api/communications",
+        json={"incident_id": incident["id"], "message": "Evacuate", "channel": "sms", "recipients": ["+15550100"]},
+    ).json()
+
+    assert client.delete(f"/api/incidents/{incident['id']}").status_code == 204
+    assert client.get(f"/api/resources/{resource['id']}").json()["status"] == "available"
+    assert client.get("/api/allocations", params={"resource_id": resource["id"], "status": "all"}).json() == []
+    assert client.get(f"/api/communications/{communication['id']}").status_code == 404
+    assert _foreign_key_violations() == []
+    assert _assign(client, make_incident(), resource).status_code == 201
+
+
+def test_deleting_a_deployed_resource_removes_its_assignment(client, make_incident, make_resource):
+    incident, resource = make_incident(), make_resource()
+    _assign(client, incident, resource)
+
+    assert client.delete(f"/api/resources/{resource['id']}").status_code == 204
+    assert client.get("/api/allocations", params={"incident_id": incident["id"], "status": "all"}).json() == []
+    assert _foreign_key_violations() == []
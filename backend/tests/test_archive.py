@@ -0,0 +1,87 @@
+"""Archiving old closed incidents, and reading them back."""
+from datetime import datetime
+
+from sqlalchemy import create_engine, text, update
+
+import database
+from archiver import archiver
+from models import Communication, Incident
+
+LONG_AGO = datetime(2020, 1, 1)
+
+
+def _age(incident_ids: list[int]) -> None:
+    with database.engine.begin() as conn:
+        conn.execute(
+            update(Incident).where(Incident.id.in_(incident_ids)).values(created_at=LONG_AGO, updated_at=None)
+        )
+        conn.execute(
+            update(Communication)
+            .where(Communication.incident_id.in_(incident_ids))
+            .values(created_at=LONG_AGO)
+        )
+
+
+def test_old_closed_incidents_move_with_their_communications(client, make_incident, tag):
+    closed, active = make_incident(status="closed"), make_incident()
+    message = client.post(
+        "/api/communications", json={"incident_id": closed["id"], "message": "Cleared", "channel": "sms"}
+    ).json()
+    _age([closed["id"], active["id"]])
+
+    moved = archiver.run()
+    assert moved["incidents"] >= 1
+    assert [i["id"] for i in client.get("/api/incidents", params={"location": tag}).json()] == [active["id"]]
+    assert client.get(f"/api/incidents/{closed['id']}").status_code == 404
+    assert client.get(f"/api/incidents/{closed['id']}", params={"include_archived": True}).json()["title"] == closed["title"]
+    assert client.get(f"/api/communications/{message['id']}", params={"include_archived": True}).status_code == 200
+    both = client.get("/api/incidents", params={"location": tag, "include_archived": True}).json()
+    assert sorted(i["id"] for i in both) == sorted([closed["id"], active["id"]])
+
+
+def test_incident_holding_a_resource_stays(client, make_incident, make_resource):
+    incident = make_incident()
+    client.post("/api/allocations", json={"incident_id": incident["id"], "resource_id": make_resource()["id"]})
+    # Closed behind the API's back, so the assignment stays active.
+    with database.engine.begin() as conn:
+        conn.execute(update(Incident).where(Incident.id == incident["id"]).values(status="closed"))
+    _age([incident["id"]])
+
+    archiver.run()
+    assert client.get(f"/api/incidents/{incident['id']}").status_code == 200
+
+
+def test_archived_ids_are_not_reused(client, make_incident):
+    archived = make_incident(status="closed")
+    _age([archived["id"]])
+    archiver.run()
+    # Without AUTOINCREMENT, SQLite would hand out max(id) + 1 again.
+    newest = make_incident()
+    client.delete(f"/api/incidents/{newest['id']}")
+
+    assert make_incident()["id"] > newest["id"]
+
+
+def test_init_db_adds_autoincrement_to_older_tables(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE incidents (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(255) NOT NULL, "
+            "description TEXT NOT NULL, status VARCHAR(50))"
+        ))
+        conn.execute(text("INSERT INTO incidents (id, title, description) VALUES (1, 'Kept', 'Still active')"))
+        conn.execute(text(
+            "CREATE TABLE incidents_archive (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(255) NOT NULL, "
+            "description TEXT NOT NULL, status VARCHAR(50), version INTEGER NOT NULL DEFAULT 1)"
+        ))
+        conn.execute(text("INSERT INTO incidents_archive (id, title, description) VALUES (7, 'Old', 'Archived')"))
+    monkeypatch.setattr(database, "engine", engine)
+
+    database.init_db()
+    with engine.begin() as conn:
+        schema = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'incidents'")).scalar()
+        conn.execute(text("INSERT INTO incidents (title, description) VALUES ('New', 'After the rebuild')"))
+        rows = conn.execute(text("SELECT id, title FROM incidents ORDER BY id")).all()
+    engine.dispose()
+    assert "AUTOINCREMENT" in schema
+    assert [tuple(row) for row in rows] == [(1, "Kept"), (8, "New")]
@@ -0,0 +1,76 @@
+"""Read-through caching and its invalidation by writes."""
+import time
+
+from sqlalchemy import update
+
+import cache
+import database
+from cache import CacheStats, MemoryCache
+from models import Incident
+
+
+def _write_behind_the_cache(incident_id: int, **values) -> None:
+    with database.PrimarySessionLocal() as db:
+        db.execute(update(Incident).where(Incident.id == incident_id).values(**values))
+        db.commit()
+
+
+def test_entity_is_served_from_cache_until_written(client, make_incident):
+    incident = make_incident()
+    url = f"/api/incidents/{incident['id']}"
+    client.get(url)
+
+    _write_behind_the_cache(incident["id"], title="Changed behind the cache")
+    hits = cache.cache_stats.hits
+    assert client.get(url).json()["title"] == "Structure fire"
+    assert cache.cache_stats.hits == hits + 1
+
+    body = {key: incident[key] for key in ("description", "location", "status")}
+    assert client.put(url, json={**body, "title": "Structure fire, contained"}).status_code == 200
+    assert client.get(url).json()["title"] == "Structure fire, contained"
+
+
+def test_list_pages_are_dropped_by_any_write(client, make_incident, tag):
+    first = make_incident()
+    assert [item["id"] for item in client.get("/api/incidents", params={"location": tag}).json()] == [first["id"]]
+
+    second = make_incident()
+    ids = [item["id"] for item in client.get("/api/incidents", params={"location": tag}).json()]
+    assert ids == [first["id"], second["id"]]
+
+    response = client.put("/api/incidents/bulk", json=[{
+        "id": first["id"], "title": "Bulk edited", "description": first["description"], "location": tag,
+    }])
+    assert response.json()["succeeded"] == 1
+    assert client.get(f"/api/incidents/{first['id']}").json()["title"] == "Bulk edited"
+    titles = [item["title"] for item in client.get("/api/incidents", params={"location": tag}).json()]
+    assert titles == ["Bulk edited", "Structure fire"]
+
+
+def test_missing_values_are_not_cached():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_load("test:missing", loader) is None
+    assert cache.get_or_load("test:missing", loader) is None
+    assert len(calls) == 2
+
+
+def test_memory_cache_evicts_least_recently_used_and_expires():
+    stats = CacheStats()
+    memory = MemoryCache(stats, max_entries=2, ttl=60)
+    memory.set("a", 1)
+    memory.set("b", 2)
+    memory.get("a")
+    memory.set("c", 3)
+    assert (memory.get("a"), memory.get("b"), memory.get("c")) == (1, None, 3)
+    assert stats.evictions == 1
+
+    memory.ttl = 0.01
+    memory.set("d", 4)
+    time.sleep(0.02)
+    assert memory.get("d") is None
+    assert stats.expirations == 1
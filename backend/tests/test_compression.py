@@ -0,0 +1,69 @@
+"""Response compression and how it interacts with ETags."""
+import asyncio
+import zlib
+
+from compression import CompressionMiddleware
+from services.etag import encoded_etag
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+async def _streamed_export(scope, receive, send):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson")],
+    })
+    await send({"type": "http.response.body", "body": b'{"id":1}\n', "more_body": True})
+    await send({"type": "http.response.body", "body": b'{"id":2}\n', "more_body": False})
+
+
+def test_streamed_chunks_are_flushed_as_written():
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(_streamed_export, encodings=["gzip"])(scope, None, send))
+
+    start, first, last = messages
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # The first line can be decoded before the response is finished.
+    assert decompressor.decompress(first["body"]) == b'{"id":1}\n'
+    assert decompressor.decompress(last["body"]) == b'{"id":2}\n'
+    assert decompressor.eof
+
+
+def test_small_and_unaccepted_responses_are_not_compressed(client, make_incident):
+    incident = make_incident()
+    response = client.get(f"/api/incidents/{incident['id']}", headers=GZIP)
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/api/incidents/export", params={"format": "ndjson"}, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200 and "content-encoding" not in response.headers
+
+
+def test_export_is_gzipped(client, make_incident, tag):
+    for _ in range(3):
+        make_incident()
+    response = client.get("/api/incidents/export", params={"format": "ndjson", "location": tag}, headers=GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 3
+
+
+def test_strong_etag_names_the_encoding(client, make_incident):
+    incident = make_incident(description="x" * 2000)
+    response = client.get(f"/api/incidents/{incident['id']}", headers=GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    etag = response.headers["etag"]
+    plain_etag = client.get(f"/api/incidents/{incident['id']}", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    assert etag == encoded_etag(plain_etag, "gzip") != plain_etag
+
+    cached = client.get(f"/api/incidents/{incident['id']}", headers={**GZIP, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["etag"] == etag
+
+    body = {key: incident[key] for key in ("title", "description", "location", "status")}
+    assert client.put(f"/api/incidents/{incident['id']}", json=body, headers={"If-Match": etag}).status_code == 200
+    assert client.put(f"/api/incidents/{incident['id']}", json=body, headers={"If-Match": etag}).status_code == 412
@@ -0,0 +1,53 @@
+"""Conditional requests: ETags, 304 Not Modified and 412 Precondition Failed."""
+
+
+def test_entity_not_modified_until_written(client, make_incident):
+    incident = make_incident()
+    first = client.get(f"/api/incidents/{incident['id']}")
+    etag = first.headers["etag"]
+
+    assert client.get(f"/api/incidents/{incident['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/incidents/{incident['id']}", json={**incident, "status": "resolved"})
+    changed = client.get(f"/api/incidents/{incident['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["status"] == "resolved"
+    assert changed.headers["etag"] != etag
+
+
+def test_stale_if_match_is_rejected(client, make_incident):
+    incident = make_incident()
+    etag = client.get(f"/api/incidents/{incident['id']}").headers["etag"]
+
+    ok = client.put(f"/api/incidents/{incident['id']}", json=incident, headers={"If-Match": etag})
+    assert ok.status_code == 200
+    stale = client.put(f"/api/incidents/{incident['id']}", json=incident, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert client.put(
+        f"/api/incidents/{incident['id']}", json=incident, headers={"If-Match": ok.headers["etag"]}
+    ).status_code == 200
+
+
+def test_list_page_not_modified_until_an_item_changes(client, make_incident, tag):
+    incident = make_incident()
+    etag = client.get("/api/incidents", params={"location": tag}).headers["etag"]
+
+    assert client.get("/api/incidents", params={"location": tag}, headers={"If-None-Match": etag}).status_code == 304
+    client.put(f"/api/incidents/{incident['id']}", json={**incident, "title": "Two alarm fire"})
+    assert client.get("/api/incidents", params={"location": tag}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_timeline_page_changes_with_its_communications(client, make_incident, tag):
+    # A new communication leaves the incident's version alone, but the
+    # timeline embeds it, so the page must not come back 304.
+    incident = make_incident()
+    first = client.get("/api/incidents/timeline", params={"location": tag})
+    etag = first.headers["etag"]
+
+    response = client.post(
+        "/api/communications", json={"incident_id": incident["id"], "message": "Crew on scene", "channel": "sms"}
+    )
+    assert response.status_code == 201, response.text
+    after = client.get("/api/incidents/timeline", params={"location": tag}, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert [m["message"] for m in after.json()[0]["communications"]] == ["Crew on scene"]
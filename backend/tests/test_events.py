@@ -0,0 +1,20 @@
+"""Change events over the WebSocket feed."""
+
+
+def test_event_data_matches_the_api_response(client, make_incident, tag):
+    with client.websocket_connect("/api/events/ws?entity=incident") as websocket:
+        incident = make_incident()
+        event = websocket.receive_json()
+
+    assert (event["entity"], event["action"], event["id"]) == ("incident", "created", incident["id"])
+    assert event["data"] == incident
+    assert event["data"] == client.get(f"/api/incidents/{incident['id']}").json()
+
+
+def test_filtered_out_events_are_not_sent(client, make_incident, make_resource, tag):
+    with client.websocket_connect("/api/events/ws?entity=incident") as websocket:
+        make_resource()
+        incident = make_incident()
+        event = websocket.receive_json()
+
+    assert (event["entity"], event["id"]) == ("incident", incident["id"])
@@ -0,0 +1,108 @@
+"""Idempotency-Key handling for POST requests."""
+import asyncio
+import json
+
+import idempotency
+from idempotency import IdempotencyMiddleware, MemoryStore
+
+
+def test_retry_is_replayed_without_running_again(client, tag):
+    body = {"title": "Gas leak", "description": "Odour of gas in the lobby", "location": tag}
+    headers = {"Idempotency-Key": f"create-{tag}"}
+
+    first = client.post("/api/incidents", json=body, headers=headers)
+    retry = client.post("/api/incidents", json=body, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(client.get("/api/incidents", params={"location": tag}).json()) == 1
+
+
+def test_key_reused_for_another_body_is_rejected(client, tag):
+    headers = {"Idempotency-Key": f"create-{tag}"}
+    body = {"title": "Gas leak", "description": "Odour of gas in the lobby", "location": tag}
+    assert client.post("/api/incidents", json=body, headers=headers).status_code == 201
+
+    response = client.post("/api/incidents", json={**body, "title": "Water leak"}, headers=headers)
+    assert response.status_code == 422
+    assert len(client.get("/api/incidents", params={"location": tag}).json()) == 1
+
+
+def test_invalid_key_is_rejected(client):
+    response = client.post("/api/incidents", json={}, headers={"Idempotency-Key": "k" * 300})
+    assert response.status_code == 400
+
+
+class _SlowApp:
+    """Answers after a delay with a configurable status, counting the calls."""
+
+    def __init__(self, status: int = 201, delay: float = 0.05) -> None:
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await receive()
+        await asyncio.sleep(self.delay)
+        await send({"type": "http.response.start", "status": self.status, "headers": []})
+        await send({"type": "http.response.body", "body": json.dumps({"call": self.calls}).encode()})
+
+
+async def _post(middleware, key: bytes = b"key", body: bytes = b"{}") -> list[dict]:
+    scope = {"type": "http", "method": "POST", "path": "/api/incidents", "headers": [(b"idempotency-key", key)]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages
+
+
+def _status(messages: list[dict]) -> int:
+    return messages[0]["status"]
+
+
+def test_concurrent_duplicate_waits_for_the_first(monkeypatch):
+    monkeypatch.setattr(idempotency, "store", MemoryStore())
+    app = _SlowApp()
+    middleware = IdempotencyMiddleware(app, wait_seconds=5)
+
+    async def run():
+        return await asyncio.gather(_post(middleware), _post(middleware))
+
+    first, duplicate = asyncio.run(run())
+    assert app.calls == 1
+    assert _status(first) == _status(duplicate) == 201
+    assert duplicate[-1]["body"] == first[-1]["body"]
+    assert (b"idempotent-replayed", b"true") in duplicate[0]["headers"]
+
+
+def test_duplicate_gives_up_after_the_wait(monkeypatch):
+    monkeypatch.setattr(idempotency, "store", MemoryStore())
+    app = _SlowApp(delay=0.5)
+    middleware = IdempotencyMiddleware(app, wait_seconds=0.05)
+
+    async def run():
+        return await asyncio.gather(_post(middleware), _post(middleware))
+
+    first, duplicate = asyncio.run(run())
+    assert app.calls == 1
+    assert (_status(first), _status(duplicate)) == (201, 409)
+
+
+def test_server_error_is_not_stored(monkeypatch):
+    monkeypatch.setattr(idempotency, "store", MemoryStore())
+    app = _SlowApp(status=503, delay=0)
+    middleware = IdempotencyMiddleware(app)
+
+    assert _status(asyncio.run(_post(middleware))) == 503
+    app.status = 201
+    assert _status(asyncio.run(_post(middleware))) == 201
+    assert app.calls == 2
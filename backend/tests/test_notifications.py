@@ -0,0 +1,97 @@
+"""The outbound message queue: delivery, leases and retries."""
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Communication, Incident, OutboundMessage
+from notifications import NotificationDispatcher
+from services import notification_service
+from services.notification_service import FAILED, PENDING, SENDING, SENT
+
+
+class _RecordingSender:
+    def __init__(self, error=None) -> None:
+        self.error = error
+        self.recipients: list[str] = []
+
+    def send_batch(self, channel, items):
+        self.recipients += [item.recipient for item in items]
+        return [self.error] * len(items)
+
+
+def test_queued_communication_is_delivered(client, make_incident):
+    incident = make_incident()
+    response = client.post("/api/communications", json={
+        "incident_id": incident["id"], "message": "Evacuate the building", "channel": "phone",
+        "recipients": ["+15550100", "+15550101"],
+    })
+    assert response.status_code == 201
+    communication = response.json()
+    assert communication["delivery_status"] == "queued"
+
+    sender = _RecordingSender()
+    dispatcher = NotificationDispatcher(workers=0, concurrency={"phone": 1})
+    dispatcher.register_sender("phone", sender)
+    assert dispatcher.drain_once()
+
+    assert {"+15550100", "+15550101"} <= set(sender.recipients)
+    assert client.get(f"/api/communications/{communication['id']}").json()["delivery_status"] == "sent"
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/outbox.db")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        incident = Incident(title="Gas leak", description="Odour of gas in the lobby", status="open")
+        communication = Communication(incident=incident, communication_text="Stay indoors", channel="sms")
+        session.add(communication)
+        notification_service.enqueue(communication, ["+15550100"], session)
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _message(db) -> OutboundMessage:
+    return db.scalars(select(OutboundMessage).execution_options(populate_existing=True)).one()
+
+
+def test_claimed_message_is_leased_to_one_worker(db):
+    claimed = notification_service.claim_batch("sms", 10, 60, db)
+    assert [item.recipient for item in claimed] == ["+15550100"]
+    assert claimed[0].text == "Stay indoors"
+    assert _message(db).status == SENDING
+    assert notification_service.claim_batch("sms", 10, 60, db) == []
+
+
+def test_expired_lease_is_claimed_again(db):
+    # A worker that died holding the message: its lease has already run out.
+    first = notification_service.claim_batch("sms", 10, -1, db)
+    again = notification_service.claim_batch("sms", 10, 60, db)
+    assert [item.id for item in again] == [item.id for item in first]
+
+
+def test_failed_delivery_backs_off_then_gives_up(db):
+    items = notification_service.claim_batch("sms", 10, 60, db)
+    counts = notification_service.complete_batch(items, ["timeout"], db, 2, 30, 300)
+    assert counts == {"sent": 0, "retried": 1, "failed": 0}
+    message = _message(db)
+    assert (message.status, message.attempts, message.last_error) == (PENDING, 1, "timeout")
+    assert message.next_attempt_at > notification_service.utcnow()
+    # Not due again until the backoff has passed.
+    assert notification_service.claim_batch("sms", 10, 60, db) == []
+
+    message.next_attempt_at = notification_service.utcnow()
+    db.commit()
+    items = notification_service.claim_batch("sms", 10, 60, db)
+    assert notification_service.complete_batch(items, ["timeout"], db, 2, 30, 300)["failed"] == 1
+    assert _message(db).status == FAILED
+    assert db.scalar(select(Communication.delivery_status)) == "failed"
+
+
+def test_successful_delivery_is_recorded(db):
+    items = notification_service.claim_batch("sms", 10, 60, db)
+    notification_service.complete_batch(items, [None], db, 5, 2, 300)
+    message = _message(db)
+    assert (message.status, message.attempts, message.lease_until) == (SENT, 1, None)
+    assert db.scalar(select(Communication.delivery_status)) == "sent"
@@ -0,0 +1,138 @@
+"""Fails if any hot service query falls back to a full table scan.
+
+Runs the list/filter queries the API issues against an in-memory SQLite
+database built from ``models``, captures the SQL they emit, and checks
+``EXPLAIN QUERY PLAN`` for a bare ``SCAN <table>``. Run from the backend
+directory after changing a query or an index:
+
+    python -m pytest -q
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, Communication, Incident, Resource
+from schemas import AllocationRequest
+from services import allocation_service, archive_service, communication_service, incident_service, resource_service
+
+SINCE = datetime(2024, 1, 1)
+
+
+class _Capture:
+    """Collects the SELECTs an engine runs, except while paused."""
+
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, Any]] = []
+        self.active = True
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.active and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    @contextmanager
+    def paused(self):
+        self.active = False
+        try:
+            yield
+        finally:
+            self.active = True
+
+
+capture = _Capture()
+
+
+def _next_cursor(load: Callable[..., Any], db: Session, **params: Any) -> str:
+    # Fetching the first page is setup, not part of the query under check.
+    with capture.paused():
+        return load(db, limit=1, **params).next_cursor
+
+
+# (name, call) pairs; each call runs one service read the API exposes.
+CHECKS: list[tuple[str, Callable[[Session], Any]]] = [
+    ("incidents by status", lambda db: incident_service.get_incidents(db, status="open", limit=10)),
+    ("incidents by status, newest page", lambda db: incident_service.get_incidents(
+        db, status="open", order_by="created_at", limit=10)),
+    ("incidents by status, next page", lambda db: incident_service.get_incidents(
+        db, status="open", order_by="created_at", limit=10,
+        cursor=_next_cursor(incident_service.get_incidents, db, status="open", order_by="created_at"))),
+    ("incidents by created range", lambda db: incident_service.get_incidents(
+        db, created_after=SINCE, order_by="created_at", limit=10)),
+    ("incidents sorted by created_at", lambda db: incident_service.get_incidents(db, order_by="created_at", limit=10)),
+    ("incidents next page by id", lambda db: incident_service.get_incidents(
+        db, limit=10, cursor=_next_cursor(incident_service.get_incidents, db))),
+    ("incidents by status, with archive", lambda db: incident_service.get_incidents(
+        db, status="closed", order_by="created_at", limit=10, include_archived=True)),
+    ("incident timeline", lambda db: incident_service.get_incident_timeline(1, db, limit=10)),
+    ("incident timeline, with archive", lambda db: incident_service.get_incident_timeline(
+        1, db, limit=10, include_archived=True)),
+    ("incident timelines, latest messages", lambda db: incident_service.get_incident_timelines(
+        db, status="open", order_by="created_at", limit=10)),
+    ("resources by type and status", lambda db: resource_service.get_resources(
+        db, type="ambulance", status="available", limit=10)),
+    ("resources by type", lambda db: resource_service.get_resources(db, type="ambulance", limit=10)),
+    ("resources by status, newest page", lambda db: resource_service.get_resources(
+        db, status="available", order_by="created_at", limit=10)),
+    ("resources by created range", lambda db: resource_service.get_resources(
+        db, created_after=SINCE, order_by="created_at", limit=10)),
+    ("communications by incident", lambda db: communication_service.get_communications(db, incident_id=1, limit=10)),
+    ("communications by incident, newest page", lambda db: communication_service.get_communications(
+        db, incident_id=1, order_by="created_at", limit=10)),
+    ("communications by created range", lambda db: communication_service.get_communications(
+        db, created_after=SINCE, order_by="created_at", limit=10)),
+    ("communications by incident, with archive", lambda db: communication_service.get_communications(
+        db, incident_id=1, limit=10, include_archived=True)),
+    ("assignments by incident", lambda db: allocation_service.get_assignments(db, incident_id=1, limit=10)),
+    ("allocation demand and supply", lambda db: allocation_service.allocate(
+        AllocationRequest(resource_type="ambulance", dry_run=True), db)),
+    ("archive batch", lambda db: archive_service.archive_batch(db, batch_size=10)),
+]
+
+
+def full_scans(plan: list[tuple]) -> list[str]:
+    """Returns the plan steps that read a whole table without an index.
+
+    Scans of subqueries and materialized results are already bounded by the
+    steps that built them, so only real tables count.
+    """
+    return [
+        step.detail for step in plan
+        if step.detail.startswith("SCAN ")
+        and step.detail.split()[1] in Base.metadata.tables
+        and "USING" not in step.detail
+    ]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        # A few rows so cursors exist; the plans themselves come from the schema.
+        for _ in range(3):
+            incident = Incident(title="t", description="d", status="open", latitude=40.0, longitude=-75.0)
+            db.add(incident)
+            db.add(Resource(type="ambulance", name="r", status="available", latitude=40.0, longitude=-75.0))
+            db.add(Communication(incident=incident, communication_text="m", channel="radio"))
+        db.commit()
+    event.listen(engine, "before_cursor_execute", capture)
+    yield engine
+    event.remove(engine, "before_cursor_execute", capture)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("call", [call for _, call in CHECKS], ids=[name for name, _ in CHECKS])
+def test_no_full_table_scan(engine, call):
+    capture.statements.clear()
+    with sessionmaker(bind=engine)() as db:
+        call(db)
+    statements = list(capture.statements)
+    assert statements, "the check ran no SELECT"
+    for statement, parameters in statements:
+        with engine.connect() as conn:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        assert not full_scans(plan), f"{statement}\n" + "\n".join(step.detail for step in plan)
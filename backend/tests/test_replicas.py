@@ -0,0 +1,111 @@
+"""Read routing to replicas and read-your-writes after a write."""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+import replicas
+from database import RoutingSession
+from models import Base, Incident
+from replicas import READ_YOUR_WRITES_COOKIE, ReadYourWrites, ReadYourWritesMiddleware, Replica, ReplicaSet
+
+
+@pytest.fixture
+def lagging(tmp_path):
+    """A primary holding one incident and a replica that has not received it yet."""
+    primary = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    for engine in (primary, replica):
+        Base.metadata.create_all(engine)
+    with RoutingSession(bind=primary) as db:
+        db.add(Incident(id=1, title="Gas leak", description="Odour of gas in the lobby", status="open"))
+        db.commit()
+    yield primary, ReplicaSet([Replica("lagging", replica)])
+    primary.dispose()
+    replica.dispose()
+
+
+def _read(primary, replica_set, state=None):
+    token = replicas._current.set(state)
+    try:
+        with RoutingSession(bind=primary, replicas=replica_set) as db:
+            return db.get(Incident, 1)
+    finally:
+        replicas._current.reset(token)
+
+
+def test_reads_go_to_a_replica_unless_pinned(lagging):
+    primary, replica_set = lagging
+    assert _read(primary, replica_set) is None
+    assert _read(primary, replica_set, ReadYourWrites(pinned=True)) is not None
+
+
+def test_request_reads_its_own_commit(lagging):
+    primary, replica_set = lagging
+    state = ReadYourWrites()
+    token = replicas._current.set(state)
+    try:
+        with RoutingSession(bind=primary, replicas=replica_set) as db:
+            db.add(Incident(title="Traffic collision", description="Two cars on Main Street", status="open"))
+            db.commit()
+    finally:
+        replicas._current.reset(token)
+    assert state.wrote
+    assert _read(primary, replica_set, state) is not None
+
+
+def test_reads_fall_back_to_the_primary_without_a_healthy_replica(lagging):
+    primary, replica_set = lagging
+    replica_set.mark_down(replica_set.replicas[0], "test")
+    assert _read(primary, replica_set) is not None
+    assert replica_set.stats()["fallbacks"] == 1
+
+    replica_set.check()
+    assert replica_set.replicas[0].healthy
+    assert _read(primary, replica_set) is None
+
+
+async def _request(method: str, cookie: str = "") -> tuple[bool, list]:
+    """Runs one request; returns whether its reads were pinned and its response headers."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["pinned"] = replicas.primary_pinned()
+        if scope["method"] == "POST":
+            replicas.note_write()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    await ReadYourWritesMiddleware(app, window_seconds=5)(
+        {"type": "http", "method": method, "headers": headers}, None, send
+    )
+    return seen["pinned"], messages[0]["headers"]
+
+
+def _cookie(headers: list) -> str:
+    value = dict(headers)[b"set-cookie"].decode()
+    return value.split(";")[0]
+
+
+def test_write_pins_the_clients_next_reads():
+    pinned, headers = asyncio.run(_request("POST"))
+    assert pinned
+    cookie = _cookie(headers)
+    assert cookie.startswith(f"{READ_YOUR_WRITES_COOKIE}=")
+
+    assert asyncio.run(_request("GET", cookie))[0]
+    pinned, headers = asyncio.run(_request("GET"))
+    assert not pinned and not headers
+
+
+def test_expired_or_malformed_cookie_does_not_pin():
+    expired = f"{READ_YOUR_WRITES_COOKIE}={time.time() - 1:.3f}"
+    assert not asyncio.run(_request("GET", expired))[0]
+    assert not asyncio.run(_request("GET", f"{READ_YOUR_WRITES_COOKIE}=soon"))[0]
@@ -0,0 +1,22 @@
+"""Full-text search over incidents and communications."""
+
+
+def test_search_finds_and_highlights_matches(client, make_incident, tag):
+    incident = make_incident(description=f"Flames through the {tag} warehouse roof")
+
+    hits = client.get("/api/incidents/search", params={"q": f"{tag} roof"}).json()
+    assert [hit["id"] for hit in hits] == [incident["id"]]
+    assert "<mark>roof</mark>" in hits[0]["snippet"]
+
+
+def test_snippet_escapes_user_markup(client, make_incident, tag):
+    make_incident(description=f'<img src=x onerror="alert(1)"> {tag} <b>smoke</b>')
+
+    snippet = client.get("/api/incidents/search", params={"q": tag}).json()[0]["snippet"]
+    assert "<img" not in snippet and "<b>" not in snippet
+    assert "&lt;img" in snippet and "&lt;b&gt;smoke&lt;/b&gt;" in snippet
+    assert f"<mark>{tag}</mark>" in snippet
+
+
+def test_query_without_words_is_rejected(client):
+    assert client.get("/api/incidents/search", params={"q": "!!"}).status_code == 400
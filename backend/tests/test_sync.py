@@ -0,0 +1,80 @@
+"""Delta sync: change feed, offline uploads, conflicts and tombstones."""
+
+
+def _upload(client, *items):
+    response = client.post("/api/sync", json=list(items))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _changes_since(client, version):
+    response = client.get("/api/sync", params={"since": version})
+    assert response.status_code == 200, response.text
+    return {(change["entity"], change["id"]): change for change in response.json()["changes"]}
+
+
+def test_offline_changes_round_trip(client, tag):
+    data = {"title": "Flooded underpass", "description": "Two cars stuck in water", "location": tag}
+    created = _upload(client, {"entity": "incident", "data": data})["items"][0]
+    assert created["status"] == "created"
+    incident_id, version = created["id"], created["version"]
+
+    change = _changes_since(client, version - 1)[("incident", incident_id)]
+    assert change["version"] == version and not change["deleted"]
+    assert change["data"]["title"] == "Flooded underpass"
+
+    updated = _upload(client, {"entity": "incident", "id": incident_id, "base_version": version,
+                               "data": {**data, "status": "closed"}})["items"][0]
+    assert updated["status"] == "updated" and updated["version"] > version
+    changes = _changes_since(client, version)
+    assert changes[("incident", incident_id)]["data"]["status"] == "closed"
+
+
+def test_stale_update_is_a_conflict(client, tag):
+    data = {"title": "Gas leak", "description": "Odour of gas in the lobby", "location": tag}
+    created = _upload(client, {"entity": "incident", "data": data})["items"][0]
+    incident_id, version = created["id"], created["version"]
+    _upload(client, {"entity": "incident", "id": incident_id, "base_version": version,
+                     "data": {**data, "title": "Gas leak, evacuated"}})
+
+    result = _upload(client, {"entity": "incident", "id": incident_id, "base_version": version,
+                              "data": {**data, "title": "Gas leak, contained"}})
+    assert (result["applied"], result["conflicts"]) == (0, 1)
+    conflict = result["items"][0]
+    assert conflict["status"] == "conflict"
+    assert conflict["current"]["version"] > version
+    assert conflict["current"]["data"]["title"] == "Gas leak, evacuated"
+    assert client.get(f"/api/incidents/{incident_id}").json()["title"] == "Gas leak, evacuated"
+
+
+def test_delete_leaves_a_tombstone(client, make_resource):
+    resource = make_resource()
+    # A stale base_version is a conflict that reports the current version.
+    version = _upload(client, {"entity": "resource", "id": resource["id"], "base_version": 0,
+                               "data": {"type": "ambulance"}})["items"][0]["current"]["version"]
+
+    deleted = _upload(client, {"entity": "resource", "id": resource["id"], "base_version": version,
+                               "deleted": True})["items"][0]
+    assert deleted["status"] == "deleted"
+    tombstone = _changes_since(client, version)[("resource", resource["id"])]
+    assert tombstone["deleted"] and tombstone["data"] is None
+    assert client.get(f"/api/resources/{resource['id']}").status_code == 404
+
+    # Deleting again succeeds; an offline edit of it is a conflict.
+    again = _upload(client, {"entity": "resource", "id": resource["id"], "base_version": version, "deleted": True})
+    assert again["items"][0]["status"] == "deleted"
+    edited = _upload(client, {"entity": "resource", "id": resource["id"], "base_version": version,
+                              "data": {"type": "ambulance"}})["items"][0]
+    assert edited["status"] == "conflict" and edited["current"]["deleted"]
+
+
+def test_invalid_items_fail_alone(client, make_incident, tag):
+    incident = make_incident()
+    result = _upload(
+        client,
+        {"entity": "communication", "id": 1, "base_version": 1, "data": {}},
+        {"entity": "incident", "id": incident["id"], "data": {"title": "No base version"}},
+        {"entity": "communication", "data": {"incident_id": incident["id"], "message": "Crew on scene", "channel": "sms"}},
+    )
+    assert [item["status"] for item in result["items"]] == ["error", "error", "created"]
+    assert (result["applied"], result["failed"]) == (1, 2)
@@ -0,0 +1,52 @@
+"""Buffered resource telemetry: coalescing, overlay and conditional reads."""
+import telemetry
+
+
+def test_pings_coalesce_into_one_write(client, make_resource):
+    resource = make_resource()
+    pings = [{"id": resource["id"], "status": "deployed"}, {"id": resource["id"], "latitude": 40.8, "longitude": -73.9}]
+    response = client.post("/api/resources/telemetry", json=pings)
+    assert response.status_code == 202
+    assert response.json()["accepted"] == 2
+
+    telemetry.buffer.flush()
+    stored = client.get(f"/api/resources/{resource['id']}").json()
+    assert (stored["status"], stored["latitude"], stored["longitude"]) == ("deployed", 40.8, -73.9)
+    assert stored["version"] == resource["version"] + 1
+
+
+def test_buffered_ping_is_not_answered_with_304(client, make_resource, tag):
+    resource = make_resource()
+    etag = client.get(f"/api/resources/{resource['id']}").headers["etag"]
+    page_etag = client.get("/api/resources", params={"location": tag}).headers["etag"]
+
+    client.post("/api/resources/telemetry", json=[{"id": resource["id"], "status": "deployed"}])
+
+    fresh = client.get(f"/api/resources/{resource['id']}", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["status"] == "deployed"
+    # The ETag is still the stored row's, so a conditional PUT keeps working.
+    assert fresh.headers["etag"] == etag
+    page = client.get("/api/resources", params={"location": tag}, headers={"If-None-Match": page_etag})
+    assert page.status_code == 200
+    assert page.json()[0]["status"] == "deployed"
+
+    updated = client.put(
+        f"/api/resources/{resource['id']}", json={**resource, "name": "Renamed"}, headers={"If-Match": etag}
+    )
+    assert updated.status_code == 200
+
+
+def test_edit_wins_over_older_buffered_ping(client, make_resource):
+    resource = make_resource()
+    client.post("/api/resources/telemetry", json=[{"id": resource["id"], "status": "deployed"}])
+    client.put(f"/api/resources/{resource['id']}", json={**resource, "status": "unavailable"})
+
+    telemetry.buffer.flush()
+    assert client.get(f"/api/resources/{resource['id']}").json()["status"] == "unavailable"
+
+
+def test_unknown_status_is_rejected(client, make_resource):
+    resource = make_resource()
+    response = client.post("/api/resources/telemetry", json=[{"id": resource["id"], "status": "lost"}])
+    assert response.status_code == 422